@@ -0,0 +1,50 @@
+from core.busqueda import (
+    MARCA_INICIO, MARCA_FIN, PALABRAS_FRAGMENTO,
+    fts_disponible, terminos, expresion_fts, filtro_terminos, fragmento,
+)
+from .models import Publicacion
+
+# bm25 da valores más negativos a lo más relevante: ORDER BY ascendente
+SQL_FTS = """
+    SELECT p.id, p.usuario_id, p.contenido, p.fecha_creacion, p.likes,
+           u.username AS autor,
+           snippet(publicacion_fts, 0, %s, %s, '…', %s) AS fragmento
+    FROM publicacion_fts
+    JOIN comunidad_publicacion p ON p.id = publicacion_fts.rowid
+    JOIN auth_user u ON u.id = p.usuario_id
+    WHERE publicacion_fts MATCH %s
+    ORDER BY bm25(publicacion_fts)
+    LIMIT %s
+"""
+
+
+def buscar_publicaciones(texto, limite):
+    """
+    Publicaciones que contienen todas las palabras de 'texto' (como
+    prefijo), de la más relevante a la menos, con un fragmento marcado.
+    Una consulta en cualquiera de los dos caminos.
+    """
+    lista = terminos(texto)
+    if fts_disponible():
+        filas = Publicacion.objects.raw(
+            SQL_FTS, [MARCA_INICIO, MARCA_FIN, PALABRAS_FRAGMENTO, expresion_fts(lista), limite],
+        )
+        return [serializar(p, p.autor, p.fragmento) for p in filas]
+
+    filas = (
+        Publicacion.objects.select_related('usuario')
+        .filter(filtro_terminos('contenido', lista))
+        .order_by('-fecha_creacion', '-id')[:limite]
+    )
+    return [serializar(p, p.usuario.username, fragmento(p.contenido, lista)) for p in filas]
+
+
+def serializar(publicacion, autor, fragmento):
+    return {
+        'id': publicacion.id,
+        'username': autor,
+        'contenido': publicacion.contenido,
+        'fecha_creacion': publicacion.fecha_creacion,
+        'likes': publicacion.likes,
+        'fragmento': fragmento,
+    }
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comunidad', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='publicacion',
+            index=models.Index(fields=['-fecha_creacion', '-id'], name='publicacion_feed_idx'),
+        ),
+    ]
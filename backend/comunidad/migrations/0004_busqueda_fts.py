@@ -0,0 +1,59 @@
+from django.db import migrations
+
+# Índice FTS5 de contenido externo sobre comunidad_publicacion. Los triggers
+# lo mantienen al día; en motores que no son SQLite no se crea nada y la
+# búsqueda usa el respaldo con icontains (ver core/busqueda.py).
+CREAR = [
+    """
+    CREATE VIRTUAL TABLE publicacion_fts USING fts5(
+        contenido,
+        content='comunidad_publicacion', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER publicacion_fts_ai AFTER INSERT ON comunidad_publicacion BEGIN
+        INSERT INTO publicacion_fts(rowid, contenido) VALUES (new.id, new.contenido);
+    END
+    """,
+    """
+    CREATE TRIGGER publicacion_fts_ad AFTER DELETE ON comunidad_publicacion BEGIN
+        INSERT INTO publicacion_fts(publicacion_fts, rowid, contenido) VALUES ('delete', old.id, old.contenido);
+    END
+    """,
+    """
+    CREATE TRIGGER publicacion_fts_au AFTER UPDATE OF contenido ON comunidad_publicacion BEGIN
+        INSERT INTO publicacion_fts(publicacion_fts, rowid, contenido) VALUES ('delete', old.id, old.contenido);
+        INSERT INTO publicacion_fts(rowid, contenido) VALUES (new.id, new.contenido);
+    END
+    """,
+    # Lo que ya estaba publicado antes de la migración
+    "INSERT INTO publicacion_fts(publicacion_fts) VALUES ('rebuild')",
+]
+
+BORRAR = [
+    "DROP TRIGGER IF EXISTS publicacion_fts_au",
+    "DROP TRIGGER IF EXISTS publicacion_fts_ad",
+    "DROP TRIGGER IF EXISTS publicacion_fts_ai",
+    "DROP TABLE IF EXISTS publicacion_fts",
+]
+
+
+def solo_sqlite(sentencias):
+    def ejecutar(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in sentencias:
+            schema_editor.execute(sql)
+    return ejecutar
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comunidad', '0003_likes'),
+    ]
+
+    operations = [
+        migrations.RunPython(solo_sqlite(CREAR), solo_sqlite(BORRAR)),
+    ]
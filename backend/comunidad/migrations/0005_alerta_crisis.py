@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:59
+
+from django.db import migrations, models
+
+from core.busqueda import sentencias_triggers
+
+
+# En SQLite, AddField con default (y RemoveField al revertir) reconstruye
+# comunidad_publicacion y se pierden los triggers del índice FTS (0004):
+# se vuelven a crear en los dos sentidos
+def recrear_triggers_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in sentencias_triggers('publicacion_fts'):
+        schema_editor.execute(sql)
+    schema_editor.execute("INSERT INTO publicacion_fts(publicacion_fts) VALUES ('rebuild')")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comunidad', '0004_busqueda_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, recrear_triggers_fts),
+        migrations.AddField(
+            model_name='publicacion',
+            name='alerta_crisis',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(recrear_triggers_fts, migrations.RunPython.noop),
+    ]
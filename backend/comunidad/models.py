@@ -1,14 +1,62 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.cache import invalidar
+from core.pubsub import CANAL_FEED, publicar_al_confirmar
 
 class Publicacion(models.Model):
     usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='publicaciones')
     contenido = models.TextField()
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     likes = models.IntegerField(default=0)
+    # La moderación encontró una frase de riesgo: la app ofrece ayuda al autor
+    alerta_crisis = models.BooleanField(default=False)
 
     class Meta:
         ordering = ['-fecha_creacion'] # Los más nuevos primero
+        indexes = [
+            # Cubre el orden del feed paginado por cursor
+            models.Index(fields=['-fecha_creacion', '-id'], name='publicacion_feed_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.usuario.username}: {self.contenido[:20]}..."
\ No newline at end of file
+        return f"{self.usuario.username}: {self.contenido[:20]}..."
+
+
+# Un "ánimo" por usuario y publicación. El contador visible es Publicacion.likes
+class Like(models.Model):
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='likes')
+    publicacion = models.ForeignKey(Publicacion, on_delete=models.CASCADE, related_name='likes_recibidos')
+    fecha = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # También sirve de índice para "¿ya le di like?" por (usuario, publicación)
+            models.UniqueConstraint(fields=['usuario', 'publicacion'], name='like_usuario_publicacion_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.usuario_id} -> {self.publicacion_id}"
+
+
+# --- SEÑALES ---
+# Publicar o borrar cambia la primera página del feed que comparten todos
+@receiver(post_save, sender=Publicacion)
+@receiver(post_delete, sender=Publicacion)
+def invalidar_primera_pagina_feed(sender, instance, **kwargs):
+    invalidar('feed', 'primera')
+
+
+# Los clientes conectados al stream reciben la publicación nueva sin sondear
+@receiver(post_save, sender=Publicacion)
+def anunciar_publicacion(sender, instance, created, **kwargs):
+    if created:
+        publicar_al_confirmar(CANAL_FEED, 'publicacion', {
+            'id': instance.id,
+            'username': instance.usuario.username,
+            'contenido': instance.contenido,
+            'fecha_creacion': instance.fecha_creacion,
+            'likes': instance.likes,
+        })
@@ -5,7 +5,10 @@ class PublicacionSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='usuario.username', read_only=True)
     # Podríamos añadir avatar aquí si tuviéramos URL pública, por ahora usaremos iniciales en el front
 
+    # Viene anotado por la vista (EXISTS en la consulta del feed)
+    liked_by_me = serializers.BooleanField(read_only=True, default=False)
+
     class Meta:
         model = Publicacion
-        fields = ['id', 'username', 'contenido', 'fecha_creacion', 'likes']
+        fields = ['id', 'username', 'contenido', 'fecha_creacion', 'likes', 'liked_by_me']
         read_only_fields = ['id', 'fecha_creacion', 'likes']
\ No newline at end of file
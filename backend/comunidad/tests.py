@@ -1,3 +1,227 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .models import Publicacion, Like
+
+
+class PruebasFeed(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='feed_qa', password='Password123')
+        self.client.force_authenticate(user=self.user)
+        self.url = '/api/comunidad/feed/'
+        autores = [User.objects.create_user(username=f'autor_{i}', password='Password123') for i in range(10)]
+        Publicacion.objects.bulk_create([
+            Publicacion(usuario=autores[i % 10], contenido=f'Post {i}') for i in range(60)
+        ])
+
+    def test_feed_paginado_en_una_consulta(self):
+        """
+        Valida que cada página del feed sale en una sola consulta (autor
+        incluido) y que recorrer los cursores trae todo sin repetir.
+        """
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertTrue(response.data['results'][0]['username'].startswith('autor_'))
+
+        vistos = [p['id'] for p in response.data['results']]
+        siguiente = response.data['next']
+        while siguiente:
+            with self.assertNumQueries(1):
+                response = self.client.get(siguiente)
+            vistos += [p['id'] for p in response.data['results']]
+            siguiente = response.data['next']
+        self.assertEqual(len(vistos), 60)
+        self.assertEqual(vistos, sorted(vistos, reverse=True))
+
+    def test_tamano_maximo_y_nuevas_primero(self):
+        """
+        Valida que page_size tiene tope y que una publicación nueva aparece
+        al principio del feed.
+        """
+        response = self.client.get(self.url, {'page_size': 1000})
+        self.assertEqual(len(response.data['results']), 50)
+
+        response = self.client.post(self.url, {'contenido': 'Hola comunidad'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['username'], 'feed_qa')
+        response = self.client.get(self.url, {'page_size': 1})
+        self.assertEqual(response.data['results'][0]['contenido'], 'Hola comunidad')
+
+
+class PruebasLikes(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='likes_qa', password='Password123')
+        self.otro = User.objects.create_user(username='likes_otro', password='Password123')
+        self.client.force_authenticate(user=self.user)
+        self.publicacion = Publicacion.objects.create(usuario=self.otro, contenido='Hoy fue un buen día')
+        self.url = f'/api/comunidad/feed/{self.publicacion.id}/like/'
+
+    def test_like_una_vez_por_usuario(self):
+        """
+        Valida que repetir el like no suma dos veces, que quitarlo resta
+        una sola vez y que el contador coincide con las filas de Like.
+        """
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['likes'], 1)
+        self.assertTrue(response.data['liked_by_me'])
+
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['likes'], 1)
+
+        self.client.force_authenticate(user=self.otro)
+        self.assertEqual(self.client.post(self.url).data['likes'], 2)
+
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.client.delete(self.url).data['likes'], 1)
+        response = self.client.delete(self.url)
+        self.assertEqual(response.data['likes'], 1)
+        self.assertFalse(response.data['liked_by_me'])
+
+        self.publicacion.refresh_from_db()
+        self.assertEqual(self.publicacion.likes, Like.objects.filter(publicacion=self.publicacion).count())
+
+        self.assertEqual(self.client.post('/api/comunidad/feed/999999/like/').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_liked_by_me_sin_consultas_extra(self):
+        """
+        Valida que el feed marca las publicaciones con like del usuario
+        dentro de la misma consulta de la página.
+        """
+        otras = Publicacion.objects.bulk_create([
+            Publicacion(usuario=self.otro, contenido=f'Post {i}') for i in range(10)
+        ])
+        Like.objects.bulk_create([Like(usuario=self.user, publicacion=p) for p in otras[:3]])
+        # El like de otra persona no cuenta como mío
+        Like.objects.create(usuario=self.otro, publicacion=self.publicacion)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/comunidad/feed/')
+        marcadas = {p['id'] for p in response.data['results'] if p['liked_by_me']}
+        self.assertEqual(marcadas, {p.id for p in otras[:3]})
+
+
+class PruebasFeedEnCache(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='cache_qa', password='Password123')
+        self.otro = User.objects.create_user(username='cache_otro', password='Password123')
+        self.url = '/api/comunidad/feed/'
+        self.publicaciones = Publicacion.objects.bulk_create([
+            Publicacion(usuario=self.otro, contenido=f'Post {i}') for i in range(30)
+        ])
+        self.client.force_authenticate(user=self.user)
+
+    def test_primera_pagina_compartida_con_marcas_por_usuario(self):
+        """
+        Valida que la primera página se arma una vez y los demás usuarios
+        la reciben de caché, con sus propios liked_by_me encima.
+        """
+        primera = self.client.get(self.url).data
+        nueva = self.publicaciones[-1]
+        Like.objects.create(usuario=self.otro, publicacion=nueva)
+
+        self.client.force_authenticate(user=self.otro)
+        # Solo la consulta de sus likes: la página sale de caché
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual([p['id'] for p in response.data['results']], [p['id'] for p in primera['results']])
+        self.assertEqual(response.data['next'], primera['next'])
+        marcadas = [p['id'] for p in response.data['results'] if p['liked_by_me']]
+        self.assertEqual(marcadas, [nueva.id])
+
+        # La página siguiente no usa caché y sigue funcionando con el cursor
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_publicar_borrar_y_likes_actualizan_la_cache(self):
+        """
+        Valida que publicar o borrar invalida la página compartida y que un
+        like corrige el contador sin reconstruirla.
+        """
+        self.client.get(self.url)
+
+        response = self.client.post(self.url, {'contenido': 'Recién publicado'})
+        nueva_id = response.data['id']
+        self.assertEqual(self.client.get(self.url).data['results'][0]['id'], nueva_id)
+
+        objetivo = self.client.get(self.url).data['results'][1]['id']
+        self.client.force_authenticate(user=self.otro)
+        self.client.post(f'{self.url}{objetivo}/like/')
+        self.client.force_authenticate(user=self.user)
+        with self.assertNumQueries(1):
+            resultados = self.client.get(self.url).data['results']
+        publicacion = next(p for p in resultados if p['id'] == objetivo)
+        self.assertEqual(publicacion['likes'], 1)
+        self.assertFalse(publicacion['liked_by_me'])
+
+        Publicacion.objects.filter(pk=nueva_id).delete()
+        ids = [p['id'] for p in self.client.get(self.url).data['results']]
+        self.assertNotIn(nueva_id, ids)
+
+
+class PruebasBusquedaPublicaciones(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='busca_feed', password='Password123')
+        self.client.force_authenticate(user=self.user)
+        self.url = '/api/comunidad/buscar/'
+        self.relevante = Publicacion.objects.create(usuario=self.user, contenido='Respirar, respirar y respirar ayuda')
+        self.menos = Publicacion.objects.create(
+            usuario=self.user, contenido='Caminar por el parque un rato largo y después respirar hondo en casa',
+        )
+        Publicacion.objects.create(usuario=self.user, contenido='Nada que ver')
+
+    def test_ranking_y_fragmentos(self):
+        """
+        Valida que los resultados salen por relevancia (bm25), en una sola
+        consulta y con la palabra marcada en el fragmento.
+        """
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'q': 'respir'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        resultados = response.data['results']
+        self.assertEqual([r['id'] for r in resultados], [self.relevante.id, self.menos.id])
+        self.assertEqual(resultados[0]['username'], 'busca_feed')
+        self.assertIn('<mark>respirar</mark>', resultados[1]['fragmento'])
+
+        self.assertEqual(len(self.client.get(self.url, {'q': 'respir', 'limite': 1}).data['results']), 1)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_triggers_del_indice_presentes(self):
+        """
+        Valida que ninguna migración que reconstruye las tablas se llevó
+        los triggers que mantienen los índices FTS.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%%_fts_a_'")
+            triggers = {fila[0] for fila in cursor.fetchall()}
+        esperados = {f"{tabla}_{sufijo}" for tabla in ('publicacion_fts', 'registro_fts') for sufijo in ('ai', 'ad', 'au')}
+        self.assertEqual(triggers, esperados)
+
+    def test_reconstruir_y_respaldo(self):
+        """
+        Valida que el comando de reconstrucción deja el índice igual y que
+        el respaldo sin FTS encuentra lo mismo, ordenado por fecha.
+        """
+        call_command('reconstruir_busqueda', stdout=StringIO())
+        self.assertEqual(len(self.client.get(self.url, {'q': 'respirar'}).data['results']), 2)
+
+        with mock.patch('comunidad.busqueda.fts_disponible', return_value=False):
+            response = self.client.get(self.url, {'q': 'respirar'})
+        self.assertEqual([r['id'] for r in response.data['results']], [self.menos.id, self.relevante.id])
@@ -1,6 +1,8 @@
 from django.urls import path
-from .views import PublicacionListCreateView
+from .views import PublicacionListCreateView, LikeView, BuscarPublicacionesView
 
 urlpatterns = [
     path('feed/', PublicacionListCreateView.as_view(), name='feed-list-create'),
+    path('feed/<int:pk>/like/', LikeView.as_view(), name='feed-like'),
+    path('buscar/', BuscarPublicacionesView.as_view(), name='feed-buscar'),
 ]
\ No newline at end of file
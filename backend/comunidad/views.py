@@ -1,12 +1,152 @@
-from rest_framework import generics, permissions
-from .models import Publicacion
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.busqueda import BusquedaInvalida, leer_limite
+from core.cache import obtener_version, registrar_acierto, registrar_fallo
+from core.idempotencia import IdempotenciaMixin
+from core.moderacion import revisar
+from core.paginacion import KeysetPagination
+from .models import Publicacion, Like
 from .serializers import PublicacionSerializer
+from .busqueda import buscar_publicaciones
+
+logger = logging.getLogger(__name__)
+
+
+# El feed crece siempre: páginas por cursor, sin OFFSET ni COUNT(*)
+class FeedPagination(KeysetPagination):
+    ordering = ('-fecha_creacion', '-id')
+    page_size = 20
+    max_page_size = 50
+
 
-class PublicacionListCreateView(generics.ListCreateAPIView):
-    queryset = Publicacion.objects.all()
+def clave_likes(publicacion_id):
+    # Último contador conocido de una publicación, para corregir la página en caché
+    return f"feed:likes:{publicacion_id}"
+
+
+class PublicacionListCreateView(IdempotenciaMixin, generics.ListCreateAPIView):
     serializer_class = PublicacionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = FeedPagination
+
+    def get_queryset(self):
+        # El autor viene en el mismo JOIN: nada de una consulta por publicación
+        # y "¿le di like?" es un EXISTS dentro de esa misma consulta
+        return Publicacion.objects.select_related('usuario').only(
+            'id', 'contenido', 'fecha_creacion', 'likes', 'usuario__username',
+        ).annotate(
+            liked_by_me=Exists(Like.objects.filter(usuario=self.request.user, publicacion=OuterRef('pk'))),
+        )
+
+    def list(self, request, *args, **kwargs):
+        # Solo la primera página con el tamaño por defecto es igual para todos
+        paginator = self.paginator
+        if paginator.cursor_query_param in request.query_params or paginator.page_size_query_param in request.query_params:
+            return super().list(request, *args, **kwargs)
+
+        clave = f"feed:primera:{obtener_version('feed', 'primera')}"
+        pagina = cache.get(clave)
+        if pagina is None:
+            registrar_fallo('feed')
+            filas = paginator.paginate_queryset(self.get_queryset(), request, view=self)
+            resultados = self.get_serializer(filas, many=True).data
+            # Lo que se comparte va sin las marcas de este usuario
+            pagina = {
+                'cursor': paginator.cursor_siguiente(),
+                'results': [{k: v for k, v in p.items() if k != 'liked_by_me'} for p in resultados],
+            }
+            cache.set(clave, pagina, settings.FEED_CACHE_TIMEOUT)
+        else:
+            registrar_acierto('feed')
+            resultados = self.decorar(pagina['results'], request.user)
+
+        return Response({
+            'next': paginator.enlace_cursor(request, pagina['cursor']),
+            'results': resultados,
+        })
+
+    @staticmethod
+    def decorar(publicaciones, usuario):
+        """
+        Pone encima de la página compartida lo que cambia sin invalidarla:
+        los contadores de likes más nuevos (una lectura múltiple de caché) y
+        las marcas liked_by_me del usuario (una consulta por índice).
+        """
+        ids = [p['id'] for p in publicaciones]
+        contadores = cache.get_many([clave_likes(i) for i in ids])
+        mios = set(Like.objects.filter(usuario=usuario, publicacion_id__in=ids).values_list('publicacion_id', flat=True))
+        return [
+            {**p, 'likes': contadores.get(clave_likes(p['id']), p['likes']), 'liked_by_me': p['id'] in mios}
+            for p in publicaciones
+        ]
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        # Solo el autor se entera, en la respuesta de su propia publicación
+        response.data['alerta_crisis'] = self.alerta_crisis
+        return response
 
     def perform_create(self, serializer):
+        # Una pasada del autómata de moderación sobre el texto
+        revision = revisar(serializer.validated_data['contenido'])
+        if revision.bloqueada:
+            raise ValidationError({'contenido': ['La publicación contiene términos no permitidos.']})
+        self.alerta_crisis = revision.crisis
+        if revision.crisis:
+            logger.warning("[MODERACION] Señal de crisis en una publicación del usuario %s", self.request.user.id)
         # Asigna automáticamente el usuario logueado al crear el post
-        serializer.save(usuario=self.request.user)
\ No newline at end of file
+        serializer.save(usuario=self.request.user, alerta_crisis=revision.crisis)
+
+
+# POST /feed/{id}/like/ da like, DELETE lo quita. Repetir cualquiera no cambia nada.
+class LikeView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        publicacion = get_object_or_404(Publicacion.objects.only('id'), pk=pk)
+        try:
+            with transaction.atomic():
+                Like.objects.create(usuario=request.user, publicacion=publicacion)
+                # El contador sube en la base (F), sin leer-sumar-guardar
+                Publicacion.objects.filter(pk=pk).update(likes=F('likes') + 1)
+        except IntegrityError:
+            # Ya tenía like (doble toque o reintento): no se cuenta dos veces
+            return self.respuesta(pk, status.HTTP_200_OK)
+        return self.respuesta(pk, status.HTTP_201_CREATED)
+
+    def delete(self, request, pk):
+        with transaction.atomic():
+            borrados, _ = Like.objects.filter(usuario=request.user, publicacion_id=pk).delete()
+            if borrados:
+                Publicacion.objects.filter(pk=pk).update(likes=F('likes') - 1)
+        return self.respuesta(pk, status.HTTP_200_OK, liked=False)
+
+    def respuesta(self, pk, codigo, liked=True):
+        likes = Publicacion.objects.filter(pk=pk).values_list('likes', flat=True).first()
+        if likes is None:
+            return Response({'detail': 'No encontrado.'}, status=status.HTTP_404_NOT_FOUND)
+        # El feed en caché toma de aquí el contador nuevo en vez de invalidarse
+        cache.set(clave_likes(pk), likes, settings.FEED_CACHE_TIMEOUT)
+        return Response({'id': pk, 'likes': likes, 'liked_by_me': liked}, status=codigo)
+
+
+# GET /buscar/?q=ansiedad&limite=20 -> resultados por relevancia con fragmento marcado
+class BuscarPublicacionesView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            resultados = buscar_publicaciones(request.query_params.get('q'), leer_limite(request.query_params.get('limite')))
+        except BusquedaInvalida as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'results': resultados})
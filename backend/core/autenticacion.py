@@ -0,0 +1,208 @@
+"""
+Autenticación por token con caché, reemplazo directo de TokenAuthentication.
+
+Resolver token -> usuario pasa por dos niveles antes de ir a la base:
+1. un LRU en memoria del proceso (tamaño AUTH_CACHE_MAX, vida AUTH_CACHE_TTL)
+   con el usuario y el token ya armados;
+2. la caché compartida de Django (vida AUTH_CACHE_TTL_COMPARTIDO), que solo
+   guarda (id del usuario, activo, versión): nada de objetos User con su
+   hash de contraseña en una caché que puede ser un directorio en disco.
+   Con un acierto ahí el usuario se lee por clave primaria, sin la
+   consulta al token.
+Solo se guardan tokens válidos de usuarios activos.
+
+Borrar un token quita su entrada. Guardar un usuario (desactivarlo,
+cambiarle permisos o nombre) sube su versión 'auth:<id>' como en
+core/cache.py: las entradas compartidas con otra versión dejan de valer, sin
+llevar un índice de sus tokens. En el LRU de este proceso se anota el
+momento y se descartan las entradas guardadas antes. Los LRU de otros
+procesos no se enteran: ahí el dato viejo vive como mucho AUTH_CACHE_TTL
+segundos, por eso ese plazo es corto.
+"""
+import copy
+import statistics
+import threading
+import time
+from collections import OrderedDict, deque
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+
+from .cache import invalidar, obtener_version, registrar_acierto, registrar_fallo
+
+MUESTRAS_LATENCIA = 1000
+
+
+def _clave_token(clave):
+    return f"auth:token:{clave}"
+
+
+def _copia(instancia, relacionados=None):
+    # Cada petición recibe su propio objeto: nada de compartir el caché de
+    # relaciones (ej: user.perfilusuario) entre peticiones o hilos
+    nueva = copy.copy(instancia)
+    nueva._state = copy.copy(instancia._state)
+    nueva._state.fields_cache = dict(relacionados or {})
+    nueva.__dict__.pop('_prefetched_objects_cache', None)
+    return nueva
+
+
+class CacheTokens:
+    """
+    LRU acotado con vencimiento por entrada. Seguro entre hilos.
+    quitar_usuario() no recorre las entradas: anota cuándo se invalidó el
+    usuario y obtener() descarta las suyas leídas antes de ese momento. Las
+    marcas se olvidan pasado el ttl, cuando ya no queda entrada que tapar.
+    """
+
+    def __init__(self, maximo, ttl):
+        self.maximo = maximo
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._invalidados = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return None
+            vence, leido, usuario_id, valor = entrada
+            invalidado = self._invalidados.get(usuario_id)
+            if vence <= time.monotonic() or (invalidado is not None and leido <= invalidado):
+                del self._datos[clave]
+                return None
+            self._datos.move_to_end(clave)
+            return valor
+
+    def guardar(self, clave, usuario_id, valor, leido=None):
+        # leido: cuándo salió el dato de la base; si el usuario se invalidó
+        # después, la entrada ya nace descartada
+        with self._lock:
+            leido = time.monotonic() if leido is None else leido
+            self._datos[clave] = (leido + self.ttl, leido, usuario_id, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maximo:
+                self._datos.popitem(last=False)
+
+    def quitar(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def quitar_usuario(self, usuario_id):
+        with self._lock:
+            ahora = time.monotonic()
+            self._invalidados[usuario_id] = ahora
+            self._invalidados.move_to_end(usuario_id)
+            while self._invalidados:
+                primero, momento = next(iter(self._invalidados.items()))
+                if momento > ahora - self.ttl:
+                    break
+                del self._invalidados[primero]
+
+    def vaciar(self):
+        with self._lock:
+            self._datos.clear()
+            self._invalidados.clear()
+
+    def __len__(self):
+        return len(self._datos)
+
+
+_local = CacheTokens(settings.AUTH_CACHE_MAX, settings.AUTH_CACHE_TTL)
+
+# Métricas del proceso: aciertos por nivel y latencia de las últimas resoluciones
+_metricas_lock = threading.Lock()
+_aciertos = {'local': 0, 'compartida': 0, 'base': 0}
+_latencias = deque(maxlen=MUESTRAS_LATENCIA)
+
+
+def _medir(nivel, inicio):
+    with _metricas_lock:
+        _aciertos[nivel] += 1
+        _latencias.append((time.perf_counter() - inicio) * 1000)
+    if nivel == 'base':
+        registrar_fallo('auth')
+    else:
+        registrar_acierto('auth')
+
+
+def metricas_autenticacion():
+    with _metricas_lock:
+        aciertos = dict(_aciertos)
+        latencias = sorted(_latencias)
+    total = sum(aciertos.values())
+    return {
+        'resoluciones': aciertos,
+        'tasa_aciertos': round((aciertos['local'] + aciertos['compartida']) / total, 4) if total else None,
+        'entradas_locales': len(_local),
+        'latencia_ms': {
+            'p50': round(statistics.median(latencias), 4),
+            'p95': round(latencias[min(len(latencias) - 1, int(len(latencias) * 0.95))], 4),
+            'muestras': len(latencias),
+        } if latencias else None,
+    }
+
+
+def reiniciar_metricas_autenticacion():
+    with _metricas_lock:
+        for nivel in _aciertos:
+            _aciertos[nivel] = 0
+        _latencias.clear()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Mismo contrato que TokenAuthentication: 'Authorization: Token <clave>'."""
+
+    def authenticate_credentials(self, key):
+        inicio = time.perf_counter()
+        entrada = _local.obtener(key)
+        nivel = 'local'
+        if entrada is None:
+            leido = time.monotonic()
+            entrada = self.desde_compartida(key)
+            nivel = 'compartida'
+            if entrada is None:
+                # Valida igual que DRF (token inexistente o usuario inactivo -> 401)
+                usuario, token = super().authenticate_credentials(key)
+                entrada = (_copia(usuario), _copia(token))
+                guardar_en_compartida(key, usuario)
+                nivel = 'base'
+            _local.guardar(key, entrada[0].pk, entrada, leido)
+
+        usuario = _copia(entrada[0])
+        token = _copia(entrada[1], {'user': usuario})
+        _medir(nivel, inicio)
+        return usuario, token
+
+    def desde_compartida(self, key):
+        """(usuario, token) si la caché compartida tiene el token con la versión vigente del usuario."""
+        dato = cache.get(_clave_token(key))
+        if dato is None:
+            return None
+        usuario_id, activo, version = dato
+        if not activo or version != obtener_version('auth', usuario_id):
+            return None
+        usuario = get_user_model()._default_manager.filter(pk=usuario_id, is_active=True).first()
+        if usuario is None:
+            return None
+        return usuario, self.get_model()(key=key, user=usuario)
+
+
+def guardar_en_compartida(clave, usuario):
+    # La versión se lee después de la base: si el usuario cambió entre
+    # medio, invalidar() la sube otra vez al confirmar y esta entrada no vale
+    version = obtener_version('auth', usuario.pk)
+    cache.set(_clave_token(clave), (usuario.pk, usuario.is_active, version), settings.AUTH_CACHE_TTL_COMPARTIDO)
+
+
+def invalidar_token(clave):
+    _local.quitar(clave)
+    cache.delete(_clave_token(clave))
+
+
+def invalidar_usuario(usuario_id):
+    _local.quitar_usuario(usuario_id)
+    invalidar('auth', usuario_id)
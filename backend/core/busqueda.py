@@ -0,0 +1,129 @@
+"""
+Búsqueda de texto completo.
+
+En SQLite se usan tablas virtuales FTS5 ("contenido externo": el texto vive
+en la tabla normal y el índice solo guarda los términos). Las crean las
+migraciones de cada app junto con triggers de INSERT/UPDATE/DELETE, así que
+el índice se mantiene solo, incluso con bulk_create o .update(). Una
+búsqueda lee las listas de términos del índice y ordena por bm25: no
+recorre la tabla, por eso sigue en milisegundos con millones de filas.
+
+Otros motores (PostgreSQL, MySQL...) no tienen esas tablas: las migraciones
+no hacen nada y la búsqueda cae a icontains por cada término, ordenada por
+fecha y con el fragmento armado en Python. Funciona igual pero recorre la
+tabla; en esos motores conviene cambiarlo por su búsqueda propia
+(ej: SearchVector de django.contrib.postgres).
+
+Ojo: en SQLite, una migración que agrega una columna con default
+reconstruye la tabla y se lleva los triggers. Esa migración tiene que
+volver a crearlos (sentencias_triggers); si se escapó alguno, o el índice
+se desincroniza (restauración de un backup, SQL a mano):
+    python manage.py reconstruir_busqueda
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+MARCA_INICIO = '<mark>'
+MARCA_FIN = '</mark>'
+PALABRAS_FRAGMENTO = 12
+MAX_TERMINOS = 8
+LIMITE_RESULTADOS = 20
+MAX_RESULTADOS = 50
+
+# Tablas FTS5 que crean las migraciones (comunidad 0004, seguimiento 0010):
+# {tabla FTS: (tabla de contenido, columnas indexadas)}
+INDICES_FTS = {
+    'publicacion_fts': ('comunidad_publicacion', ('contenido',)),
+    'registro_fts': ('seguimiento_registrodiario', ('nota', 'usuario_id')),
+}
+
+_TERMINO = re.compile(r'\w+', re.UNICODE)
+
+
+class BusquedaInvalida(Exception):
+    pass
+
+
+def fts_disponible():
+    return connection.vendor == 'sqlite'
+
+
+def terminos(texto):
+    # Solo palabras: comillas, paréntesis, AND/OR/NEAR del usuario no llegan al motor
+    encontrados = _TERMINO.findall(texto or '')[:MAX_TERMINOS]
+    if not encontrados:
+        raise BusquedaInvalida("'q' debe tener al menos una palabra.")
+    return encontrados
+
+
+def expresion_fts(lista):
+    # Cada término entre comillas y como prefijo: "ansie"* encuentra "ansiedad"
+    return ' '.join('"{}"*'.format(t.replace('"', '""')) for t in lista)
+
+
+def leer_limite(valor):
+    try:
+        limite = int(valor) if valor is not None else LIMITE_RESULTADOS
+    except (TypeError, ValueError):
+        return LIMITE_RESULTADOS
+    return max(1, min(limite, MAX_RESULTADOS))
+
+
+def filtro_terminos(campo, lista):
+    # Respaldo sin FTS: todos los términos tienen que aparecer
+    return Q(*[Q(**{f"{campo}__icontains": t}) for t in lista])
+
+
+def fragmento(texto, lista, palabras=PALABRAS_FRAGMENTO):
+    """
+    Versión en Python de snippet() para el respaldo: unas cuantas palabras
+    alrededor del primer término encontrado, con las coincidencias marcadas.
+    """
+    texto = texto or ''
+    partes = texto.split()
+    minusculas = [t.lower() for t in lista]
+    inicio = next(
+        (i for i, p in enumerate(partes) if any(t in p.lower() for t in minusculas)), 0,
+    )
+    desde = max(0, inicio - palabras // 2)
+    ventana = partes[desde:desde + palabras]
+    marcadas = [
+        f"{MARCA_INICIO}{p}{MARCA_FIN}" if any(t in p.lower() for t in minusculas) else p
+        for p in ventana
+    ]
+    resultado = ' '.join(marcadas)
+    if desde > 0:
+        resultado = '…' + resultado
+    if desde + palabras < len(partes):
+        resultado += '…'
+    return resultado
+
+
+def sentencias_triggers(tabla_fts):
+    """Los tres triggers que mantienen el índice (los mismos de las migraciones)."""
+    tabla, columnas = INDICES_FTS[tabla_fts]
+    lista = ', '.join(columnas)
+    nuevos = ', '.join(f"new.{c}" for c in columnas)
+    viejos = ', '.join(f"old.{c}" for c in columnas)
+    borrar = f"INSERT INTO {tabla_fts}({tabla_fts}, rowid, {lista}) VALUES ('delete', old.id, {viejos});"
+    insertar = f"INSERT INTO {tabla_fts}(rowid, {lista}) VALUES (new.id, {nuevos});"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {tabla_fts}_ai AFTER INSERT ON {tabla} BEGIN {insertar} END",
+        f"CREATE TRIGGER IF NOT EXISTS {tabla_fts}_ad AFTER DELETE ON {tabla} BEGIN {borrar} END",
+        f"CREATE TRIGGER IF NOT EXISTS {tabla_fts}_au AFTER UPDATE OF {lista} ON {tabla} BEGIN {borrar} {insertar} END",
+    ]
+
+
+def reconstruir():
+    # Triggers que falten y 'rebuild', que vuelve a leer todo el texto de la tabla de contenido
+    if not fts_disponible():
+        return []
+    with connection.cursor() as cursor:
+        for tabla in INDICES_FTS:
+            for sql in sentencias_triggers(tabla):
+                cursor.execute(sql)
+            cursor.execute(f"INSERT INTO {tabla}({tabla}) VALUES('rebuild')")
+            cursor.execute(f"INSERT INTO {tabla}({tabla}) VALUES('optimize')")
+    return list(INDICES_FTS)
@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+# ==========================================
+# VERSIONES POR CLAVE
+# ==========================================
+# En vez de borrar entradas, cada escritura sube un contador de versión y la
+# versión forma parte de la clave. Lo viejo simplemente deja de leerse y
+# expira solo.
+
+def _clave_version(espacio, identificador):
+    return f"version:{espacio}:{identificador}"
+
+
+def _version_inicial():
+    # Si la versión se pierde (expulsión o reinicio), arrancamos desde el reloj
+    # para no volver a un número que ya tenga datos viejos guardados
+    return time.time_ns() // 1000
+
+
+def obtener_version(espacio, identificador):
+    clave = _clave_version(espacio, identificador)
+    version = cache.get(clave)
+    if version is None:
+        version = _version_inicial()
+        if not cache.add(clave, version, timeout=None):
+            version = cache.get(clave, version)
+    return version
+
+
+def incrementar_version(espacio, identificador):
+    clave = _clave_version(espacio, identificador)
+    try:
+        return cache.incr(clave)
+    except ValueError:
+        version = _version_inicial()
+        cache.set(clave, version, timeout=None)
+        return version
+
+
+def invalidar(espacio, identificador):
+    # Subimos la versión ya y otra vez al confirmar la transacción: si alguien
+    # leyó entre medio, guardó datos viejos bajo la versión intermedia
+    incrementar_version(espacio, identificador)
+    transaction.on_commit(lambda: incrementar_version(espacio, identificador))
+
+
+# ==========================================
+# MÉTRICAS DE ACIERTOS / FALLOS
+# ==========================================
+# Contadores en memoria del proceso (cada worker reporta los suyos)
+
+_lock = threading.Lock()
+_contadores = defaultdict(lambda: {'aciertos': 0, 'fallos': 0})
+
+
+def registrar_acierto(nombre):
+    with _lock:
+        _contadores[nombre]['aciertos'] += 1
+
+
+def registrar_fallo(nombre):
+    with _lock:
+        _contadores[nombre]['fallos'] += 1
+
+
+def metricas_cache():
+    with _lock:
+        resultado = {}
+        for nombre, valores in _contadores.items():
+            total = valores['aciertos'] + valores['fallos']
+            resultado[nombre] = {
+                **valores,
+                'tasa_aciertos': round(valores['aciertos'] / total, 4) if total else None,
+            }
+        return resultado
+
+
+def reiniciar_metricas():
+    with _lock:
+        _contadores.clear()
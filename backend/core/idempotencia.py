@@ -0,0 +1,144 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import ClaveIdempotencia
+
+CABECERA = 'Idempotency-Key'
+METODOS = ('POST', 'PUT', 'PATCH', 'DELETE')
+TAMANO_PURGA = 5000
+
+
+class ClaveEnCurso(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Ya hay una petición en curso con esta Idempotency-Key.'
+    default_code = 'idempotencia_en_curso'
+
+
+class ClaveReutilizada(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = 'Esta Idempotency-Key ya se usó con otra petición.'
+    default_code = 'idempotencia_reutilizada'
+
+
+class RespuestaRepetida(Exception):
+    # No es un error: corta la vista para devolver la respuesta guardada
+    def __init__(self, registro):
+        self.registro = registro
+
+
+def huella(request):
+    cuerpo = json.dumps(request.data, sort_keys=True, cls=JSONEncoder, default=str)
+    return hashlib.sha256(f"{request.method}\n{request.path}\n{cuerpo}".encode()).hexdigest()
+
+
+class IdempotenciaMixin:
+    """
+    Para vistas DRF que crean cosas. Si la petición trae Idempotency-Key:
+    - la primera vez se ejecuta la vista y se guarda la respuesta;
+    - los reintentos con la misma clave reciben esa respuesta sin volver a
+      ejecutar nada (cabecera Idempotent-Replayed: true);
+    - la misma clave con otro cuerpo u otra ruta devuelve 422, y si la
+      primera sigue en curso, 409.
+    Los errores 5xx no se guardan, así el reintento vuelve a ejecutar.
+    Mientras está en curso la clave vence a los IDEMPOTENCIA_LEASE segundos
+    y no a las 24 h: si el proceso muere sin responder, pasado ese plazo un
+    reintento la toma y ejecuta la vista de nuevo.
+    Va antes de APIView en la herencia: class Vista(IdempotenciaMixin, APIView).
+    """
+    _clave_idempotencia = None
+
+    def initial(self, request, *args, **kwargs):
+        # Primero autenticación y permisos: las claves son por usuario
+        super().initial(request, *args, **kwargs)
+        clave = request.headers.get(CABECERA)
+        if not clave or request.method not in METODOS:
+            return
+        if len(clave) > 255:
+            raise ValidationError({CABECERA: 'Máximo 255 caracteres.'})
+
+        ahora = timezone.now()
+        actual = huella(request)
+        registro = ClaveIdempotencia.objects.filter(usuario=request.user, clave=clave).first()
+        if registro is not None and registro.expira <= ahora:
+            registro.delete()
+            registro = None
+
+        if registro is None:
+            try:
+                with transaction.atomic():
+                    self._clave_idempotencia = ClaveIdempotencia.objects.create(
+                        usuario=request.user, clave=clave, huella=actual,
+                        expira=ahora + timedelta(seconds=settings.IDEMPOTENCIA_LEASE),
+                    )
+                return
+            except IntegrityError:
+                # Otra petición con la misma clave la registró justo antes
+                registro = ClaveIdempotencia.objects.get(usuario=request.user, clave=clave)
+
+        if registro.huella != actual:
+            raise ClaveReutilizada()
+        if registro.estado_http is None:
+            raise ClaveEnCurso()
+        raise RespuestaRepetida(registro)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, RespuestaRepetida):
+            registro = exc.registro
+            cuerpo = json.loads(registro.cuerpo) if registro.cuerpo else None
+            return Response(cuerpo, status=registro.estado_http, headers={'Idempotent-Replayed': 'true'})
+        try:
+            return super().handle_exception(exc)
+        except Exception:
+            # Error no controlado (500): se libera la clave para poder reintentar
+            self._liberar_clave()
+            raise
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        registro = self._clave_idempotencia
+        if registro is not None:
+            if response.status_code >= 500:
+                self._liberar_clave()
+            else:
+                datos = getattr(response, 'data', None)
+                # Filtrado por pk y estado: si tardamos más que el lease y un
+                # reintento ya tomó la clave, su fila es otra y no se pisa
+                ClaveIdempotencia.objects.filter(pk=registro.pk, estado_http__isnull=True).update(
+                    estado_http=response.status_code,
+                    cuerpo=json.dumps(datos, cls=JSONEncoder) if datos is not None else '',
+                    expira=timezone.now() + timedelta(seconds=settings.IDEMPOTENCIA_TTL),
+                )
+                self._clave_idempotencia = None
+        return response
+
+    def _liberar_clave(self):
+        if self._clave_idempotencia is not None:
+            self._clave_idempotencia.delete()
+            self._clave_idempotencia = None
+
+
+def purgar_vencidas(tamano=TAMANO_PURGA, ahora=None):
+    """
+    Borra las claves vencidas por lotes, recorriendo el índice de 'expira'
+    desde la más vieja: cada lote es un rango corto del índice.
+    Devuelve la cantidad borrada.
+    """
+    ahora = ahora or timezone.now()
+    borradas = 0
+    while True:
+        ids = list(
+            ClaveIdempotencia.objects.filter(expira__lte=ahora)
+            .order_by('expira').values_list('id', flat=True)[:tamano]
+        )
+        if not ids:
+            return borradas
+        borradas += ClaveIdempotencia.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,88 @@
+"""
+Límites de frecuencia con cubetas de fichas (token bucket).
+
+Cada clave (ej: 'login:ip:1.2.3.4') tiene una cubeta de 'capacidad' fichas
+que se rellena a 'por_segundo'. Cada intento gasta una; sin fichas, se
+rechaza y se informa cuánto falta para la próxima. Permite ráfagas cortas
+(la capacidad) pero no sostener más que el ritmo de relleno.
+
+El backend se elige con settings.LIMITES_BACKEND:
+- MemoriaLimites (defecto): en el proceso, sin E/S. Con varios workers cada
+  uno lleva su cuenta, así que el límite efectivo se multiplica por N.
+- CacheLimites: en la caché por defecto, compartida entre procesos. Leer y
+  escribir no es atómico: intentos simultáneos sobre la misma clave pueden
+  colar alguna ficha de más, nunca bloquear de más.
+
+consumir() es async para que la vista de login no pase por un hilo solo
+para contar (el de memoria no hace E/S; el de caché usa aget/aset).
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+MAX_CLAVES = 100_000
+
+
+def rellenar(fichas, antes, ahora, capacidad, por_segundo):
+    """Gasta una ficha si hay. Devuelve (fichas que quedan, segundos de espera; 0 si pasó)."""
+    fichas = min(capacidad, fichas + max(0.0, ahora - antes) * por_segundo)
+    if fichas >= 1:
+        return fichas - 1, 0
+    return fichas, (1 - fichas) / por_segundo
+
+
+class MemoriaLimites:
+    def __init__(self, maximo=MAX_CLAVES):
+        self.maximo = maximo
+        self._cubetas = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def consumir(self, clave, capacidad, por_segundo):
+        return self.tomar(clave, capacidad, por_segundo, time.monotonic())
+
+    def tomar(self, clave, capacidad, por_segundo, ahora):
+        with self._lock:
+            fichas, antes = self._cubetas.pop(clave, (capacidad, ahora))
+            fichas, espera = rellenar(fichas, antes, ahora, capacidad, por_segundo)
+            self._cubetas[clave] = (fichas, ahora)
+            # Acotado: las claves más viejas son las que más tiempo llevan
+            # rellenándose, olvidarlas equivale casi siempre a una cubeta llena
+            while len(self._cubetas) > self.maximo:
+                self._cubetas.popitem(last=False)
+        return espera
+
+    def vaciar(self):
+        with self._lock:
+            self._cubetas.clear()
+
+
+class CacheLimites:
+    async def consumir(self, clave, capacidad, por_segundo):
+        # Hora de pared: la comparten todos los procesos (monotonic no)
+        ahora = time.time()
+        # Las claves traen texto del usuario: se resumen para que sean válidas en cualquier backend
+        clave_cache = 'limite:' + hashlib.sha256(clave.encode()).hexdigest()
+        fichas, antes = await cache.aget(clave_cache) or (capacidad, ahora)
+        fichas, espera = rellenar(fichas, antes, ahora, capacidad, por_segundo)
+        # Pasado el tiempo de rellenarse entera, la entrada no aporta nada
+        await cache.aset(clave_cache, (fichas, ahora), math.ceil(capacidad / por_segundo) + 1)
+        return espera
+
+
+_limites = None
+_limites_lock = threading.Lock()
+
+
+def obtener_limites():
+    global _limites
+    if _limites is None:
+        with _limites_lock:
+            if _limites is None:
+                _limites = import_string(settings.LIMITES_BACKEND)()
+    return _limites
@@ -0,0 +1,72 @@
+import random
+import statistics
+import string
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.moderacion import Automata, normalizar
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el autómata de moderación con el bucle ingenuo (un 'in' por término) "
+        "sobre términos y publicaciones sintéticos. No toca la base de datos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--terminos', type=int, default=20000)
+        parser.add_argument('--textos', type=int, default=500)
+        parser.add_argument('--largo', type=int, default=80, help="Palabras por publicación")
+        parser.add_argument('--semilla', type=int, default=1)
+
+    def palabra(self, rng):
+        return ''.join(rng.choices(string.ascii_lowercase + 'áéíóñ', k=rng.randint(4, 10)))
+
+    def medir(self, funcion, textos):
+        tiempos = []
+        for texto in textos:
+            inicio = time.perf_counter()
+            funcion(texto)
+            tiempos.append((time.perf_counter() - inicio) * 1_000_000)
+        tiempos.sort()
+        return statistics.median(tiempos), tiempos[int(len(tiempos) * 0.95) - 1]
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['semilla'])
+        terminos = {self.palabra(rng) for _ in range(options['terminos'])}
+        # Algunas frases de varias palabras, como las de crisis
+        terminos |= {f"{self.palabra(rng)} {self.palabra(rng)}" for _ in range(options['terminos'] // 10)}
+        lista = [(t, 'bloqueo') for t in terminos]
+
+        inicio = time.perf_counter()
+        automata = Automata(lista)
+        self.stdout.write(f"Autómata con {len(lista)} términos compilado en {time.perf_counter() - inicio:.2f} s")
+
+        vocabulario = [self.palabra(rng) for _ in range(2000)]
+        muestra = rng.sample(sorted(terminos), min(len(terminos), 50))
+        textos = []
+        for i in range(options['textos']):
+            palabras = rng.choices(vocabulario, k=options['largo'])
+            # Uno de cada diez textos trae un término prohibido
+            if i % 10 == 0:
+                palabras[rng.randrange(len(palabras))] = rng.choice(muestra)
+            textos.append(' '.join(palabras))
+
+        normalizados = [normalizar(t) for t, _ in lista]
+
+        def ingenuo(texto):
+            texto = normalizar(texto)
+            return [t for t in normalizados if t in texto]
+
+        p50_a, p95_a = self.medir(automata.buscar, textos)
+        p50_i, p95_i = self.medir(ingenuo, textos)
+        self.stdout.write(f"{'método':>12} | {'p50 µs':>9} | {'p95 µs':>9}")
+        self.stdout.write(f"{'autómata':>12} | {p50_a:>9.1f} | {p95_a:>9.1f}")
+        self.stdout.write(f"{'ingenuo':>12} | {p50_i:>9.1f} | {p95_i:>9.1f}")
+        self.stdout.write(self.style.SUCCESS(f"El autómata es {p50_i / p50_a:.0f}x más rápido (p50)."))
+
+        # Mismos textos marcados por los dos métodos (el ingenuo no mira límites de palabra)
+        marcados_a = sum(1 for t in textos if automata.buscar(t))
+        marcados_i = sum(1 for t in textos if ingenuo(t))
+        self.stdout.write(f"Textos marcados: autómata {marcados_a}, ingenuo {marcados_i}")
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.cache import invalidar
+from core.models import TerminoModeracion
+
+
+class Command(BaseCommand):
+    help = "Carga términos de moderación desde un archivo de texto (uno por línea)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help="Ruta al archivo UTF-8; las líneas vacías o con # se ignoran")
+        parser.add_argument('--categoria', choices=[c for c, _ in TerminoModeracion.CATEGORIAS], default=TerminoModeracion.BLOQUEO)
+        parser.add_argument('--reemplazar', action='store_true', help="Borra antes los términos de esa categoría")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['archivo'], encoding='utf-8') as archivo:
+                terminos = {l.strip() for l in archivo if l.strip() and not l.lstrip().startswith('#')}
+        except OSError as e:
+            raise CommandError(str(e))
+
+        categoria = options['categoria']
+        with transaction.atomic():
+            if options['reemplazar']:
+                TerminoModeracion.objects.filter(categoria=categoria).delete()
+            TerminoModeracion.objects.bulk_create(
+                [TerminoModeracion(termino=t[:100], categoria=categoria) for t in terminos],
+                ignore_conflicts=True, batch_size=1000,
+            )
+            # bulk_create no dispara señales: avisamos a los procesos a mano
+            invalidar('moderacion', 'terminos')
+        self.stdout.write(self.style.SUCCESS(f"{len(terminos)} términos de '{categoria}' cargados."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.idempotencia import purgar_vencidas, TAMANO_PURGA
+
+
+class Command(BaseCommand):
+    help = "Borra las Idempotency-Key vencidas (recorre el índice de 'expira' por lotes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=TAMANO_PURGA, help="Claves por lote")
+
+    def handle(self, *args, **options):
+        borradas = purgar_vencidas(tamano=options['lote'])
+        self.stdout.write(self.style.SUCCESS(f"Claves vencidas borradas: {borradas}"))
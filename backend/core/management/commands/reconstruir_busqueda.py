@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.busqueda import reconstruir
+
+
+class Command(BaseCommand):
+    help = "Recrea los triggers que falten y reconstruye los índices FTS5 desde las tablas de contenido (solo SQLite)."
+
+    def handle(self, *args, **options):
+        tablas = reconstruir()
+        if not tablas:
+            self.stdout.write("Este motor no usa FTS5: la búsqueda va por icontains, no hay nada que reconstruir.")
+            return
+        self.stdout.write(self.style.SUCCESS(f"Índices reconstruidos: {', '.join(tablas)}"))
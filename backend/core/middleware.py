@@ -1,6 +1,8 @@
 import time
 import logging
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
 # Configuramos un logger específico para monitoreo
 logger = logging.getLogger('django.server')
 
@@ -9,17 +11,37 @@ class PerformanceMonitorMiddleware:
     Middleware para medir y registrar el tiempo de respuesta de cada solicitud.
     Cumple con el requisito de monitoreo de desempeño.
     """
+    # Funciona en WSGI y en ASGI: con ASGI no obliga a pasar cada petición
+    # (ni cada conexión del stream de eventos) por un hilo
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
         # 1. Registrar tiempo inicial
         start_time = time.time()
 
         # 2. Procesar la solicitud
         response = self.get_response(request)
 
-        # 3. Calcular duración
+        self.registrar(request, response, start_time)
+        return response
+
+    async def __acall__(self, request):
+        start_time = time.time()
+        response = await self.get_response(request)
+        self.registrar(request, response, start_time)
+        return response
+
+    def registrar(self, request, response, start_time):
+        # 3. Calcular duración (en un stream, hasta que empieza a responder)
         duration = time.time() - start_time
         
         # 4. Obtener metadatos
@@ -32,6 +54,4 @@ class PerformanceMonitorMiddleware:
         if duration > 0.5:
             logger.warning(f"[ALERTA DESEMPEÑO] LENTO: {method} {path} - {duration:.4f}s")
         else:
-            logger.info(f"[MONITOREO] {method} {path} - {status_code} - {duration:.4f}s")
-
-        return response
\ No newline at end of file
+            logger.info(f"[MONITOREO] {method} {path} - {status_code} - {duration:.4f}s")
\ No newline at end of file
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:59
+
+from django.db import migrations, models
+
+# Frases de riesgo con las que la app ofrece ayuda. La lista de bloqueo
+# queda vacía: la carga cada despliegue (cargar_terminos).
+CRISIS_INICIALES = [
+    'suicidio', 'suicidarme', 'quiero morir', 'quiero morirme', 'no quiero vivir',
+    'quitarme la vida', 'matarme', 'hacerme daño', 'autolesion', 'cortarme',
+    'no vale la pena vivir', 'desaparecer para siempre',
+]
+
+
+def crear_terminos(apps, schema_editor):
+    TerminoModeracion = apps.get_model('core', 'TerminoModeracion')
+    TerminoModeracion.objects.bulk_create(
+        [TerminoModeracion(termino=t, categoria='crisis') for t in CRISIS_INICIALES], ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TerminoModeracion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termino', models.CharField(max_length=100)),
+                ('categoria', models.CharField(choices=[('bloqueo', 'Bloquear publicación'), ('crisis', 'Señal de crisis')], max_length=10)),
+                ('activo', models.BooleanField(default=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('termino', 'categoria'), name='termino_moderacion_unico')],
+            },
+        ),
+        migrations.RunPython(crear_terminos, migrations.RunPython.noop),
+    ]
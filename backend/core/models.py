@@ -0,0 +1,73 @@
+from django.db import models
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .autenticacion import invalidar_token, invalidar_usuario
+from .cache import invalidar
+
+
+# Respuestas guardadas por Idempotency-Key (ver idempotencia.py)
+class ClaveIdempotencia(models.Model):
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    clave = models.CharField(max_length=255)
+    # sha256 de método + ruta + cuerpo: la misma clave con otro pedido es un error
+    huella = models.CharField(max_length=64)
+    # Vacío mientras la primera petición sigue en curso
+    estado_http = models.PositiveSmallIntegerField(blank=True, null=True)
+    cuerpo = models.TextField(blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    # En curso: vence con el lease (IDEMPOTENCIA_LEASE); respondida: con IDEMPOTENCIA_TTL
+    expira = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['usuario', 'clave'], name='idempotencia_usuario_clave_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.usuario_id}:{self.clave}"
+
+
+# Lista de moderación (ver moderacion.py). 'bloqueo' rechaza la publicación;
+# 'crisis' la deja pasar pero la marca para ofrecer ayuda.
+class TerminoModeracion(models.Model):
+    BLOQUEO = 'bloqueo'
+    CRISIS = 'crisis'
+    CATEGORIAS = [(BLOQUEO, 'Bloquear publicación'), (CRISIS, 'Señal de crisis')]
+
+    termino = models.CharField(max_length=100)
+    categoria = models.CharField(max_length=10, choices=CATEGORIAS)
+    activo = models.BooleanField(default=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['termino', 'categoria'], name='termino_moderacion_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.categoria}: {self.termino}"
+
+
+# --- SEÑALES ---
+# Cualquier cambio en la lista hace que cada proceso recompile su autómata
+@receiver(post_save, sender=TerminoModeracion)
+@receiver(post_delete, sender=TerminoModeracion)
+def invalidar_terminos_moderacion(sender, instance, **kwargs):
+    invalidar('moderacion', 'terminos')
+
+
+# Logout o token revocado: deja de valer ya, no cuando venza la caché
+@receiver(post_delete, sender=Token)
+def invalidar_token_borrado(sender, instance, **kwargs):
+    invalidar_token(instance.key)
+
+
+# Usuario desactivado o con datos nuevos: se descarta el usuario cacheado.
+# El login solo actualiza last_login y no hace falta tirar la caché.
+@receiver(post_save, sender=User)
+def invalidar_tokens_usuario(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    invalidar_usuario(instance.pk)
@@ -0,0 +1,149 @@
+"""
+Moderación de texto con un autómata Aho-Corasick.
+
+Los términos salen de TerminoModeracion y se compilan una vez por proceso
+en un autómata (trie + enlaces de fallo). Revisar un texto es una sola
+pasada carácter por carácter, sin importar cuántos términos haya: con
+decenas de miles sigue en microsegundos, mientras que probar cada término
+con 'in' crece con el tamaño de la lista.
+
+El autómata se recompila solo cuando cambia la versión
+'moderacion:terminos', que suben las señales de TerminoModeracion (y
+cargar_terminos al cargar en bloque).
+"""
+import re
+import threading
+import unicodedata
+from collections import deque, namedtuple
+
+from core.cache import obtener_version
+from .models import TerminoModeracion
+
+Coincidencia = namedtuple('Coincidencia', 'termino categoria inicio')
+Revision = namedtuple('Revision', 'bloqueada crisis coincidencias')
+
+
+# Marcas diacríticas combinables (tildes, diéresis, virgulilla de la ñ...)
+_MARCAS = re.compile('[\u0300-\u036f]+')
+
+
+def normalizar(texto):
+    # Sin mayúsculas ni tildes: "Suicídio" y "suicidio" son el mismo término
+    if texto.isascii():
+        return texto.lower()
+    return _MARCAS.sub('', unicodedata.normalize('NFKD', texto)).casefold()
+
+
+class Automata:
+    """
+    Nodo 0 es la raíz. Por nodo: transiciones {carácter: nodo}, enlace de
+    fallo y los términos que terminan ahí (incluidos los que llegan por el
+    enlace de fallo, así la búsqueda no tiene que recorrerlos).
+    """
+
+    def __init__(self, terminos):
+        self.transiciones = [{}]
+        self.salidas = [()]
+        salidas = [[]]
+        for termino, categoria in terminos:
+            clave = normalizar(termino).strip()
+            if not clave:
+                continue
+            nodo = 0
+            for caracter in clave:
+                siguiente = self.transiciones[nodo].get(caracter)
+                if siguiente is None:
+                    siguiente = len(self.transiciones)
+                    self.transiciones[nodo][caracter] = siguiente
+                    self.transiciones.append({})
+                    salidas.append([])
+                nodo = siguiente
+            salidas[nodo].append((clave, categoria))
+        # Caracteres que aparecen en algún término: cualquier otro lleva a la raíz
+        self.alfabeto = frozenset(caracter for hijos in self.transiciones for caracter in hijos)
+
+        # Enlaces de fallo por niveles (BFS): el fallo de un nodo siempre es menos profundo
+        self.fallos = [0] * len(self.transiciones)
+        pendientes = deque(self.transiciones[0].values())
+        while pendientes:
+            nodo = pendientes.popleft()
+            for caracter, hijo in self.transiciones[nodo].items():
+                fallo = self.fallos[nodo]
+                while fallo and caracter not in self.transiciones[fallo]:
+                    fallo = self.fallos[fallo]
+                destino = self.transiciones[fallo].get(caracter, 0)
+                self.fallos[hijo] = destino if destino != hijo else 0
+                salidas[hijo].extend(salidas[self.fallos[hijo]])
+                pendientes.append(hijo)
+        self.salidas = [tuple(s) for s in salidas]
+
+    def buscar(self, texto):
+        """
+        Términos que aparecen en texto como palabras completas (no "ira"
+        dentro de "mentira"). Una pasada; el texto se normaliza igual que
+        los términos.
+        """
+        texto = normalizar(texto)
+        transiciones, salidas = self.transiciones, self.salidas
+        encontrados = []
+        nodo = 0
+        for posicion, caracter in enumerate(texto):
+            siguiente = transiciones[nodo].get(caracter)
+            if siguiente is None:
+                siguiente = self.resolver(nodo, caracter) if caracter in self.alfabeto else 0
+            nodo = siguiente
+            if salidas[nodo]:
+                fin = posicion + 1
+                for termino, categoria in salidas[nodo]:
+                    inicio = fin - len(termino)
+                    if (inicio == 0 or not texto[inicio - 1].isalnum()) and (fin == len(texto) or not texto[fin].isalnum()):
+                        encontrados.append(Coincidencia(termino, categoria, inicio))
+        return encontrados
+
+    def resolver(self, nodo, caracter):
+        """
+        Sigue los enlaces de fallo hasta un nodo que tenga ese carácter (o
+        la raíz) y guarda el resultado como transición directa: cada
+        (nodo, carácter) que aparece en textos reales se resuelve una vez y
+        después es un solo dict.get. Guardarlo en el mismo trie es correcto
+        porque la transición de un nodo sin ese hijo es la de su fallo.
+        Solo se llama con caracteres del alfabeto de los términos, así que lo
+        guardado queda acotado por nodos × alfabeto y no crece con lo que
+        escriban los usuarios (emojis, otros alfabetos...).
+        """
+        transiciones, fallos = self.transiciones, self.fallos
+        actual = nodo
+        siguiente = transiciones[actual].get(caracter)
+        while siguiente is None and actual:
+            actual = fallos[actual]
+            siguiente = transiciones[actual].get(caracter)
+        siguiente = siguiente or 0
+        # Asignar una clave de dict es atómico: varios hilos pueden completar a la vez
+        transiciones[nodo][caracter] = siguiente
+        return siguiente
+
+
+# Autómata por proceso, recompilado cuando cambia la versión de la lista
+_actual = {'version': None, 'automata': Automata([])}
+_lock = threading.Lock()
+
+
+def automata_actual():
+    version = obtener_version('moderacion', 'terminos')
+    if _actual['version'] != version:
+        with _lock:
+            if _actual['version'] != version:
+                terminos = TerminoModeracion.objects.filter(activo=True).values_list('termino', 'categoria')
+                _actual['automata'] = Automata(terminos.iterator())
+                _actual['version'] = version
+    return _actual['automata']
+
+
+def revisar(texto):
+    coincidencias = automata_actual().buscar(texto or '')
+    categorias = {c.categoria for c in coincidencias}
+    return Revision(
+        bloqueada=TerminoModeracion.BLOQUEO in categorias,
+        crisis=TerminoModeracion.CRISIS in categorias,
+        coincidencias=coincidencias,
+    )
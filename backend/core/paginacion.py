@@ -0,0 +1,116 @@
+import base64
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def filtro_despues_de(ordering, valores):
+    """
+    Filas que van "después" de valores según ordering. Para (a, b, c)
+    descendente y cursor (x, y, z) se expande a:
+        a <= x AND (a < x OR (a = x AND (b < y OR (b = y AND c < z))))
+    El primer "a <= x" le da al motor un rango directo sobre el índice.
+    """
+    campos = [c.lstrip('-') for c in ordering]
+    operadores = ['lt' if c.startswith('-') else 'gt' for c in ordering]
+
+    condicion = Q(**{f"{campos[-1]}__{operadores[-1]}": valores[-1]})
+    for campo, operador, valor in reversed(list(zip(campos[:-1], operadores[:-1], valores[:-1]))):
+        condicion = Q(**{f"{campo}__{operador}": valor}) | (Q(**{campo: valor}) & condicion)
+
+    primero = 'lte' if operadores[0] == 'lt' else 'gte'
+    return Q(**{f"{campos[0]}__{primero}": valores[0]}) & condicion
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por cursor sobre una clave compuesta (ej: fecha, hora, id).
+    El cursor guarda los valores de la última fila entregada y la siguiente
+    página se pide con "WHERE (clave) < cursor ... LIMIT n", así que cada
+    página cuesta lo mismo sin importar lo profundo que se llegue: sin
+    OFFSET y sin COUNT(*).
+
+    El último campo del ordering debe ser único (normalmente 'id' o '-id').
+    """
+    ordering = ('-id',)
+    page_size = 50
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Cursor inválido.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        campos = [c.lstrip('-') for c in self.ordering]
+
+        queryset = queryset.order_by(*self.ordering)
+        valores = self.decode_cursor(request, queryset.model, campos)
+        if valores is not None:
+            queryset = queryset.filter(filtro_despues_de(self.ordering, valores))
+
+        filas = list(queryset[:self.page_size + 1])
+        self.has_next = len(filas) > self.page_size
+        self.page = filas[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            tamano = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(tamano, self.max_page_size))
+
+    def get_next_link(self):
+        return self.enlace_cursor(self.request, self.cursor_siguiente())
+
+    def cursor_siguiente(self):
+        # Solo el token: sirve para guardar una página en caché sin la URL
+        if not self.has_next:
+            return None
+        ultimo = self.page[-1]
+        valores = [self.valor_a_json(getattr(ultimo, c.lstrip('-'))) for c in self.ordering]
+        return base64.urlsafe_b64encode(json.dumps(valores).encode()).decode()
+
+    def enlace_cursor(self, request, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    # --- Cursor ---
+
+    def decode_cursor(self, request, modelo, campos):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            valores = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            if len(valores) != len(campos):
+                raise ValueError
+            return [modelo._meta.get_field(c).to_python(v) for c, v in zip(campos, valores)]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def valor_a_json(valor):
+        return valor.isoformat() if hasattr(valor, 'isoformat') else valor
@@ -0,0 +1,133 @@
+"""
+Publicación/suscripción de eventos en vivo para el stream SSE.
+
+El backend se elige con settings.PUBSUB_BACKEND. El de memoria (por
+defecto) reparte los eventos dentro del proceso: sirve con un solo
+proceso ASGI que atienda también las escrituras. Con varios procesos hace
+falta un backend compartido (ej: Redis pub/sub) que implemente lo mismo:
+publicar(canal, evento) y suscribir(canales) -> Suscripcion.
+
+Un cliente conectado es solo una cola asyncio esperando: no gasta CPU
+hasta que llega un evento o toca el latido.
+"""
+import asyncio
+import itertools
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+CANAL_FEED = 'feed'
+MAX_PENDIENTES = 100
+
+
+def canal_usuario(usuario_id):
+    return f"usuario:{usuario_id}"
+
+
+class Suscripcion:
+    """
+    Cola de eventos de una conexión. Si el cliente no lee y se le juntan
+    más de MAX_PENDIENTES, se corta: al reconectar vuelve a pedir el feed
+    en vez de que el proceso acumule memoria por él.
+    """
+
+    def __init__(self, bus, canales, loop):
+        self.bus = bus
+        self.canales = tuple(canales)
+        self.loop = loop
+        self.cola = asyncio.Queue(maxsize=MAX_PENDIENTES)
+        self.cerrada = False
+
+    def entregar(self, evento):
+        # Siempre en el hilo del loop (llega por call_soon_threadsafe)
+        if self.cerrada:
+            return
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            self.cerrar()
+            self.cola.get_nowait()
+            self.cola.put_nowait(None)
+
+    async def siguiente(self, timeout=None):
+        """Próximo evento; None si la suscripción se cortó. TimeoutError si no llegó nada."""
+        return await asyncio.wait_for(self.cola.get(), timeout)
+
+    def cerrar(self):
+        if not self.cerrada:
+            self.cerrada = True
+            self.bus.desuscribir(self)
+
+
+def entregar_a_todas(suscripciones, evento):
+    for suscripcion in suscripciones:
+        suscripcion.entregar(evento)
+
+
+class MemoriaBus:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._suscripciones = {}
+        self._ids = itertools.count(1)
+
+    def suscribir(self, canales):
+        # Se llama desde el loop de la conexión (vista async)
+        suscripcion = Suscripcion(self, canales, asyncio.get_running_loop())
+        with self._lock:
+            for canal in suscripcion.canales:
+                self._suscripciones.setdefault(canal, set()).add(suscripcion)
+        return suscripcion
+
+    def desuscribir(self, suscripcion):
+        with self._lock:
+            for canal in suscripcion.canales:
+                destinatarios = self._suscripciones.get(canal)
+                if destinatarios is not None:
+                    destinatarios.discard(suscripcion)
+                    if not destinatarios:
+                        del self._suscripciones[canal]
+
+    def publicar(self, canal, evento):
+        """
+        Se puede llamar desde cualquier hilo (las vistas síncronas corren
+        en hilos aparte): cada entrega se agenda en el loop del suscriptor.
+        """
+        evento = {**evento, 'id': next(self._ids)}
+        with self._lock:
+            destinatarios = list(self._suscripciones.get(canal, ()))
+        # Un solo aviso por loop (normalmente uno por proceso), no uno por conexión
+        por_loop = {}
+        for suscripcion in destinatarios:
+            por_loop.setdefault(suscripcion.loop, []).append(suscripcion)
+        for loop, suscripciones in por_loop.items():
+            try:
+                loop.call_soon_threadsafe(entregar_a_todas, suscripciones, evento)
+            except RuntimeError:
+                # El loop ya se cerró (conexiones muertas sin limpiar)
+                for suscripcion in suscripciones:
+                    self.desuscribir(suscripcion)
+        return len(destinatarios)
+
+    def conectados(self):
+        with self._lock:
+            return len(set().union(*self._suscripciones.values())) if self._suscripciones else 0
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def obtener_bus():
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                _bus = import_string(settings.PUBSUB_BACKEND)()
+    return _bus
+
+
+def publicar_al_confirmar(canal, tipo, datos):
+    # Solo se anuncia lo que quedó guardado: si la transacción se revierte, no sale
+    transaction.on_commit(lambda: obtener_bus().publicar(canal, {'tipo': tipo, 'datos': datos}))
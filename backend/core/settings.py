@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +46,7 @@ INSTALLED_APPS = [
     'seguimiento',
     'usuarios',
     'comunidad',
+    'core', # Modelos transversales (claves de idempotencia)
     # Apps de terceros
     'rest_framework',
     'rest_framework.authtoken',
@@ -78,6 +81,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'core.wsgi.application'
+ASGI_APPLICATION = 'core.asgi.application'
 
 
 # Database
@@ -91,6 +95,80 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# MINDWELL_CACHE=local (por proceso, defecto) | archivo | db
+# Con 'db' hay que crear la tabla una vez: python manage.py createcachetable
+
+_CACHE_BACKENDS = {
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'mindwell',
+    },
+    'archivo': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('MINDWELL_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'mindwell_cache')),
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'mindwell_cache',
+    },
+}
+
+CACHES = {
+    'default': _CACHE_BACKENDS[os.environ.get('MINDWELL_CACHE', 'local')],
+}
+
+# Segundos que vive el payload del dashboard (igual se invalida al escribir)
+STATS_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Catálogo de logros pre-serializado (se invalida al cambiar un Logro)
+CATALOGO_LOGROS_TIMEOUT = 60 * 60 * 24
+
+# Primera página del feed compartida. Se invalida al publicar o borrar; el
+# plazo solo acota datos que no avisan (ej: un cambio de nombre de usuario)
+FEED_CACHE_TIMEOUT = 60 * 10
+
+# Eventos en vivo (core/pubsub.py). El bus en memoria solo reparte dentro
+# del proceso: con varios workers hay que cambiarlo por uno compartido.
+PUBSUB_BACKEND = 'core.pubsub.MemoriaBus'
+SSE_LATIDO = 20  # segundos entre comentarios de keep-alive
+SSE_RECONEXION_MS = 5000
+
+# Token -> usuario en caché (core/autenticacion.py). El LRU de cada proceso
+# no se entera de cambios hechos en otros: su plazo es lo máximo que un
+# usuario desactivado puede seguir entrando por ese proceso.
+AUTH_CACHE_MAX = 10000
+AUTH_CACHE_TTL = 30
+AUTH_CACHE_TTL_COMPARTIDO = 60 * 5
+
+# Límite de intentos de login (usuarios/acceso.py): una cubeta de fichas por
+# IP y otra por nombre de usuario, (capacidad, fichas que se recuperan por
+# segundo); None desactiva esa cubeta. Se revisan antes de calcular el hash.
+# El backend de memoria cuenta por proceso; CacheLimites comparte la cuenta
+# entre procesos a través de la caché por defecto.
+LIMITES_BACKEND = 'core.limites.MemoriaLimites'
+LOGIN_LIMITE_IP = (20, 20 / 60)
+LOGIN_LIMITE_USUARIO = (5, 5 / 300)
+# Hilos que calculan hashes de contraseña y cuántos logins pueden estar
+# esperando uno (en curso + en cola) antes de responder 503
+LOGIN_HILOS_HASH = 2
+LOGIN_MAX_EN_ESPERA = 16
+
+# Cuánto se recuerda una Idempotency-Key (los reintentos de la app llegan en minutos)
+IDEMPOTENCIA_TTL = 60 * 60 * 24
+# Cuánto puede estar una clave en curso: si la petición no respondió en ese
+# plazo (el proceso murió), un reintento la toma en vez de recibir 409
+IDEMPOTENCIA_LEASE = 60
+
+
+# Notificaciones de recordatorios (python manage.py despachar_recordatorios)
+NOTIFICACIONES_BACKEND = os.environ.get('MINDWELL_NOTIFICACIONES', 'seguimiento.notificaciones.LogBackend')
+NOTIFICACIONES_ARCHIVO = os.environ.get(
+    'MINDWELL_NOTIFICACIONES_ARCHIVO', os.path.join(tempfile.gettempdir(), 'mindwell_notificaciones.jsonl')
+)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -138,7 +216,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Esto es CRUCIAL para que el backend reconozca el "Token" en el header
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'core.autenticacion.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -0,0 +1,425 @@
+import asyncio
+import random
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from gamificacion.eventos import registrar_xp
+from gamificacion.models import EventoXP, Logro, LogroUsuario
+from seguimiento.models import RegistroDiario
+
+from .autenticacion import CacheTokens, _local, metricas_autenticacion, reiniciar_metricas_autenticacion
+from .cache import incrementar_version
+from .idempotencia import purgar_vencidas
+from .models import ClaveIdempotencia, TerminoModeracion
+from .moderacion import Automata, normalizar
+from .pubsub import CANAL_FEED, MAX_PENDIENTES, MemoriaBus, canal_usuario, obtener_bus
+
+
+class PruebasIdempotencia(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='idempotencia_qa', password='Password123')
+        self.client.force_authenticate(user=self.user)
+        self.url_accion = '/api/gamificacion/accion/'
+
+    def post(self, url, datos, clave):
+        return self.client.post(url, datos, format='json', HTTP_IDEMPOTENCY_KEY=clave)
+
+    def test_reintento_devuelve_la_misma_respuesta_sin_ejecutar(self):
+        """
+        Valida que un reintento con la misma clave recibe la respuesta
+        guardada y no vuelve a sumar XP ni a crear registros.
+        """
+        primera = self.post(self.url_accion, {'tipo': 'mision_diaria', 'xp': 50}, 'accion-1')
+        segunda = self.post(self.url_accion, {'tipo': 'mision_diaria', 'xp': 50}, 'accion-1')
+        self.assertEqual(primera.status_code, status.HTTP_200_OK)
+        self.assertEqual(segunda.status_code, status.HTTP_200_OK)
+        self.assertEqual(segunda.json(), primera.json())
+        self.assertEqual(segunda['Idempotent-Replayed'], 'true')
+        self.assertEqual(EventoXP.objects.filter(usuario=self.user).count(), 1)
+
+        datos = {'emocion': 'feliz', 'nivel_intensidad': 7, 'nivel_energia': 5}
+        for _ in range(3):
+            response = self.post('/api/seguimiento/diario/', datos, 'diario-1')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(RegistroDiario.objects.filter(usuario=self.user).count(), 1)
+
+        # Sin cabecera se comporta como siempre
+        self.client.post(self.url_accion, {'tipo': 'mision_diaria', 'xp': 50}, format='json')
+        self.assertEqual(EventoXP.objects.filter(usuario=self.user).count(), 2)
+
+    def test_clave_reutilizada_o_en_curso(self):
+        """
+        Valida que la misma clave con otro cuerpo da 422 y que si la primera
+        petición sigue en curso el reintento recibe 409.
+        """
+        self.post(self.url_accion, {'tipo': 'otro', 'xp': 10}, 'clave-a')
+        response = self.post(self.url_accion, {'tipo': 'otro', 'xp': 99}, 'clave-a')
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        # Misma petición que 'clave-a' pero sin respuesta todavía
+        ClaveIdempotencia.objects.create(
+            usuario=self.user, clave='clave-b', huella=ClaveIdempotencia.objects.get(clave='clave-a').huella,
+            expira=timezone.now() + timedelta(hours=1),
+        )
+        response = self.post(self.url_accion, {'tipo': 'otro', 'xp': 10}, 'clave-b')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_clave_en_curso_abandonada_se_retoma(self):
+        """
+        Valida que una clave en curso vence con el lease corto: si el proceso
+        murió sin responder, pasado el lease el reintento ejecuta la vista y
+        la respuesta se guarda por el TTL completo.
+        """
+        ahora = timezone.now()
+        en_curso = []
+
+        def registrar(*args):
+            en_curso.append(ClaveIdempotencia.objects.get(clave='clave-d').expira)
+            return registrar_xp(*args)
+
+        with mock.patch('gamificacion.views.registrar_xp', side_effect=registrar):
+            self.post(self.url_accion, {'tipo': 'otro', 'xp': 10}, 'clave-d')
+        self.assertLessEqual(en_curso[0], timezone.now() + timedelta(seconds=settings.IDEMPOTENCIA_LEASE))
+
+        # El proceso que la tenía murió antes de guardar la respuesta
+        ClaveIdempotencia.objects.create(
+            usuario=self.user, clave='clave-e', huella=ClaveIdempotencia.objects.get(clave='clave-d').huella,
+            expira=ahora + timedelta(seconds=settings.IDEMPOTENCIA_LEASE),
+        )
+        self.assertEqual(self.post(self.url_accion, {'tipo': 'otro', 'xp': 10}, 'clave-e').status_code, status.HTTP_409_CONFLICT)
+
+        ClaveIdempotencia.objects.filter(clave='clave-e').update(expira=ahora - timedelta(seconds=1))
+        response = self.post(self.url_accion, {'tipo': 'otro', 'xp': 10}, 'clave-e')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Idempotent-Replayed', response)
+        registro = ClaveIdempotencia.objects.get(clave='clave-e')
+        self.assertEqual(registro.estado_http, 200)
+        self.assertGreater(registro.expira, ahora + timedelta(hours=23))
+
+    def test_error_del_servidor_libera_la_clave(self):
+        """
+        Valida que si la vista falla con un error no controlado la clave no
+        queda guardada y el reintento vuelve a ejecutarse.
+        """
+        with mock.patch('gamificacion.views.registrar_xp', side_effect=RuntimeError("caída")):
+            with self.assertRaises(RuntimeError):
+                self.post(self.url_accion, {'tipo': 'otro', 'xp': 10}, 'clave-c')
+        self.assertFalse(ClaveIdempotencia.objects.filter(clave='clave-c').exists())
+
+        response = self.post(self.url_accion, {'tipo': 'otro', 'xp': 10}, 'clave-c')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Idempotent-Replayed', response)
+
+    def test_purga_solo_las_vencidas(self):
+        """
+        Valida que la purga borra por lotes solo las claves vencidas y que
+        una clave vencida se puede volver a usar.
+        """
+        ahora = timezone.now()
+        ClaveIdempotencia.objects.bulk_create([
+            ClaveIdempotencia(usuario=self.user, clave=f'vieja-{i}', huella='-', estado_http=200, expira=ahora - timedelta(minutes=i + 1))
+            for i in range(7)
+        ])
+        self.post(self.url_accion, {'tipo': 'otro', 'xp': 10}, 'vigente')
+
+        self.assertEqual(purgar_vencidas(tamano=3), 7)
+        self.assertEqual(list(ClaveIdempotencia.objects.values_list('clave', flat=True)), ['vigente'])
+
+        ClaveIdempotencia.objects.filter(clave='vigente').update(expira=ahora - timedelta(seconds=1))
+        response = self.post(self.url_accion, {'tipo': 'otro', 'xp': 10}, 'vigente')
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(EventoXP.objects.filter(usuario=self.user).count(), 2)
+
+
+class PruebasEventosEnVivo(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='eventos_qa', password='Password123')
+        self.otro = User.objects.create_user(username='eventos_otro', password='Password123')
+        self.token = Token.objects.create(user=self.user)
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def suscribir(self, bus, canales):
+        async def suscribir():
+            return bus.suscribir(canales)
+        return self.loop.run_until_complete(suscribir())
+
+    def siguiente(self, suscripcion):
+        return self.loop.run_until_complete(suscripcion.siguiente(1))
+
+    def test_bus_entrega_desde_otros_hilos_y_corta_a_los_atrasados(self):
+        """
+        Valida que publicar desde otro hilo llega a la cola del suscriptor y
+        que quien no lee y se atrasa queda desconectado del bus.
+        """
+        bus = MemoriaBus()
+        suscripcion = self.suscribir(bus, ['a'])
+        hilo = threading.Thread(target=bus.publicar, args=('a', {'tipo': 'x', 'datos': 1}))
+        hilo.start()
+        hilo.join()
+        self.assertEqual(self.siguiente(suscripcion)['datos'], 1)
+        self.assertEqual(bus.publicar('b', {'tipo': 'x', 'datos': 2}), 0)
+
+        for i in range(MAX_PENDIENTES + 1):
+            bus.publicar('a', {'tipo': 'x', 'datos': i})
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.assertEqual(bus.conectados(), 0)
+        eventos = [self.siguiente(suscripcion) for _ in range(MAX_PENDIENTES)]
+        self.assertIsNone(eventos[-1])
+
+    def test_publicaciones_y_logros_se_anuncian_al_confirmar(self):
+        """
+        Valida que una publicación nueva llega al canal del feed y un logro
+        solo al canal de su dueño, una vez confirmada la transacción.
+        """
+        feed = self.suscribir(obtener_bus(), [CANAL_FEED])
+        mio = self.suscribir(obtener_bus(), [canal_usuario(self.user.id)])
+        ajeno = self.suscribir(obtener_bus(), [canal_usuario(self.otro.id)])
+        self.client.force_authenticate(user=self.user)
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post('/api/comunidad/feed/', {'contenido': 'En vivo'})
+                logro = Logro.objects.create(nombre='Pionero', descripcion='Prueba')
+                LogroUsuario.objects.create(usuario=self.user, logro=logro)
+
+            evento = self.siguiente(feed)
+            self.assertEqual((evento['tipo'], evento['datos']['contenido']), ('publicacion', 'En vivo'))
+            self.assertEqual(self.siguiente(mio)['datos'], {'logro': logro.id, 'nombre': 'Pionero'})
+            with self.assertRaises(asyncio.TimeoutError):
+                self.loop.run_until_complete(ajeno.siguiente(0.05))
+        finally:
+            for suscripcion in (feed, mio, ajeno):
+                suscripcion.cerrar()
+
+    @override_settings(SSE_LATIDO=0.05)
+    async def test_stream_sse(self):
+        """
+        Valida que el stream pide token, manda los eventos del bus en
+        formato SSE y un latido cuando no pasa nada.
+        """
+        response = await self.async_client.get('/api/eventos/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = await self.async_client.get('/api/eventos/', {'token': self.token.key})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        contenido = aiter(response.streaming_content)
+        self.assertTrue((await anext(contenido)).startswith(b'retry:'))
+
+        self.assertEqual(await anext(contenido), b': latido\n\n')
+        obtener_bus().publicar(canal_usuario(self.user.id), {'tipo': 'logro', 'datos': {'nombre': 'Pionero'}})
+        fragmento = await anext(contenido)
+        self.assertIn(b'event: logro\ndata: {"nombre": "Pionero"}', fragmento)
+
+    def test_stream_requiere_asgi(self):
+        """
+        Valida que servido por WSGI el stream responde 501 en vez de
+        dejar un hilo colgado por conexión.
+        """
+        response = self.client.get('/api/eventos/', {'token': self.token.key})
+        self.assertEqual(response.status_code, 501)
+
+
+class PruebasModeracion(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='moderacion_qa', password='Password123')
+        self.client.force_authenticate(user=self.user)
+        self.url = '/api/comunidad/feed/'
+
+    def test_automata_coincide_con_busqueda_ingenua(self):
+        """
+        Valida que el autómata encuentra exactamente lo mismo que buscar
+        cada término por separado (palabras completas, con solapamientos).
+        """
+        rng = random.Random(7)
+        palabra = lambda: ''.join(rng.choices('abc', k=rng.randint(1, 4)))
+        terminos = {palabra() for _ in range(40)} | {f"{palabra()} {palabra()}" for _ in range(10)}
+        automata = Automata([(t, 'bloqueo') for t in terminos])
+
+        for _ in range(200):
+            texto = ' '.join(palabra() for _ in range(rng.randint(1, 12)))
+            esperado = set()
+            for termino in terminos:
+                inicio = texto.find(termino)
+                while inicio != -1:
+                    fin = inicio + len(termino)
+                    if (inicio == 0 or texto[inicio - 1] == ' ') and (fin == len(texto) or texto[fin] == ' '):
+                        esperado.add((termino, inicio))
+                    inicio = texto.find(termino, inicio + 1)
+            # Dos veces: la segunda usa las transiciones ya resueltas
+            for _ in range(2):
+                self.assertEqual({(c.termino, c.inicio) for c in automata.buscar(texto)}, esperado, texto)
+
+        self.assertEqual(normalizar('SUICÍDIO Ñandú'), 'suicidio nandu')
+
+    def test_texto_ajeno_al_alfabeto_no_agranda_el_automata(self):
+        """
+        Valida que los caracteres que no aparecen en ningún término van a la
+        raíz sin guardarse, así las transiciones quedan acotadas por nodos ×
+        alfabeto aunque los textos traigan de todo.
+        """
+        automata = Automata([('feo', 'bloqueo'), ('no quiero vivir', 'crisis')])
+        rng = random.Random(3)
+        for _ in range(300):
+            texto = ''.join(chr(rng.randint(0x20, 0x2FFF)) for _ in range(50)) + ' feo'
+            self.assertEqual([c.termino for c in automata.buscar(texto)][-1:], ['feo'])
+        total = sum(len(hijos) for hijos in automata.transiciones)
+        self.assertLessEqual(total, len(automata.transiciones) * len(automata.alfabeto))
+        self.assertTrue(all(set(hijos) <= automata.alfabeto for hijos in automata.transiciones))
+
+    def test_bloqueo_crisis_y_recarga_en_caliente(self):
+        """
+        Valida que un término de bloqueo rechaza la publicación apenas se
+        agrega (sin reiniciar), que no cuenta dentro de otra palabra y que
+        una frase de crisis se publica con la alerta para el autor.
+        """
+        self.assertEqual(self.client.post(self.url, {'contenido': 'Qué día tan feo'}).status_code, status.HTTP_201_CREATED)
+
+        termino = TerminoModeracion.objects.create(termino='feo', categoria=TerminoModeracion.BLOQUEO)
+        response = self.client.post(self.url, {'contenido': 'Qué día tan FEO'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('contenido', response.data)
+        self.assertEqual(self.client.post(self.url, {'contenido': 'Un feodal'}).status_code, status.HTTP_201_CREATED)
+
+        termino.delete()
+        self.assertEqual(self.client.post(self.url, {'contenido': 'Qué día tan feo'}).status_code, status.HTTP_201_CREATED)
+
+        # 'no quiero vivir' viene cargado por la migración
+        response = self.client.post(self.url, {'contenido': 'Hoy siento que no quiero vivir así'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(response.data['alerta_crisis'])
+        self.assertFalse(self.client.post(self.url, {'contenido': 'Todo bien'}).data['alerta_crisis'])
+
+
+class PruebasAutenticacionCache(APITestCase):
+    def setUp(self):
+        cache.clear()
+        _local.vaciar()
+        reiniciar_metricas_autenticacion()
+        self.user = User.objects.create_user(username='cacheado', password='123')
+        self.token = Token.objects.create(user=self.user)
+        self.url = '/api/auth/perfil/'
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    def consultas_token(self):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [q['sql'] for q in consultas if 'authtoken_token' in q['sql']]
+
+    def test_segunda_peticion_sin_consultar_el_token(self):
+        """
+        Valida que solo la primera petición con un token va a la base: las
+        siguientes salen del LRU del proceso, o de la caché compartida si
+        el LRU no lo tiene (otro proceso).
+        """
+        self.assertEqual(len(self.consultas_token()), 1)
+        self.assertEqual(self.consultas_token(), [])
+
+        _local.vaciar()
+        self.assertEqual(self.consultas_token(), [])
+
+        metricas = metricas_autenticacion()
+        self.assertEqual(metricas['resoluciones'], {'local': 1, 'compartida': 1, 'base': 1})
+        self.assertEqual(metricas['latencia_ms']['muestras'], 3)
+
+    def test_token_borrado_o_usuario_inactivo_deja_de_valer(self):
+        """
+        Valida que borrar el token o desactivar al usuario da 401 en la
+        petición siguiente, sin esperar a que venza la caché.
+        """
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        self.token.delete()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_last_login_no_invalida(self):
+        """
+        Valida que actualizar solo last_login (lo que hace un login) no
+        descarta el usuario cacheado, y que cambiar otro dato sí.
+        """
+        self.consultas_token()
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=['last_login'])
+        self.assertEqual(self.consultas_token(), [])
+
+        self.user.first_name = 'Nuevo'
+        self.user.save()
+        self.assertEqual(len(self.consultas_token()), 1)
+
+    def test_compartida_guarda_solo_ids(self):
+        """
+        Valida que la caché compartida guarda (id, activo, versión) y no el
+        usuario con su hash, y que subir la versión del usuario la descarta
+        aunque la entrada siga ahí.
+        """
+        self.consultas_token()
+        dato = cache.get(f'auth:token:{self.token.key}')
+        self.assertEqual(dato[:2], (self.user.pk, True))
+        self.assertNotIn(self.user.password, repr(dato))
+
+        _local.vaciar()
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        self.assertTrue(any('auth_user' in q['sql'] and 'authtoken_token' not in q['sql'] for q in consultas))
+
+        incrementar_version('auth', self.user.pk)
+        _local.vaciar()
+        self.assertEqual(len(self.consultas_token()), 1)
+
+    def test_lru_invalida_usuario_sin_recorrer(self):
+        """
+        Valida que invalidar un usuario en el LRU descarta sus entradas
+        leídas antes (aunque se guarden después) sin tocar las de otros, y
+        que las marcas se olvidan pasado el ttl.
+        """
+        lru = CacheTokens(maximo=10, ttl=30)
+        with mock.patch('core.autenticacion.time.monotonic', return_value=100.0):
+            lru.guardar('a', 1, 'usuario 1')
+            lru.guardar('b', 2, 'usuario 2')
+        with mock.patch('core.autenticacion.time.monotonic', return_value=101.0):
+            lru.quitar_usuario(1)
+            lru.guardar('c', 1, 'leído antes', leido=100.5)
+            self.assertIsNone(lru.obtener('a'))
+            self.assertIsNone(lru.obtener('c'))
+            self.assertEqual(lru.obtener('b'), 'usuario 2')
+        with mock.patch('core.autenticacion.time.monotonic', return_value=101.5):
+            lru.guardar('d', 1, 'leído después')
+        with mock.patch('core.autenticacion.time.monotonic', return_value=102.0):
+            self.assertEqual(lru.obtener('d'), 'leído después')
+        with mock.patch('core.autenticacion.time.monotonic', return_value=200.0):
+            lru.quitar_usuario(2)
+        self.assertEqual(list(lru._invalidados), [2])
+
+    def test_metricas_solo_staff(self):
+        """Valida que /api/metricas/auth/ es solo para staff."""
+        self.assertEqual(self.client.get('/api/metricas/auth/').status_code, status.HTTP_403_FORBIDDEN)
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get('/api/metricas/auth/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('tasa_aciertos', response.data)
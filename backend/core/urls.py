@@ -1,6 +1,9 @@
 from django.contrib import admin
+from django.contrib.staticfiles.urls import staticfiles_urlpatterns
 from django.urls import path, include
 
+from .views import MetricasCacheView, MetricasAutenticacionView, StreamEventosView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     
@@ -22,4 +25,16 @@ urlpatterns = [
     # 4. Comunidad (Feed, Publicaciones)
     # Ejemplo: /api/comunidad/feed/
     path('api/comunidad/', include('comunidad.urls')),
-]
\ No newline at end of file
+
+    # 5. Monitoreo (solo staff)
+    # Ejemplo: /api/metricas/cache/
+    path('api/metricas/cache/', MetricasCacheView.as_view(), name='metricas-cache'),
+    path('api/metricas/auth/', MetricasAutenticacionView.as_view(), name='metricas-auth'),
+
+    # 6. Eventos en vivo (SSE, requiere ASGI)
+    # Ejemplo: /api/eventos/?token=...
+    path('api/eventos/', StreamEventosView.as_view(), name='eventos'),
+]
+
+# uvicorn no sirve estáticos como runserver: con DEBUG los sirve Django (CSS del admin)
+urlpatterns += staticfiles_urlpatterns()
@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
+from django.views import View
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+
+from .autenticacion import CachedTokenAuthentication, metricas_autenticacion
+from .cache import metricas_cache
+from .pubsub import CANAL_FEED, canal_usuario, obtener_bus
+
+
+# Métricas de caché del proceso que atiende la petición (solo staff)
+class MetricasCacheView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(metricas_cache())
+
+
+# Aciertos por nivel y latencia de la autenticación por token en este proceso (solo staff)
+class MetricasAutenticacionView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(metricas_autenticacion())
+
+
+# GET /api/eventos/ -> stream SSE con las publicaciones nuevas del feed y los
+# logros que desbloquea el usuario. Reemplaza el sondeo periódico del feed y
+# de /logros/. Necesita un servidor ASGI (ej: uvicorn core.asgi:application):
+# con WSGI cada conexión ocuparía un hilo entero.
+class StreamEventosView(View):
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse({'detail': 'El stream de eventos requiere el servidor ASGI.'}, status=501)
+        usuario = await usuario_por_token(request)
+        if usuario is None:
+            return JsonResponse({'detail': 'Token inválido o ausente.'}, status=401)
+
+        canales = [CANAL_FEED, canal_usuario(usuario.id)]
+        response = StreamingHttpResponse(flujo_eventos(canales), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Que nginx no junte los eventos en su buffer
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+async def usuario_por_token(request):
+    # EventSource no puede mandar cabeceras: el token también vale en ?token=
+    clave = request.GET.get('token')
+    cabecera = request.headers.get('Authorization', '').split()
+    if len(cabecera) == 2 and cabecera[0] == 'Token':
+        clave = cabecera[1]
+    if not clave:
+        return None
+    try:
+        # La misma caché de tokens que el resto de la API
+        usuario, _ = await sync_to_async(CachedTokenAuthentication().authenticate_credentials)(clave)
+    except AuthenticationFailed:
+        return None
+    return usuario
+
+
+async def flujo_eventos(canales):
+    """
+    Mientras no pasa nada la conexión solo espera en su cola; cada
+    SSE_LATIDO segundos manda un comentario para que proxies y clientes
+    no la den por muerta. Al desconectarse, Django cancela el generador y
+    el finally la saca del bus.
+    """
+    suscripcion = obtener_bus().suscribir(canales)
+    try:
+        yield f"retry: {settings.SSE_RECONEXION_MS}\n\n"
+        while True:
+            try:
+                evento = await suscripcion.siguiente(settings.SSE_LATIDO)
+            except asyncio.TimeoutError:
+                yield ": latido\n\n"
+                continue
+            if evento is None:
+                # Se cortó por atraso: el cliente reconecta y recarga
+                return
+            datos = json.dumps(evento['datos'], cls=DjangoJSONEncoder)
+            yield f"id: {evento['id']}\nevent: {evento['tipo']}\ndata: {datos}\n\n"
+    finally:
+        suscripcion.cerrar()
@@ -0,0 +1,118 @@
+import uuid
+
+from django.db import transaction
+from django.db.models import IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from usuarios.models import PerfilUsuario
+from .models import EventoXP
+from .niveles import nivel_para
+
+TAMANO_LOTE = 1000
+
+
+def registrar_xp(usuario, xp, tipo_accion=''):
+    # Un INSERT y nada más: no toca (ni bloquea) la fila del perfil
+    return EventoXP.objects.create(usuario=usuario, xp=xp, tipo_accion=tipo_accion or '')
+
+
+def _pendiente(usuario_ref):
+    return Coalesce(
+        Subquery(
+            EventoXP.objects.filter(usuario=usuario_ref, compactado=False)
+            .values('usuario').annotate(suma=Sum('xp')).values('suma'),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def experiencia_en_vivo(usuario):
+    """
+    XP total real = lo ya compactado en el perfil + eventos pendientes.
+    Va en una sola consulta para que perfil y pendientes salgan de la misma
+    foto de la base, aunque el compactador confirme justo en ese momento.
+    """
+    fila = (
+        PerfilUsuario.objects.filter(usuario=usuario)
+        .annotate(pendiente=_pendiente(OuterRef('usuario')))
+        .values_list('experiencia_total', 'pendiente')
+        .first()
+    )
+    if fila is None:
+        return EventoXP.objects.filter(usuario=usuario, compactado=False).aggregate(s=Sum('xp'))['s'] or 0
+    return fila[0] + fila[1]
+
+
+def compactar(tamano=TAMANO_LOTE):
+    """
+    Suma a PerfilUsuario un lote de eventos pendientes y los marca como
+    compactados. Los eventos se reclaman con un UUID (como el despachador de
+    recordatorios), así que varios compactadores no suman dos veces lo mismo.
+    Devuelve la cantidad de eventos compactados.
+    """
+    lote = uuid.uuid4()
+    with transaction.atomic():
+        ids = list(
+            EventoXP.objects.filter(compactado=False, lote__isnull=True)
+            .order_by('id').values_list('id', flat=True)[:tamano]
+        )
+        if not ids:
+            return 0
+        reclamados = EventoXP.objects.filter(id__in=ids, compactado=False, lote__isnull=True).update(lote=lote)
+        if not reclamados:
+            return 0
+
+        sumas = dict(
+            EventoXP.objects.filter(lote=lote).values('usuario_id')
+            .annotate(suma=Sum('xp')).values_list('usuario_id', 'suma')
+        )
+        perfiles = list(PerfilUsuario.objects.select_for_update().filter(usuario_id__in=sumas))
+        faltantes = sumas.keys() - {p.usuario_id for p in perfiles}
+        if faltantes:
+            PerfilUsuario.objects.bulk_create([PerfilUsuario(usuario_id=u) for u in faltantes], ignore_conflicts=True)
+            perfiles += list(PerfilUsuario.objects.select_for_update().filter(usuario_id__in=faltantes))
+
+        for perfil in perfiles:
+            perfil.experiencia_total += sumas[perfil.usuario_id]
+            perfil.nivel_actual, perfil.experiencia_actual = nivel_para(perfil.experiencia_total)
+        PerfilUsuario.objects.bulk_update(perfiles, ['experiencia_total', 'nivel_actual', 'experiencia_actual'])
+        EventoXP.objects.filter(lote=lote).update(compactado=True)
+    return reclamados
+
+
+def compactar_todo(tamano=TAMANO_LOTE, max_lotes=None):
+    total = 0
+    lotes = 0
+    while max_lotes is None or lotes < max_lotes:
+        compactados = compactar(tamano)
+        total += compactados
+        lotes += 1
+        if compactados < tamano:
+            break
+    return total
+
+
+def recalcular_niveles(tamano=TAMANO_LOTE):
+    """
+    Vuelve a derivar nivel y experiencia de experiencia_total con la curva
+    actual de niveles.py (por ejemplo, después de cambiarla).
+    Devuelve la cantidad de perfiles corregidos.
+    """
+    corregidos = 0
+    ultimo = 0
+    while True:
+        with transaction.atomic():
+            # Bloqueados para que el compactador no cambie el total entre medio
+            perfiles = list(PerfilUsuario.objects.select_for_update().filter(id__gt=ultimo).order_by('id')[:tamano])
+            if not perfiles:
+                return corregidos
+            cambiados = []
+            for perfil in perfiles:
+                nivel, experiencia = nivel_para(perfil.experiencia_total)
+                if (nivel, experiencia) != (perfil.nivel_actual, perfil.experiencia_actual):
+                    perfil.nivel_actual, perfil.experiencia_actual = nivel, experiencia
+                    cambiados.append(perfil)
+            PerfilUsuario.objects.bulk_update(cambiados, ['nivel_actual', 'experiencia_actual'])
+        corregidos += len(cambiados)
+        ultimo = perfiles[-1].id
@@ -0,0 +1,80 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIClient
+
+from usuarios.models import PerfilUsuario
+from gamificacion.niveles import nivel_para
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide /api/gamificacion/ranking/ (top-N) y /ranking/yo/ con muchos perfiles. "
+        "Todo corre dentro de una transacción que se deshace al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--perfiles', type=int, default=1_000_000)
+        parser.add_argument('--repeticiones', type=int, default=50)
+        parser.add_argument('--lote', type=int, default=20000)
+
+    def sembrar(self, cantidad, lote):
+        sufijo = random.randint(10000, 99999)
+        inicio = time.perf_counter()
+        for desde in range(0, cantidad, lote):
+            usuarios = User.objects.bulk_create([
+                User(username=f"bench_ranking_{sufijo}_{i}", password='!')
+                for i in range(desde, min(desde + lote, cantidad))
+            ])
+            perfiles = []
+            for usuario in usuarios:
+                # Distribución sesgada: muchos perfiles con poca XP y empates
+                total = int(random.paretovariate(1.2) * 50)
+                nivel, experiencia = nivel_para(total)
+                perfiles.append(PerfilUsuario(
+                    usuario=usuario, nivel_actual=nivel, experiencia_actual=experiencia, experiencia_total=total,
+                ))
+            PerfilUsuario.objects.bulk_create(perfiles)
+        self.stdout.write(f"Sembrados {cantidad} perfiles en {time.perf_counter() - inicio:.1f} s")
+
+    def medir(self, cliente, url, params, repeticiones):
+        tiempos = []
+        for i in range(repeticiones):
+            inicio = time.perf_counter()
+            response = cliente.get(url, params(i) if callable(params) else params)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+            assert response.status_code == 200, response.data
+        tiempos.sort()
+        return statistics.median(tiempos), tiempos[int(len(tiempos) * 0.95) - 1]
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.sembrar(options['perfiles'], options['lote'])
+                ids = list(PerfilUsuario.objects.values_list('usuario_id', flat=True))
+                muestra = User.objects.in_bulk(random.sample(ids, min(len(ids), options['repeticiones'])))
+                cliente = APIClient()
+
+                self.stdout.write(f"{'consulta':>22} | {'p50 ms':>8} | {'p95 ms':>8}")
+                cliente.force_authenticate(user=next(iter(muestra.values())))
+                p50, p95 = self.medir(cliente, '/api/gamificacion/ranking/', {'page_size': 20}, options['repeticiones'])
+                self.stdout.write(f"{'top 20':>22} | {p50:>8.2f} | {p95:>8.2f}")
+
+                tiempos = []
+                for usuario in muestra.values():
+                    cliente.force_authenticate(user=usuario)
+                    tiempos.append(self.medir(cliente, '/api/gamificacion/ranking/yo/', {'vecinos': 5}, 1)[0])
+                tiempos.sort()
+                p95 = tiempos[int(len(tiempos) * 0.95) - 1]
+                self.stdout.write(f"{'mi posición + 5':>22} | {statistics.median(tiempos):>8.2f} | {p95:>8.2f}")
+                raise Rollback
+        except Rollback:
+            self.stdout.write("Datos de prueba descartados.")
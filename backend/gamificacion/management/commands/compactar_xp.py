@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from gamificacion.eventos import compactar_todo, recalcular_niveles, TAMANO_LOTE
+
+
+class Command(BaseCommand):
+    help = (
+        "Pasa los eventos pendientes de EventoXP a PerfilUsuario por lotes. "
+        "Se pueden correr varios procesos a la vez sin sumar dos veces."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help="Eventos por lote")
+        parser.add_argument('--continuo', action='store_true', help="Seguir corriendo como worker")
+        parser.add_argument('--intervalo', type=float, default=5.0, help="Segundos entre rondas en modo continuo")
+        parser.add_argument(
+            '--recalcular-niveles', action='store_true',
+            help="Después de compactar, re-deriva nivel y experiencia de todos los perfiles con la curva actual",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            compactados = compactar_todo(tamano=options['lote'])
+            if compactados or not options['continuo']:
+                self.stdout.write(f"Eventos compactados: {compactados}")
+            if not options['continuo']:
+                break
+            if not compactados:
+                time.sleep(options['intervalo'])
+
+        if options['recalcular_niveles']:
+            corregidos = recalcular_niveles(tamano=options['lote'])
+            self.stdout.write(self.style.SUCCESS(f"Perfiles corregidos: {corregidos}"))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from gamificacion.ranking import congelar, inicio_periodo
+
+
+class Command(BaseCommand):
+    help = (
+        "Guarda la foto del ranking (top N por XP total) para la semana o el mes. "
+        "Pensado para correr con cron al cierre de cada periodo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--periodo', choices=['semanal', 'mensual'], default='semanal')
+        parser.add_argument('--limite', type=int, default=100)
+        parser.add_argument('--inicio', help="Inicio del periodo (YYYY-MM-DD). Por defecto, el periodo actual.")
+
+    def handle(self, *args, **options):
+        inicio = None
+        if options['inicio']:
+            fecha = parse_date(options['inicio'])
+            if fecha is None:
+                raise CommandError("--inicio debe tener formato YYYY-MM-DD.")
+            inicio = inicio_periodo(options['periodo'], fecha)
+
+        inicio, cantidad = congelar(options['periodo'], options['limite'], inicio)
+        self.stdout.write(self.style.SUCCESS(f"Ranking {options['periodo']} del {inicio}: {cantidad} posiciones"))
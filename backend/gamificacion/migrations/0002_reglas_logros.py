@@ -0,0 +1,74 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Los dos logros que antes estaban escritos a mano en RegistrarAccionView,
+# más uno de racha como ejemplo de regla
+LOGROS_INICIALES = [
+    {'nombre': 'Estudiante del bienestar', 'descripcion': 'Completa un recurso', 'icono': '📚', 'puntos': 50,
+     'tipo_accion': 'recurso_completado', 'condicion': 'conteo', 'umbral': 1},
+    {'nombre': 'Dedicado', 'descripcion': 'Completa una misión', 'icono': '🎯', 'puntos': 30,
+     'tipo_accion': 'mision_diaria', 'condicion': 'conteo', 'umbral': 1},
+    {'nombre': 'Constancia', 'descripcion': 'Completa misiones 7 días seguidos', 'icono': '🔥', 'puntos': 100,
+     'rareza': 'Raro', 'tipo_accion': 'mision_diaria', 'condicion': 'racha', 'umbral': 7},
+]
+
+
+def crear_reglas(apps, schema_editor):
+    Logro = apps.get_model('gamificacion', 'Logro')
+    for datos in LOGROS_INICIALES:
+        datos = dict(datos)
+        nombre = datos.pop('nombre')
+        # Si ya existía (lo creaba get_or_create), solo le agregamos la regla
+        logro = Logro.objects.filter(nombre=nombre).first()
+        if logro is None:
+            Logro.objects.create(nombre=nombre, **datos)
+        else:
+            Logro.objects.filter(pk=logro.pk).update(
+                tipo_accion=datos['tipo_accion'], condicion=datos['condicion'], umbral=datos['umbral'],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamificacion', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='logro',
+            name='condicion',
+            field=models.CharField(choices=[('conteo', 'Veces que hizo la acción'), ('racha', 'Días seguidos'), ('xp', 'XP total')], default='conteo', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='logro',
+            name='tipo_accion',
+            field=models.CharField(blank=True, db_index=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='logro',
+            name='umbral',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.CreateModel(
+            name='ContadorAccion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo_accion', models.CharField(max_length=50)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('racha_actual', models.PositiveIntegerField(default=0)),
+                ('racha_max', models.PositiveIntegerField(default=0)),
+                ('ultima_fecha', models.DateField(blank=True, null=True)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contadores_accion', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'tipo_accion'), name='contador_usuario_accion_unico')],
+            },
+        ),
+        migrations.RunPython(crear_reglas, migrations.RunPython.noop),
+    ]
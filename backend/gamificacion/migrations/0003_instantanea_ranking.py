@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamificacion', '0002_reglas_logros'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InstantaneaRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo', models.CharField(choices=[('semanal', 'Semanal'), ('mensual', 'Mensual')], max_length=10)),
+                ('inicio', models.DateField()),
+                ('posicion', models.PositiveIntegerField()),
+                ('nivel', models.PositiveIntegerField()),
+                ('experiencia_total', models.PositiveIntegerField()),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['periodo', 'inicio', 'posicion'], name='instantanea_periodo_pos_idx')],
+                'constraints': [models.UniqueConstraint(fields=('periodo', 'inicio', 'usuario'), name='instantanea_usuario_unica')],
+            },
+        ),
+    ]
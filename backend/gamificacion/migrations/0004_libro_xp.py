@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamificacion', '0003_instantanea_ranking'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoXP',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('xp', models.PositiveIntegerField()),
+                ('tipo_accion', models.CharField(blank=True, max_length=50)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('compactado', models.BooleanField(default=False)),
+                ('lote', models.UUIDField(blank=True, null=True)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eventos_xp', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('compactado', False)), fields=['usuario'], name='evento_pendiente_usuario_idx'), models.Index(condition=models.Q(('compactado', False)), fields=['id'], name='evento_pendiente_idx'), models.Index(fields=['lote'], name='evento_lote_idx')],
+            },
+        ),
+    ]
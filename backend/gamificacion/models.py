@@ -1,5 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.cache import invalidar
+from core.pubsub import canal_usuario, publicar_al_confirmar
 
 class Logro(models.Model):
     RAREZAS = [('Común', 'Común'), ('Raro', 'Raro'), ('Épico', 'Épico'), ('Legendario', 'Legendario')]
@@ -12,6 +17,13 @@ class Logro(models.Model):
     es_secreto = models.BooleanField(default=False)
     pista = models.CharField(max_length=200, blank=True, null=True) # Solo si es secreto
 
+    # Regla de desbloqueo (ver reglas.py). Sin tipo_accion solo aplican las
+    # reglas de XP; el resto de logros sin acción se otorgan a mano.
+    CONDICIONES = [('conteo', 'Veces que hizo la acción'), ('racha', 'Días seguidos'), ('xp', 'XP total')]
+    tipo_accion = models.CharField(max_length=50, blank=True, db_index=True) # Ej: "mision_diaria"
+    condicion = models.CharField(max_length=10, choices=CONDICIONES, default='conteo')
+    umbral = models.PositiveIntegerField(default=1)
+
     def __str__(self):
         return self.nombre
 
@@ -21,4 +33,89 @@ class LogroUsuario(models.Model):
     fecha_obtenido = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        unique_together = ('usuario', 'logro') # No puedes ganar el mismo logro 2 veces
\ No newline at end of file
+        unique_together = ('usuario', 'logro') # No puedes ganar el mismo logro 2 veces
+
+
+# Contadores por usuario y tipo de acción, para las reglas de conteo y racha
+class ContadorAccion(models.Model):
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='contadores_accion')
+    tipo_accion = models.CharField(max_length=50)
+    total = models.PositiveIntegerField(default=0)
+    racha_actual = models.PositiveIntegerField(default=0)
+    racha_max = models.PositiveIntegerField(default=0)
+    ultima_fecha = models.DateField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['usuario', 'tipo_accion'], name='contador_usuario_accion_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.usuario_id} - {self.tipo_accion}: {self.total}"
+
+
+# Foto del ranking al cierre de cada semana/mes (ver congelar_ranking)
+class InstantaneaRanking(models.Model):
+    PERIODOS = [('semanal', 'Semanal'), ('mensual', 'Mensual')]
+
+    periodo = models.CharField(max_length=10, choices=PERIODOS)
+    inicio = models.DateField() # Lunes de la semana o día 1 del mes
+    posicion = models.PositiveIntegerField()
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    nivel = models.PositiveIntegerField()
+    experiencia_total = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['periodo', 'inicio', 'posicion'], name='instantanea_periodo_pos_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['periodo', 'inicio', 'usuario'], name='instantanea_usuario_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.periodo} {self.inicio} #{self.posicion}"
+
+
+# Libro de XP: cada acción solo inserta una fila aquí (ver eventos.py).
+# El compactador la suma a PerfilUsuario y la marca; nunca se borra.
+class EventoXP(models.Model):
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='eventos_xp')
+    xp = models.PositiveIntegerField()
+    tipo_accion = models.CharField(max_length=50, blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    compactado = models.BooleanField(default=False)
+    lote = models.UUIDField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # XP en vivo: suma de lo pendiente de un usuario
+            models.Index(fields=['usuario'], condition=models.Q(compactado=False), name='evento_pendiente_usuario_idx'),
+            # Compactador: pendientes en orden de llegada
+            models.Index(fields=['id'], condition=models.Q(compactado=False), name='evento_pendiente_idx'),
+            models.Index(fields=['lote'], name='evento_lote_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.usuario_id} +{self.xp} ({self.tipo_accion})"
+
+
+# --- SEÑALES ---
+# Cualquier cambio en el catálogo hace que cada proceso recargue sus reglas
+@receiver(post_save, sender=Logro)
+@receiver(post_delete, sender=Logro)
+def invalidar_catalogo_logros(sender, instance, **kwargs):
+    invalidar('logros', 'catalogo')
+
+
+# Logros otorgados uno por uno (admin, código manual). Los de las reglas
+# salen con bulk_create, sin señal: los anuncia evaluar_logros
+@receiver(post_save, sender=LogroUsuario)
+def anunciar_logro(sender, instance, created, **kwargs):
+    if created:
+        anunciar_logros(instance.usuario_id, [(instance.logro_id, instance.logro.nombre)])
+
+
+def anunciar_logros(usuario_id, logros):
+    for logro_id, nombre in logros:
+        publicar_al_confirmar(canal_usuario(usuario_id), 'logro', {'logro': logro_id, 'nombre': nombre})
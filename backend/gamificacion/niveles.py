@@ -0,0 +1,21 @@
+from math import isqrt
+
+# Pasar del nivel L al L+1 cuesta L * 100 XP, así que llegar al nivel L
+# desde el 1 cuesta 100 * (1 + 2 + ... + L-1) = 50 * L * (L - 1)
+XP_POR_NIVEL = 100
+MAX_XP_POR_ACCION = 100000
+
+
+def xp_total(nivel, experiencia):
+    return XP_POR_NIVEL * nivel * (nivel - 1) // 2 + experiencia
+
+
+def nivel_para(total):
+    """
+    Devuelve (nivel, experiencia dentro del nivel) para un total de XP, sin
+    bucles: el mayor L con 50·L·(L−1) <= total sale de la raíz entera.
+    """
+    # L·(L−1) <= q  <=>  (2L−1)² <= 4q + 1
+    q = total // (XP_POR_NIVEL // 2)
+    nivel = max(1, (isqrt(4 * q + 1) + 1) // 2)
+    return nivel, total - xp_total(nivel, 0)
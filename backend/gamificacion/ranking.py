@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.paginacion import filtro_despues_de
+from usuarios.models import PerfilUsuario
+from .models import InstantaneaRanking
+
+# Mismo orden que el índice perfil_ranking_idx: a igual XP, gana el más antiguo
+ORDEN = ('-experiencia_total', 'id')
+ORDEN_INVERSO = ('experiencia_total', '-id')
+MAX_VECINOS = 25
+MAX_INSTANTANEA = 1000
+
+
+# El ranking ordena por PerfilUsuario.experiencia_total, que es la foto del
+# último compactado: lo mantiene al día el worker 'compactar_xp --continuo'
+# (servicio compactador de docker-compose), a unos segundos de los eventos
+def perfiles():
+    return PerfilUsuario.objects.select_related('usuario').only(
+        'id', 'nivel_actual', 'experiencia_total', 'usuario__username',
+    )
+
+
+def posicion_de(experiencia_total):
+    # Ranking de competición (1, 2, 2, 4): cuenta los que tienen más XP
+    # recorriendo el rango del índice, sin ordenar la tabla
+    return PerfilUsuario.objects.filter(experiencia_total__gt=experiencia_total).count() + 1
+
+
+def posiciones(filas):
+    """
+    Posiciones de filas consecutivas del ranking. La primera fila cuesta dos
+    conteos; las demás salen de ahí, porque todo lo que tienen por encima
+    está en la misma página (los empates comparten posición).
+    """
+    resultado = []
+    anterior = None
+    for i, perfil in enumerate(filas):
+        if i == 0:
+            posicion = posicion_de(perfil.experiencia_total)
+            # Número de fila de la primera: los empates anteriores por id también cuentan
+            fila_inicial = posicion + PerfilUsuario.objects.filter(
+                experiencia_total=perfil.experiencia_total, id__lt=perfil.id,
+            ).count()
+        elif perfil.experiencia_total != anterior:
+            posicion = fila_inicial + i
+        anterior = perfil.experiencia_total
+        resultado.append(posicion)
+    return resultado
+
+
+def con_posiciones(filas):
+    filas = list(filas)
+    return [serializar(perfil, posicion) for perfil, posicion in zip(filas, posiciones(filas))]
+
+
+def serializar(perfil, posicion):
+    return {
+        'posicion': posicion,
+        'usuario': perfil.usuario.username,
+        'nivel': perfil.nivel_actual,
+        'experiencia_total': perfil.experiencia_total,
+    }
+
+
+def mi_posicion(perfil, vecinos=5):
+    """
+    Posición del usuario y los 'vecinos' de arriba y abajo. Son dos conteos
+    y dos lecturas cortas del índice a partir de (experiencia_total, id).
+    """
+    vecinos = max(0, min(vecinos, MAX_VECINOS))
+    clave = (perfil.experiencia_total, perfil.id)
+    arriba = list(perfiles().filter(filtro_despues_de(ORDEN_INVERSO, clave)).order_by(*ORDEN_INVERSO)[:vecinos])
+    abajo = list(perfiles().filter(filtro_despues_de(ORDEN, clave)).order_by(*ORDEN)[:vecinos])
+    vecinos = con_posiciones(arriba[::-1] + [perfil] + abajo)
+    return {
+        'posicion': vecinos[len(arriba)]['posicion'],
+        'vecinos': vecinos,
+    }
+
+
+def inicio_periodo(periodo, fecha=None):
+    fecha = fecha or timezone.localdate()
+    if periodo == 'semanal':
+        return fecha - timedelta(days=fecha.weekday())
+    return fecha.replace(day=1)
+
+
+def congelar(periodo, limite=100, inicio=None):
+    """
+    Guarda el top 'limite' actual como la foto del periodo. Volver a
+    correrlo para el mismo periodo reemplaza la foto anterior.
+    """
+    limite = max(1, min(limite, MAX_INSTANTANEA))
+    inicio = inicio or inicio_periodo(periodo)
+    filas = list(perfiles().order_by(*ORDEN)[:limite])
+
+    with transaction.atomic():
+        InstantaneaRanking.objects.filter(periodo=periodo, inicio=inicio).delete()
+        InstantaneaRanking.objects.bulk_create([
+            InstantaneaRanking(
+                periodo=periodo, inicio=inicio, posicion=posicion, usuario_id=perfil.usuario_id,
+                nivel=perfil.nivel_actual, experiencia_total=perfil.experiencia_total,
+            )
+            for perfil, posicion in zip(filas, posiciones(filas))
+        ])
+    return inicio, len(filas)
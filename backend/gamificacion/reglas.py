@@ -0,0 +1,92 @@
+import threading
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from core.cache import obtener_version
+from .models import Logro, LogroUsuario, ContadorAccion, anunciar_logros
+
+Regla = namedtuple('Regla', 'logro_id nombre condicion umbral')
+
+# Índice por proceso: {tipo_accion: [Regla, ...]}. Se recarga entero cuando
+# cambia la versión 'logros:catalogo' (la sube la señal de Logro).
+_indice = {'version': None, 'reglas': {}}
+_lock = threading.Lock()
+
+
+def indice_reglas():
+    version = obtener_version('logros', 'catalogo')
+    if _indice['version'] != version:
+        with _lock:
+            if _indice['version'] != version:
+                reglas = defaultdict(list)
+                filas = Logro.objects.values_list('id', 'nombre', 'tipo_accion', 'condicion', 'umbral')
+                for logro_id, nombre, tipo_accion, condicion, umbral in filas:
+                    # Sin acción solo tiene sentido la regla de XP
+                    if tipo_accion or condicion == 'xp':
+                        reglas[tipo_accion].append(Regla(logro_id, nombre, condicion, umbral))
+                _indice['reglas'] = dict(reglas)
+                _indice['version'] = version
+    return _indice['reglas']
+
+
+def registrar_contador(usuario, tipo_accion):
+    """
+    Suma la acción al contador del usuario y actualiza la racha de días
+    seguidos. La fila queda bloqueada mientras se calcula.
+    """
+    hoy = timezone.localdate()
+    with transaction.atomic():
+        contador, creado = ContadorAccion.objects.select_for_update().get_or_create(
+            usuario=usuario, tipo_accion=tipo_accion,
+            defaults={'total': 1, 'racha_actual': 1, 'racha_max': 1, 'ultima_fecha': hoy},
+        )
+        if not creado:
+            contador.total += 1
+            if contador.ultima_fecha != hoy:
+                seguido = contador.ultima_fecha == hoy - timedelta(days=1)
+                contador.racha_actual = contador.racha_actual + 1 if seguido else 1
+                contador.racha_max = max(contador.racha_max, contador.racha_actual)
+                contador.ultima_fecha = hoy
+            contador.save(update_fields=['total', 'racha_actual', 'racha_max', 'ultima_fecha'])
+    return contador
+
+
+def evaluar_logros(usuario, tipo_accion, contador, experiencia_total):
+    """
+    Busca en el índice las reglas de la acción (más las de XP) que ya se
+    cumplen y otorga las que falten. Si ninguna se cumple no hay consultas;
+    si no, una para ver cuáles ya tenía y un INSERT por cada logro nuevo.
+    Devuelve (y anuncia) solo los que esta llamada insertó de verdad.
+    """
+    indice = indice_reglas()
+    valores = {
+        'conteo': contador.total if contador else 0,
+        'racha': contador.racha_actual if contador else 0,
+        'xp': experiencia_total,
+    }
+    reglas = (indice.get(tipo_accion, []) if tipo_accion else []) + indice.get('', [])
+    cumplidas = {r.logro_id: r for r in reglas if valores[r.condicion] >= r.umbral}
+    if not cumplidas:
+        return []
+
+    ya_tenia = set(
+        LogroUsuario.objects.filter(usuario=usuario, logro_id__in=cumplidas).values_list('logro_id', flat=True)
+    )
+    otorgadas = []
+    for logro_id, regla in cumplidas.items():
+        if logro_id in ya_tenia:
+            continue
+        # Uno por uno, cada uno en su savepoint: si otra acción simultánea lo
+        # otorgó después de la lectura, la restricción única lo rechaza y el
+        # logro queda para el anuncio de esa otra acción, no de esta
+        try:
+            with transaction.atomic():
+                LogroUsuario.objects.bulk_create([LogroUsuario(usuario=usuario, logro_id=logro_id)])
+        except IntegrityError:
+            continue
+        otorgadas.append(regla)
+    anunciar_logros(usuario.id, [(r.logro_id, r.nombre) for r in otorgadas])
+    return [r.nombre for r in otorgadas]
@@ -1,3 +1,356 @@
-from django.test import TestCase
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, OperationalError
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from usuarios.models import PerfilUsuario
+
+from .models import Logro, LogroUsuario, ContadorAccion, InstantaneaRanking, EventoXP
+from .ranking import congelar
+from .reglas import evaluar_logros
+from .niveles import nivel_para, xp_total
+from .eventos import registrar_xp, experiencia_en_vivo, compactar, compactar_todo, recalcular_niveles
+
+MAX_REINTENTOS = 50
+
+
+class PruebasNiveles(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='niveles_qa', password='Password123')
+        self.client.force_authenticate(user=self.user)
+        self.url = '/api/gamificacion/accion/'
+
+    def test_formula_cerrada_coincide_con_el_bucle(self):
+        """
+        Valida que nivel_para da lo mismo que subir nivel por nivel.
+        """
+        nivel, experiencia = 1, 0
+        for total in range(0, 60000, 37):
+            while experiencia >= nivel * 100:
+                experiencia -= nivel * 100
+                nivel += 1
+            self.assertEqual(nivel_para(total), (nivel, experiencia))
+            self.assertEqual(xp_total(nivel, experiencia), total)
+            experiencia += 37
+
+    def test_sube_varios_niveles_de_una_vez(self):
+        """
+        Valida que una acción con mucha XP cruza varios niveles, tanto en
+        la respuesta como en el perfil ya compactado.
+        """
+        response = self.client.post(self.url, {'tipo': 'otro', 'xp': 650})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # 100 + 200 + 300 = 600 -> nivel 4 con 50 de sobra
+        self.assertEqual((response.data['nuevo_nivel'], response.data['nueva_xp']), (4, 50))
+        self.assertEqual(response.data['niveles_subidos'], 3)
+
+        # El perfil recién cambia cuando corre el compactador
+        self.assertEqual(compactar(), 1)
+        perfil = PerfilUsuario.objects.get(usuario=self.user)
+        self.assertEqual((perfil.nivel_actual, perfil.experiencia_actual, perfil.experiencia_total), (4, 50, 650))
+
+        response = self.client.post(self.url, {'tipo': 'otro', 'xp': -5})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PruebasReglasLogros(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='logros_qa', password='Password123')
+        self.client.force_authenticate(user=self.user)
+        self.url = '/api/gamificacion/accion/'
+
+    def accion(self, tipo, xp=10):
+        response = self.client.post(self.url, {'tipo': tipo, 'xp': xp})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['logros_nuevos']
+
+    def test_otorga_por_conteo_racha_y_xp_una_sola_vez(self):
+        """
+        Valida que las reglas sembradas y las nuevas se evalúan desde datos
+        y que cada logro se otorga una única vez.
+        """
+        Logro.objects.create(nombre='Veterano', descripcion='Llega a 1000 XP', condicion='xp', umbral=1000)
+
+        self.assertEqual(self.accion('mision_diaria'), ['Dedicado'])
+        self.assertEqual(self.accion('mision_diaria'), [])
+        self.assertEqual(self.accion('otro', xp=1000), ['Veterano'])
+
+        # Seis días seguidos antes de hoy: la acción de hoy completa la racha de 7
+        ContadorAccion.objects.filter(usuario=self.user, tipo_accion='mision_diaria').update(
+            racha_actual=6, ultima_fecha=timezone.localdate() - timedelta(days=1),
+        )
+        self.assertEqual(self.accion('mision_diaria'), ['Constancia'])
+        contador = ContadorAccion.objects.get(usuario=self.user, tipo_accion='mision_diaria')
+        self.assertEqual((contador.total, contador.racha_actual, contador.racha_max), (3, 7, 7))
+        self.assertEqual(LogroUsuario.objects.filter(usuario=self.user).count(), 3)
+
+    def test_mas_logros_no_agrega_consultas(self):
+        """
+        Valida que agregar logros al catálogo no suma consultas por acción:
+        las reglas se leen del índice en memoria.
+        """
+        self.accion('recurso_completado')
+        with CaptureQueriesContext(connection) as antes:
+            self.accion('recurso_completado')
+
+        Logro.objects.bulk_create([
+            Logro(nombre=f'Lector {n}', descripcion='-', tipo_accion='recurso_completado', umbral=n)
+            for n in range(10, 30)
+        ])
+        Logro.objects.create(nombre='Lector 2', descripcion='-', tipo_accion='recurso_completado', umbral=3)
+        self.assertEqual(self.accion('recurso_completado'), ['Lector 2'])
+
+        with CaptureQueriesContext(connection) as despues:
+            self.accion('recurso_completado')
+        self.assertEqual(len(despues), len(antes))
+
+
+    def test_no_anuncia_logros_otorgados_por_otra_accion(self):
+        """
+        Valida que si otra acción simultánea otorga el logro entre la lectura
+        y el INSERT, esta llamada no lo devuelve ni lo anuncia otra vez.
+        """
+        dedicado = Logro.objects.get(nombre='Dedicado')
+        contador = ContadorAccion.objects.create(usuario=self.user, tipo_accion='mision_diaria', total=1)
+        # La otra acción ya lo insertó, pero esta leyó antes de que confirmara
+        LogroUsuario.objects.bulk_create([LogroUsuario(usuario=self.user, logro=dedicado)])
+        lectura_vieja = LogroUsuario.objects.none()
+
+        with mock.patch.object(LogroUsuario.objects, 'filter', return_value=lectura_vieja), \
+                mock.patch('gamificacion.reglas.anunciar_logros') as anunciar:
+            self.assertEqual(evaluar_logros(self.user, 'mision_diaria', contador, 10), [])
+        anunciar.assert_called_once_with(self.user.id, [])
+        self.assertEqual(LogroUsuario.objects.filter(usuario=self.user).count(), 1)
+
+
+class PruebasListaLogros(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='lista_qa', password='Password123')
+        self.client.force_authenticate(user=self.user)
+        self.url = '/api/gamificacion/logros/'
+        Logro.objects.bulk_create([Logro(nombre=f'Extra {n}', descripcion='-', puntos=5) for n in range(50)])
+        self.dedicado = Logro.objects.get(nombre='Dedicado')
+        LogroUsuario.objects.create(usuario=self.user, logro=self.dedicado)
+
+    def test_una_consulta_con_catalogo_en_cache(self):
+        """
+        Valida que con el catálogo en caché el listado hace una sola
+        consulta y que un cambio en Logro invalida el catálogo.
+        """
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([l['nombre'] for l in response.data['desbloqueados']], ['Dedicado'])
+        self.assertIn('fecha_obtenido', response.data['desbloqueados'][0])
+        self.assertEqual(response.data['puntos_totales'], 30)
+        self.assertEqual(len(response.data['bloqueados']), Logro.objects.count() - 1)
+
+        self.dedicado.puntos = 40
+        self.dedicado.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['puntos_totales'], 40)
+
+
+class PruebasRanking(APITestCase):
+
+    def setUp(self):
+        # XP total por usuario: hay un empate en 300
+        self.usuarios = {}
+        for nombre, total in [('ana', 500), ('beto', 300), ('caro', 300), ('dani', 100), ('eva', 0), ('fede', 50)]:
+            user = User.objects.create_user(username=nombre, password='Password123')
+            PerfilUsuario.objects.filter(usuario=user).update(experiencia_total=total)
+            self.usuarios[nombre] = user
+        self.client.force_authenticate(user=self.usuarios['dani'])
+        self.url = '/api/gamificacion/ranking/'
+
+    def test_top_paginado_con_empates(self):
+        """
+        Valida que el ranking se pagina por cursor y que los empates
+        comparten posición también entre páginas.
+        """
+        response = self.client.get(self.url, {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(f['usuario'], f['posicion']) for f in response.data['results']], [('ana', 1), ('beto', 2)])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([(f['usuario'], f['posicion']) for f in response.data['results']], [('caro', 2), ('dani', 4)])
+
+    def test_mi_posicion_con_vecinos(self):
+        """
+        Valida que /ranking/yo/ devuelve la posición y los vecinos de arriba
+        y abajo sin recorrer todo el ranking.
+        """
+        with self.assertNumQueries(5):
+            response = self.client.get(f'{self.url}yo/', {'vecinos': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['posicion'], 4)
+        self.assertEqual(
+            [(f['usuario'], f['posicion']) for f in response.data['vecinos']],
+            [('beto', 2), ('caro', 2), ('dani', 4), ('fede', 5), ('eva', 6)],
+        )
+
+    def test_instantanea_semanal(self):
+        """
+        Valida que congelar guarda el top del periodo, que repetirlo lo
+        reemplaza y que el histórico devuelve la última foto.
+        """
+        congelar('semanal', limite=3)
+        inicio, cantidad = congelar('semanal', limite=3)
+        self.assertEqual(cantidad, 3)
+        self.assertEqual(InstantaneaRanking.objects.filter(periodo='semanal', inicio=inicio).count(), 3)
+
+        PerfilUsuario.objects.filter(usuario=self.usuarios['eva']).update(experiencia_total=9000)
+        response = self.client.get(f'{self.url}historico/', {'periodo': 'semanal'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['inicio'], inicio)
+        self.assertEqual([f['usuario'] for f in response.data['posiciones']], ['ana', 'beto', 'caro'])
+
+
+class PruebasLibroXP(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='libro_qa', password='Password123')
+        self.otro = User.objects.create_user(username='libro_otro', password='Password123')
+
+    def test_en_vivo_es_perfil_mas_pendientes(self):
+        """
+        Valida que la XP en vivo suma lo compactado y lo pendiente, que el
+        compactador procesa por lotes y que los eventos quedan como historial.
+        """
+        for xp in (100, 150, 400):
+            registrar_xp(self.user, xp, 'mision_diaria')
+        registrar_xp(self.otro, 30)
+        self.assertEqual(experiencia_en_vivo(self.user), 650)
+        self.assertEqual(PerfilUsuario.objects.get(usuario=self.user).experiencia_total, 0)
+
+        self.assertEqual(compactar(tamano=2), 2)
+        self.assertEqual(experiencia_en_vivo(self.user), 650)
+        self.assertEqual(compactar_todo(tamano=2), 2)
+        self.assertEqual(compactar(), 0)
+
+        perfil = PerfilUsuario.objects.get(usuario=self.user)
+        self.assertEqual((perfil.experiencia_total, perfil.nivel_actual, perfil.experiencia_actual), (650, 4, 50))
+        self.assertEqual(experiencia_en_vivo(self.otro), 30)
+        self.assertEqual(EventoXP.objects.filter(compactado=True).count(), 4)
+
+    def test_perfil_muestra_xp_en_vivo(self):
+        """
+        Valida que el perfil muestra la XP en vivo (compactada más pendiente)
+        aunque el compactador todavía no haya corrido.
+        """
+        registrar_xp(self.user, 400)
+        compactar()
+        registrar_xp(self.user, 250)
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/auth/perfil/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            (response.data['experiencia_total'], response.data['nivel_actual'], response.data['experiencia_actual']),
+            (650, 4, 50),
+        )
+        self.assertEqual(response.data['experiencia_siguiente_nivel'], 400)
+        self.assertEqual(PerfilUsuario.objects.get(usuario=self.user).experiencia_total, 400)
+
+    def test_recalcula_niveles_desde_el_total(self):
+        """
+        Valida que recalcular_niveles corrige nivel y experiencia a partir
+        de experiencia_total (por ejemplo, tras cambiar la curva).
+        """
+        PerfilUsuario.objects.filter(usuario=self.user).update(experiencia_total=650, nivel_actual=1, experiencia_actual=0)
+        self.assertEqual(recalcular_niveles(tamano=1), 1)
+        perfil = PerfilUsuario.objects.get(usuario=self.user)
+        self.assertEqual((perfil.nivel_actual, perfil.experiencia_actual), (4, 50))
+
+
+class PruebasConcurrenciaXP(TransactionTestCase):
+
+    def test_acciones_en_paralelo_no_pierden_xp(self):
+        """
+        Valida que muchas acciones simultáneas del mismo usuario (la mitad
+        por POST /accion/, la otra mitad directo al libro), con dos
+        compactadores corriendo a la vez, suman toda la XP exactamente una vez.
+        """
+        user = User.objects.create_user(username='carrera_qa', password='Password123')
+        hilos, acciones, xp = 8, 25, 30
+        errores = []
+        terminado = threading.Event()
+
+        def reintentar(funcion, *args, **kwargs):
+            # SQLite en memoria no espera al bloqueo: reintentamos con una espera
+            # creciente, pero con tope para que un error permanente (tabla que
+            # falta, bloqueo que no se suelta) falle la prueba en vez de colgarla
+            for intento in range(MAX_REINTENTOS):
+                try:
+                    return funcion(*args, **kwargs)
+                except OperationalError:
+                    if intento == MAX_REINTENTOS - 1:
+                        raise
+                    time.sleep(min(0.001 * 2 ** intento, 0.05))
+
+        def accion_por_api(cliente, tipo):
+            try:
+                response = cliente.post('/api/gamificacion/accion/', {'tipo': tipo, 'xp': xp}, format='json')
+            except OperationalError:
+                # Si el evento ya quedó anotado, repetir la acción lo sumaría dos veces
+                if reintentar(EventoXP.objects.filter(tipo_accion=tipo).exists):
+                    return
+                raise
+            if response.status_code != status.HTTP_200_OK:
+                raise AssertionError(f"POST /accion/ respondió {response.status_code}")
+
+        def trabajar(por_api, hilo):
+            cliente = APIClient()
+            cliente.force_authenticate(user=user)
+            try:
+                for n in range(acciones):
+                    if por_api:
+                        # Un tipo por acción: permite saber si un intento fallido ya la anotó
+                        reintentar(accion_por_api, cliente, f'carrera-{hilo}-{n}')
+                    else:
+                        reintentar(registrar_xp, user, xp, 'carrera')
+            except Exception as e:
+                errores.append(e)
+            finally:
+                connection.close()
+
+        def compactar_en_bucle():
+            try:
+                while not terminado.is_set():
+                    reintentar(compactar, 20)
+            except Exception as e:
+                errores.append(e)
+            finally:
+                connection.close()
+
+        compactadores = [threading.Thread(target=compactar_en_bucle) for _ in range(2)]
+        trabajadores = [threading.Thread(target=trabajar, args=(i % 2 == 0, i)) for i in range(hilos)]
+        for t in compactadores + trabajadores:
+            t.start()
+        for t in trabajadores:
+            t.join()
+        terminado.set()
+        for t in compactadores:
+            t.join()
+
+        self.assertEqual(errores, [])
+        self.assertEqual(EventoXP.objects.filter(tipo_accion__startswith='carrera-').count(), hilos // 2 * acciones)
+        self.assertEqual(experiencia_en_vivo(user), hilos * acciones * xp)
+        compactar_todo(tamano=50)
+        perfil = PerfilUsuario.objects.get(usuario=user)
+        self.assertEqual(perfil.experiencia_total, hilos * acciones * xp)
+        self.assertEqual((perfil.nivel_actual, perfil.experiencia_actual), nivel_para(hilos * acciones * xp))
@@ -1,7 +1,10 @@
 from django.urls import path
-from .views import ListaLogrosView, RegistrarAccionView
+from .views import ListaLogrosView, RegistrarAccionView, RankingView, MiPosicionView, RankingHistoricoView
 
 urlpatterns = [
     path('logros/', ListaLogrosView.as_view()),
     path('accion/', RegistrarAccionView.as_view()), # Nueva ruta
+    path('ranking/', RankingView.as_view()),
+    path('ranking/yo/', MiPosicionView.as_view()),
+    path('ranking/historico/', RankingHistoricoView.as_view()),
 ]
\ No newline at end of file
@@ -1,83 +1,166 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import permissions, status
-from rest_framework.authentication import TokenAuthentication
+from django.conf import settings
+from django.core.cache import cache
 
-from .models import Logro, LogroUsuario
+from django.utils.dateparse import parse_date
+
+from core.autenticacion import CachedTokenAuthentication
+from core.cache import obtener_version, registrar_acierto, registrar_fallo
+from core.idempotencia import IdempotenciaMixin
+from core.paginacion import KeysetPagination
+from usuarios.models import PerfilUsuario
+
+from .models import Logro, LogroUsuario, InstantaneaRanking
 from .serializers import LogroSerializer
-# Importamos el perfil correctamente ahora que ya arreglaste usuarios/models.py
-from usuarios.models import PerfilUsuario 
+from .niveles import nivel_para, MAX_XP_POR_ACCION
+from .eventos import registrar_xp, experiencia_en_vivo
+from .reglas import registrar_contador, evaluar_logros
+from .ranking import ORDEN, perfiles, con_posiciones, mi_posicion
 
 # 1. VISTA PARA LISTAR LOGROS (Esta era la que faltaba)
 class ListaLogrosView(APIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        # 1. Logros desbloqueados por el usuario
-        desbloqueados_ids = LogroUsuario.objects.filter(usuario=request.user).values_list('logro_id', flat=True)
-        
-        # 2. Obtener objetos completos
-        logros_desbloqueados = Logro.objects.filter(id__in=desbloqueados_ids)
-        logros_bloqueados = Logro.objects.exclude(id__in=desbloqueados_ids)
+        # 1. Catálogo completo, ya serializado y en caché (igual para todos)
+        catalogo = self.catalogo()
+
+        # 2. Lo del usuario es una sola consulta: qué logros tiene y cuándo
+        obtenidos = dict(
+            LogroUsuario.objects.filter(usuario=request.user).values_list('logro_id', 'fecha_obtenido')
+        )
+
+        desbloqueados = []
+        bloqueados = []
+        for logro in catalogo:
+            if logro['id'] in obtenidos:
+                desbloqueados.append({**logro, 'fecha_obtenido': obtenidos[logro['id']]})
+            else:
+                bloqueados.append(logro)
 
         return Response({
-            "desbloqueados": LogroSerializer(logros_desbloqueados, many=True).data,
-            "bloqueados": LogroSerializer(logros_bloqueados, many=True).data,
-            "puntos_totales": sum(l.puntos for l in logros_desbloqueados)
+            "desbloqueados": desbloqueados,
+            "bloqueados": bloqueados,
+            # Los puntos ya vienen en el catálogo: no hace falta otra consulta
+            "puntos_totales": sum(l['puntos'] for l in desbloqueados)
         })
 
+    def catalogo(self):
+        # La versión la sube la señal de Logro (la misma que recarga las reglas)
+        clave = f"logros:catalogo:{obtener_version('logros', 'catalogo')}"
+        data = cache.get(clave)
+        if data is not None:
+            registrar_acierto('logros')
+            return data
+        registrar_fallo('logros')
+        data = [dict(logro) for logro in LogroSerializer(Logro.objects.order_by('id'), many=True).data]
+        cache.set(clave, data, settings.CATALOGO_LOGROS_TIMEOUT)
+        return data
+
 # 2. VISTA PARA REGISTRAR ACCIONES Y GANAR XP
-class RegistrarAccionView(APIView):
-    authentication_classes = [TokenAuthentication]
+class RegistrarAccionView(IdempotenciaMixin, APIView):
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
         tipo_accion = request.data.get('tipo') 
-        xp_ganada = request.data.get('xp', 10) 
+        if tipo_accion is not None and (not isinstance(tipo_accion, str) or len(tipo_accion) > 50):
+            return Response({'error': 'tipo debe ser texto (máx. 50).'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            xp_ganada = int(request.data.get('xp', 10))
+        except (TypeError, ValueError):
+            return Response({'error': 'xp debe ser un número entero.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= xp_ganada <= MAX_XP_POR_ACCION:
+            return Response({'error': f'xp debe estar entre 0 y {MAX_XP_POR_ACCION}.'}, status=status.HTTP_400_BAD_REQUEST)
         
         user = request.user
-        
-        # Obtenemos el perfil (asegurando compatibilidad con tu modelo nuevo)
-        try:
-            perfil = user.perfilusuario
-        except PerfilUsuario.DoesNotExist:
-            perfil = PerfilUsuario.objects.create(usuario=user)
 
-        # 1. Sumar XP
-        perfil.experiencia_actual += int(xp_ganada)
-        
-        # Lógica de subida de nivel
-        if perfil.experiencia_actual >= (perfil.nivel_actual * 100):
-            perfil.experiencia_actual -= (perfil.nivel_actual * 100)
-            perfil.nivel_actual += 1
-        
-        perfil.save()
+        # 1. Sumar XP: solo se anota en el libro, el compactador la pasa al perfil
+        registrar_xp(user, xp_ganada, tipo_accion)
+        total = experiencia_en_vivo(user)
+        nivel, experiencia = nivel_para(total)
+        nivel_anterior, _ = nivel_para(total - xp_ganada)
 
-        # 2. Verificar Logros
-        logros_desbloqueados = []
-        
-        if tipo_accion == 'recurso_completado':
-            logro, _ = Logro.objects.get_or_create(
-                nombre="Estudiante del bienestar", 
-                defaults={'puntos': 50, 'descripcion': 'Completa un recurso', 'icono': '📚'}
-            )
-            if not LogroUsuario.objects.filter(usuario=user, logro=logro).exists():
-                LogroUsuario.objects.create(usuario=user, logro=logro)
-                logros_desbloqueados.append(logro.nombre)
-
-        elif tipo_accion == 'mision_diaria':
-            logro, _ = Logro.objects.get_or_create(
-                nombre="Dedicado", 
-                defaults={'puntos': 30, 'descripcion': 'Completa una misión', 'icono': '🎯'}
-            )
-            if not LogroUsuario.objects.filter(usuario=user, logro=logro).exists():
-                LogroUsuario.objects.create(usuario=user, logro=logro)
-                logros_desbloqueados.append(logro.nombre)
+        # 2. Verificar Logros (reglas en datos, ver reglas.py)
+        contador = registrar_contador(user, tipo_accion) if tipo_accion else None
+        logros_desbloqueados = evaluar_logros(user, tipo_accion, contador, total)
 
         return Response({
             "mensaje": "Acción registrada",
-            "nuevo_nivel": perfil.nivel_actual,
-            "nueva_xp": perfil.experiencia_actual,
+            "nuevo_nivel": nivel,
+            "nueva_xp": experiencia,
+            "niveles_subidos": nivel - nivel_anterior,
             "logros_nuevos": logros_desbloqueados
-        })
\ No newline at end of file
+        })
+
+
+# 3. RANKING GLOBAL POR XP TOTAL
+class RankingPagination(KeysetPagination):
+    ordering = ORDEN
+    page_size = 20
+
+
+# GET /ranking/?page_size=20 -> {next, results: [{posicion, usuario, nivel, experiencia_total}]}
+class RankingView(APIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        paginador = RankingPagination()
+        filas = paginador.paginate_queryset(perfiles(), request, view=self)
+        return paginador.get_paginated_response(con_posiciones(filas))
+
+
+# GET /ranking/yo/?vecinos=5 -> mi posición y los que están justo arriba y abajo
+class MiPosicionView(APIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            vecinos = int(request.query_params.get('vecinos', 5))
+        except ValueError:
+            return Response({'error': 'vecinos debe ser un número entero.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            perfil = perfiles().get(usuario=request.user)
+        except PerfilUsuario.DoesNotExist:
+            return Response({'error': 'El usuario no tiene perfil.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(mi_posicion(perfil, vecinos))
+
+
+# GET /ranking/historico/?periodo=semanal[&inicio=2026-03-02] -> foto congelada del periodo
+class RankingHistoricoView(APIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        periodo = request.query_params.get('periodo', 'semanal')
+        if periodo not in dict(InstantaneaRanking.PERIODOS):
+            return Response({'error': 'periodo debe ser semanal o mensual.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        fotos = InstantaneaRanking.objects.filter(periodo=periodo)
+        if 'inicio' in request.query_params:
+            inicio = parse_date(request.query_params['inicio'])
+            if inicio is None:
+                return Response({'error': 'inicio debe tener formato YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            # Sin inicio: la foto más reciente
+            inicio = fotos.order_by('-inicio').values_list('inicio', flat=True).first()
+
+        filas = fotos.filter(inicio=inicio).select_related('usuario').order_by('posicion')
+        return Response({
+            'periodo': periodo,
+            'inicio': inicio,
+            'posiciones': [
+                {
+                    'posicion': f.posicion,
+                    'usuario': f.usuario.username,
+                    'nivel': f.nivel,
+                    'experiencia_total': f.experiencia_total,
+                }
+                for f in filas
+            ],
+        })
@@ -0,0 +1,62 @@
+from django.db.models import Count, Prefetch
+
+from .models import Actividad, RegistroActividad
+
+
+def parsear_actividades(texto):
+    # "Trabajo, Gym,,Trabajo" -> ["Trabajo", "Gym"] (sin vacíos ni repetidos)
+    nombres = []
+    for nombre in (texto or '').split(','):
+        nombre = nombre.strip()[:100]
+        if nombre and nombre not in nombres:
+            nombres.append(nombre)
+    return nombres
+
+
+def obtener_catalogo(nombres):
+    """
+    Devuelve {nombre: id} creando en bloque las actividades que falten.
+    Son como mucho tres consultas, sin importar cuántos nombres lleguen.
+    """
+    nombres = set(nombres)
+    if not nombres:
+        return {}
+    catalogo = dict(Actividad.objects.filter(nombre__in=nombres).values_list('nombre', 'id'))
+    faltantes = nombres - catalogo.keys()
+    if faltantes:
+        Actividad.objects.bulk_create([Actividad(nombre=n) for n in faltantes], ignore_conflicts=True)
+        catalogo.update(Actividad.objects.filter(nombre__in=faltantes).values_list('nombre', 'id'))
+    return catalogo
+
+
+def asignar_actividades(pares, reemplazar=False):
+    """
+    Recibe [(registro, ["Trabajo", "Gym"]), ...] y crea los enlaces en bloque.
+    Con reemplazar=True borra antes los enlaces que tuvieran esos registros.
+    """
+    pares = list(pares)
+    if reemplazar:
+        RegistroActividad.objects.filter(registro__in=[r.pk for r, _ in pares]).delete()
+
+    catalogo = obtener_catalogo(n for _, nombres in pares for n in nombres)
+    RegistroActividad.objects.bulk_create([
+        RegistroActividad(registro=registro, actividad_id=catalogo[nombre], usuario_id=registro.usuario_id)
+        for registro, nombres in pares
+        for nombre in nombres
+    ])
+
+
+def con_actividades(queryset):
+    # Trae los nombres de actividades de toda la página en una sola consulta extra
+    enlaces = RegistroActividad.objects.select_related('actividad').order_by('id')
+    return queryset.prefetch_related(Prefetch('enlaces_actividad', queryset=enlaces))
+
+
+def top_actividades(usuario, limite=5):
+    # GROUP BY actividad ... ORDER BY total DESC LIMIT n sobre el índice (usuario, actividad)
+    return list(
+        RegistroActividad.objects.filter(usuario=usuario)
+        .values('actividad_id', 'actividad__nombre')
+        .annotate(total=Count('id'))
+        .order_by('-total', 'actividad__nombre')[:limite]
+    )
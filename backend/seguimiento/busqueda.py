@@ -0,0 +1,50 @@
+from core.busqueda import (
+    MARCA_INICIO, MARCA_FIN, PALABRAS_FRAGMENTO,
+    fts_disponible, terminos, expresion_fts, filtro_terminos, fragmento,
+)
+from .models import RegistroDiario
+
+# La columna usuario_id del índice solo filtra: con peso 0 no cambia el orden
+SQL_FTS = """
+    SELECT r.id, r.fecha, r.hora, r.emocion, r.nota,
+           snippet(registro_fts, 0, %s, %s, '…', %s) AS fragmento
+    FROM registro_fts
+    JOIN seguimiento_registrodiario r ON r.id = registro_fts.rowid
+    WHERE registro_fts MATCH %s AND r.eliminado = %s
+    ORDER BY bm25(registro_fts, 1.0, 0.0)
+    LIMIT %s
+"""
+
+
+def buscar_notas(usuario, texto, limite):
+    """
+    Notas del diario del usuario que contienen todas las palabras de
+    'texto'. El usuario va dentro de la expresión FTS (usuario_id:N), así
+    que el índice nunca mira las notas de otras personas.
+    """
+    lista = terminos(texto)
+    if fts_disponible():
+        expresion = f'usuario_id : "{int(usuario.pk)}" AND nota : ({expresion_fts(lista)})'
+        filas = RegistroDiario.objects.raw(
+            SQL_FTS, [MARCA_INICIO, MARCA_FIN, PALABRAS_FRAGMENTO, expresion, False, limite],
+        )
+        return [serializar(r, r.fragmento) for r in filas]
+
+    filas = (
+        RegistroDiario.objects.filter(usuario=usuario).vigentes()
+        .filter(filtro_terminos('nota', lista))
+        .only('id', 'fecha', 'hora', 'emocion', 'nota')
+        .order_by('-fecha', '-hora', '-id')[:limite]
+    )
+    return [serializar(r, fragmento(r.nota, lista)) for r in filas]
+
+
+def serializar(registro, fragmento):
+    return {
+        'id': registro.id,
+        'fecha': registro.fecha,
+        'hora': registro.hora,
+        'emocion': registro.emocion,
+        'nota': registro.nota,
+        'fragmento': fragmento,
+    }
@@ -0,0 +1,127 @@
+import logging
+import uuid
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Recordatorio
+from .notificaciones import obtener_backend
+from .recurrencia import ocurrencias_completadas
+
+logger = logging.getLogger(__name__)
+
+TAMANO_LOTE = 500
+
+
+def pendientes(ahora):
+    # Recorre el índice parcial recordatorio_pendiente_idx: solo filas sin notificar
+    return Recordatorio.objects.filter(
+        completado=False, notificado_en__isnull=True, recurrencia='ninguna',
+        fecha_hora__lte=ahora, eliminado=False,
+    ).order_by('fecha_hora')
+
+
+def reclamar_lote(tamano=TAMANO_LOTE, ahora=None):
+    """
+    Marca como notificado un lote de recordatorios vencidos y lo devuelve.
+    El UPDATE solo toca filas que sigan con notificado_en NULL, así que si
+    varios procesos compiten por las mismas filas cada una queda en un único
+    lote. Las que ganó otro proceso se reemplazan con las siguientes
+    vencidas: el lote queda corto solo si ya no hay más. El lote se
+    recupera después por su UUID.
+    """
+    ahora = ahora or timezone.now()
+    lote = uuid.uuid4()
+    reclamados = 0
+    while reclamados < tamano:
+        with transaction.atomic():
+            ids = list(pendientes(ahora).values_list('id', flat=True)[:tamano - reclamados])
+            if not ids:
+                break
+            reclamados += Recordatorio.objects.filter(id__in=ids, notificado_en__isnull=True).update(
+                notificado_en=ahora, lote_notificacion=lote,
+            )
+    if not reclamados:
+        return []
+    return list(Recordatorio.objects.filter(lote_notificacion=lote).select_related('usuario').order_by('fecha_hora'))
+
+
+def liberar_lote(recordatorios):
+    # Si el backend falla, el lote vuelve a quedar pendiente para el próximo intento
+    Recordatorio.objects.filter(id__in=[r.id for r in recordatorios]).update(
+        notificado_en=None, lote_notificacion=None,
+    )
+
+
+def reclamar_repetitivos(tamano=TAMANO_LOTE, ahora=None):
+    """
+    Reclama las reglas repetitivas cuyo proximo_aviso ya pasó, adelantándolo
+    a la siguiente ocurrencia. El UPDATE compara contra el valor leído, así
+    que si dos procesos leen la misma regla solo uno la avanza y la envía;
+    el otro sigue con las siguientes hasta juntar 'tamano' o agotarlas.
+    En cada recordatorio devuelto fecha_hora queda como la ocurrencia avisada.
+    """
+    ahora = ahora or timezone.now()
+    reclamados = []
+    probados = set()
+    while len(reclamados) < tamano:
+        candidatos = list(
+            Recordatorio.objects.filter(proximo_aviso__lte=ahora, completado=False, eliminado=False)
+            .exclude(id__in=probados).select_related('usuario').order_by('proximo_aviso')[:tamano - len(reclamados)]
+        )
+        if not candidatos:
+            break
+        probados.update(r.id for r in candidatos)
+        hechas = ocurrencias_completadas([(r, r.proximo_aviso) for r in candidatos])
+
+        for recordatorio in candidatos:
+            momento = recordatorio.proximo_aviso
+            siguiente = recordatorio.siguiente_ocurrencia(ahora)
+            avanzado = Recordatorio.objects.filter(pk=recordatorio.pk, proximo_aviso=momento).update(
+                proximo_aviso=siguiente, notificado_en=ahora,
+            )
+            # Otro proceso la tomó, o el usuario ya marcó esa ocurrencia como hecha:
+            # se sigue con la próxima candidata en vez de cortar el lote
+            if not avanzado or (recordatorio.id, timezone.localtime(momento).date()) in hechas:
+                continue
+            recordatorio.proximo_aviso = siguiente
+            recordatorio.fecha_hora = momento
+            reclamados.append(recordatorio)
+    return reclamados
+
+
+def liberar_repetitivos(recordatorios):
+    # Devuelve cada regla a la ocurrencia que no se pudo avisar
+    for recordatorio in recordatorios:
+        Recordatorio.objects.filter(pk=recordatorio.pk, proximo_aviso=recordatorio.proximo_aviso).update(
+            proximo_aviso=recordatorio.fecha_hora,
+        )
+
+
+def despachar(backend=None, tamano=TAMANO_LOTE, max_lotes=None):
+    """
+    Reclama y entrega lotes hasta que no queden vencidos (o hasta max_lotes).
+    Devuelve la cantidad de recordatorios entregados.
+    """
+    backend = backend or obtener_backend()
+    entregados = 0
+    lotes = 0
+    while max_lotes is None or lotes < max_lotes:
+        recordatorios = reclamar_lote(tamano)
+        repetitivos = reclamar_repetitivos(tamano)
+        if not recordatorios and not repetitivos:
+            break
+        lotes += 1
+        try:
+            backend.enviar(recordatorios + repetitivos)
+        except Exception:
+            logger.exception(
+                "Falló el envío de %s recordatorios; se reintentarán", len(recordatorios) + len(repetitivos),
+            )
+            liberar_lote(recordatorios)
+            liberar_repetitivos(repetitivos)
+            break
+        entregados += len(recordatorios) + len(repetitivos)
+        if len(recordatorios) < tamano and len(repetitivos) < tamano:
+            break
+    return entregados
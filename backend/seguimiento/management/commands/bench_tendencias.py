@@ -0,0 +1,71 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from seguimiento.models import RegistroDiario
+from seguimiento.resumenes import reconstruir_resumenes
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la latencia de /api/seguimiento/tendencias/ para usuarios con "
+        "distinta cantidad de registros. Crea usuarios temporales y los borra al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamanos', type=int, nargs='+', default=[100, 1000, 10000, 30000])
+        parser.add_argument('--repeticiones', type=int, default=30)
+        parser.add_argument('--dias', type=int, default=730, help="Días de historial sobre los que repartir")
+
+    def sembrar(self, usuario, cantidad, dias):
+        hoy = timezone.localdate()
+        emociones = [e for e, _ in RegistroDiario.EMOCIONES]
+        RegistroDiario.objects.bulk_create([
+            RegistroDiario(
+                usuario=usuario, emocion=random.choice(emociones),
+                nivel_intensidad=random.randint(1, 10), nivel_energia=random.randint(1, 10),
+            )
+            for _ in range(cantidad)
+        ], batch_size=2000)
+        # fecha es auto_now_add: la repartimos después sobre el historial
+        ids = list(RegistroDiario.objects.filter(usuario=usuario).values_list('id', flat=True))
+        por_dia = max(1, len(ids) // dias)
+        for i in range(0, len(ids), por_dia):
+            dia = hoy - timedelta(days=(i // por_dia) % dias)
+            RegistroDiario.objects.filter(id__in=ids[i:i + por_dia]).update(fecha=dia)
+        reconstruir_resumenes(usuario_ids=[usuario.id])
+
+    def medir(self, cliente, params, repeticiones):
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            response = cliente.get('/api/seguimiento/tendencias/', params)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+            assert response.status_code == 200, response.data
+        tiempos.sort()
+        return statistics.median(tiempos), tiempos[int(len(tiempos) * 0.95) - 1]
+
+    def handle(self, *args, **options):
+        sufijo = random.randint(10000, 99999)
+        usuarios = []
+        try:
+            self.stdout.write(f"{'registros':>10} | {'granularidad':>12} | {'p50 ms':>8} | {'p95 ms':>8}")
+            for cantidad in options['tamanos']:
+                usuario = User.objects.create_user(username=f"bench_tendencias_{cantidad}_{sufijo}")
+                usuarios.append(usuario)
+                self.sembrar(usuario, cantidad, options['dias'])
+
+                cliente = APIClient()
+                cliente.force_authenticate(user=usuario)
+                for granularidad in ('dia', 'semana', 'mes'):
+                    p50, p95 = self.medir(cliente, {'granularidad': granularidad}, options['repeticiones'])
+                    self.stdout.write(f"{cantidad:>10} | {granularidad:>12} | {p50:>8.2f} | {p95:>8.2f}")
+        finally:
+            for usuario in usuarios:
+                usuario.delete()
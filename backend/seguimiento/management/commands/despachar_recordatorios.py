@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from seguimiento.despachador import despachar, TAMANO_LOTE
+
+
+class Command(BaseCommand):
+    help = (
+        "Entrega los recordatorios vencidos al backend de notificaciones. "
+        "Se pueden correr varios procesos a la vez sin duplicar envíos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help="Recordatorios por lote")
+        parser.add_argument('--continuo', action='store_true', help="Seguir corriendo como worker")
+        parser.add_argument('--intervalo', type=float, default=5.0, help="Segundos entre rondas en modo continuo")
+
+    def handle(self, *args, **options):
+        while True:
+            entregados = despachar(tamano=options['lote'])
+            if entregados or not options['continuo']:
+                self.stdout.write(f"Recordatorios entregados: {entregados}")
+            if not options['continuo']:
+                break
+            if not entregados:
+                time.sleep(options['intervalo'])
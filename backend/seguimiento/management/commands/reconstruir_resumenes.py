@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from seguimiento.resumenes import reconstruir_resumenes
+
+
+class Command(BaseCommand):
+    help = "Recalcula desde cero la tabla ResumenDiario a partir de RegistroDiario."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--usuario', type=int, action='append', dest='usuarios',
+            help="ID de usuario a reconstruir (se puede repetir). Por defecto, todos.",
+        )
+
+    def handle(self, *args, **options):
+        creados = reconstruir_resumenes(usuario_ids=options['usuarios'])
+        self.stdout.write(self.style.SUCCESS(f"Resúmenes reconstruidos: {creados} filas"))
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def poblar_resumenes(apps, schema_editor):
+    # Construye los resúmenes de los registros que ya existían
+    RegistroDiario = apps.get_model('seguimiento', 'RegistroDiario')
+    ResumenDiario = apps.get_model('seguimiento', 'ResumenDiario')
+
+    resumenes = {}
+    filas = RegistroDiario.objects.values_list(
+        'usuario_id', 'fecha', 'emocion', 'nivel_intensidad', 'nivel_energia', 'actividades'
+    )
+    for usuario_id, fecha, emocion, intensidad, energia, actividades in filas.iterator():
+        resumen = resumenes.get((usuario_id, fecha))
+        if resumen is None:
+            resumen = ResumenDiario(usuario_id=usuario_id, fecha=fecha, conteo_actividades={})
+            resumenes[(usuario_id, fecha)] = resumen
+        resumen.total_registros += 1
+        resumen.suma_intensidad += intensidad or 0
+        resumen.suma_energia += energia or 0
+        campo = f"conteo_{emocion}"
+        setattr(resumen, campo, getattr(resumen, campo) + 1)
+        for actividad in (actividades or '').split(','):
+            actividad = actividad.strip()
+            if actividad:
+                resumen.conteo_actividades[actividad] = resumen.conteo_actividades.get(actividad, 0) + 1
+
+    ResumenDiario.objects.bulk_create(resumenes.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seguimiento', '0002_recordatorio'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('total_registros', models.IntegerField(default=0)),
+                ('suma_intensidad', models.IntegerField(default=0)),
+                ('suma_energia', models.IntegerField(default=0)),
+                ('conteo_feliz', models.IntegerField(default=0)),
+                ('conteo_contento', models.IntegerField(default=0)),
+                ('conteo_neutral', models.IntegerField(default=0)),
+                ('conteo_triste', models.IntegerField(default=0)),
+                ('conteo_ansioso', models.IntegerField(default=0)),
+                ('conteo_enojado', models.IntegerField(default=0)),
+                ('conteo_actividades', models.JSONField(blank=True, default=dict)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'fecha'), name='resumen_usuario_fecha_unico')],
+            },
+        ),
+        migrations.RunPython(poblar_resumenes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,91 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def separar_actividades(apps, schema_editor):
+    # Convierte el texto "Trabajo, Gym" de cada registro en filas de RegistroActividad
+    RegistroDiario = apps.get_model('seguimiento', 'RegistroDiario')
+    Actividad = apps.get_model('seguimiento', 'Actividad')
+    RegistroActividad = apps.get_model('seguimiento', 'RegistroActividad')
+
+    catalogo = {}
+    enlaces = []
+    filas = RegistroDiario.objects.exclude(actividades_texto='').values_list('id', 'usuario_id', 'actividades_texto')
+    for registro_id, usuario_id, texto in filas.iterator():
+        nombres = []
+        for nombre in texto.split(','):
+            nombre = nombre.strip()[:100]
+            if nombre and nombre not in nombres:
+                nombres.append(nombre)
+        for nombre in nombres:
+            if nombre not in catalogo:
+                catalogo[nombre] = Actividad.objects.create(nombre=nombre).id
+            enlaces.append(RegistroActividad(
+                registro_id=registro_id, actividad_id=catalogo[nombre], usuario_id=usuario_id
+            ))
+        if len(enlaces) >= 1000:
+            RegistroActividad.objects.bulk_create(enlaces)
+            enlaces = []
+    RegistroActividad.objects.bulk_create(enlaces)
+
+
+def unir_actividades(apps, schema_editor):
+    RegistroDiario = apps.get_model('seguimiento', 'RegistroDiario')
+    RegistroActividad = apps.get_model('seguimiento', 'RegistroActividad')
+
+    textos = {}
+    for registro_id, nombre in RegistroActividad.objects.order_by('id').values_list('registro_id', 'actividad__nombre'):
+        textos.setdefault(registro_id, []).append(nombre)
+    for registro_id, nombres in textos.items():
+        RegistroDiario.objects.filter(id=registro_id).update(actividades_texto=','.join(nombres)[:255])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seguimiento', '0003_resumendiario'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='registrodiario',
+            old_name='actividades',
+            new_name='actividades_texto',
+        ),
+        migrations.RemoveField(
+            model_name='resumendiario',
+            name='conteo_actividades',
+        ),
+        migrations.CreateModel(
+            name='Actividad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RegistroActividad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('actividad', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='seguimiento.actividad')),
+                ('registro', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enlaces_actividad', to='seguimiento.registrodiario')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['usuario', 'actividad'], name='actividad_usuario_idx')],
+                'constraints': [models.UniqueConstraint(fields=('registro', 'actividad'), name='registro_actividad_unica')],
+            },
+        ),
+        migrations.AddField(
+            model_name='registrodiario',
+            name='actividades',
+            field=models.ManyToManyField(blank=True, related_name='registros', through='seguimiento.RegistroActividad', to='seguimiento.actividad'),
+        ),
+        migrations.RunPython(separar_actividades, unir_actividades),
+        migrations.RemoveField(
+            model_name='registrodiario',
+            name='actividades_texto',
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seguimiento', '0004_actividad_registroactividad'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recordatorio',
+            index=models.Index(fields=['usuario', 'fecha_hora'], name='recordatorio_usuario_fh_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registrodiario',
+            index=models.Index(fields=['usuario', 'fecha', 'hora'], name='registro_usuario_fecha_idx'),
+        ),
+    ]
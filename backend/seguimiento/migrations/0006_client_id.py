@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seguimiento', '0005_indices_listados'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recordatorio',
+            name='client_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='registrodiario',
+            name='client_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='recordatorio',
+            constraint=models.UniqueConstraint(condition=models.Q(('client_id__isnull', False)), fields=('usuario', 'client_id'), name='recordatorio_client_id_unico'),
+        ),
+        migrations.AddConstraint(
+            model_name='registrodiario',
+            constraint=models.UniqueConstraint(condition=models.Q(('client_id__isnull', False)), fields=('usuario', 'client_id'), name='registro_client_id_unico'),
+        ),
+    ]
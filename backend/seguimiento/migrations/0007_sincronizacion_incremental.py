@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seguimiento', '0006_client_id'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recordatorio',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='recordatorio',
+            name='eliminado',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='registrodiario',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='registrodiario',
+            name='eliminado',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='recordatorio',
+            index=models.Index(fields=['usuario', 'actualizado'], name='recordatorio_usuario_act_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registrodiario',
+            index=models.Index(fields=['usuario', 'actualizado'], name='registro_usuario_act_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seguimiento', '0007_sincronizacion_incremental'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recordatorio',
+            name='lote_notificacion',
+            field=models.UUIDField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='recordatorio',
+            name='notificado_en',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='recordatorio',
+            index=models.Index(condition=models.Q(('completado', False), ('notificado_en__isnull', True)), fields=['fecha_hora'], name='recordatorio_pendiente_idx'),
+        ),
+    ]
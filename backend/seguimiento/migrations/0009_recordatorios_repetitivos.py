@@ -0,0 +1,65 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seguimiento', '0008_despacho_recordatorios'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OcurrenciaRecordatorio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('completado', models.BooleanField(default=True)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='recordatorio',
+            name='recordatorio_pendiente_idx',
+        ),
+        migrations.AddField(
+            model_name='recordatorio',
+            name='dias_semana',
+            field=models.CharField(blank=True, help_text="Solo para 'dias'. Ej: 0,2,4 (0 = lunes)", max_length=13),
+        ),
+        migrations.AddField(
+            model_name='recordatorio',
+            name='proximo_aviso',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='recordatorio',
+            name='recurrencia',
+            field=models.CharField(choices=[('ninguna', 'Sin repetición'), ('diaria', 'Diaria'), ('semanal', 'Semanal'), ('dias', 'Días específicos')], default='ninguna', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='recordatorio',
+            name='repetir_hasta',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='recordatorio',
+            index=models.Index(condition=models.Q(('completado', False), ('notificado_en__isnull', True), ('recurrencia', 'ninguna')), fields=['fecha_hora'], name='recordatorio_pendiente_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recordatorio',
+            index=models.Index(condition=models.Q(('proximo_aviso__isnull', False)), fields=['proximo_aviso'], name='recordatorio_proximo_idx'),
+        ),
+        migrations.AddField(
+            model_name='ocurrenciarecordatorio',
+            name='recordatorio',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='excepciones', to='seguimiento.recordatorio'),
+        ),
+        migrations.AddConstraint(
+            model_name='ocurrenciarecordatorio',
+            constraint=models.UniqueConstraint(fields=('recordatorio', 'fecha'), name='ocurrencia_recordatorio_fecha_unica'),
+        ),
+    ]
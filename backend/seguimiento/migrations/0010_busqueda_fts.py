@@ -0,0 +1,61 @@
+from django.db import migrations
+
+# Índice FTS5 de contenido externo sobre las notas del diario. usuario_id
+# también se indexa como término: la búsqueda pide "usuario_id:N AND nota:..."
+# y el motor cruza la lista corta del usuario con la de las palabras, sin
+# recorrer las notas de todos. En motores que no son SQLite no se crea nada
+# y la búsqueda usa el respaldo con icontains (ver core/busqueda.py).
+CREAR = [
+    """
+    CREATE VIRTUAL TABLE registro_fts USING fts5(
+        nota, usuario_id,
+        content='seguimiento_registrodiario', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER registro_fts_ai AFTER INSERT ON seguimiento_registrodiario BEGIN
+        INSERT INTO registro_fts(rowid, nota, usuario_id) VALUES (new.id, new.nota, new.usuario_id);
+    END
+    """,
+    """
+    CREATE TRIGGER registro_fts_ad AFTER DELETE ON seguimiento_registrodiario BEGIN
+        INSERT INTO registro_fts(registro_fts, rowid, nota, usuario_id) VALUES ('delete', old.id, old.nota, old.usuario_id);
+    END
+    """,
+    """
+    CREATE TRIGGER registro_fts_au AFTER UPDATE OF nota, usuario_id ON seguimiento_registrodiario BEGIN
+        INSERT INTO registro_fts(registro_fts, rowid, nota, usuario_id) VALUES ('delete', old.id, old.nota, old.usuario_id);
+        INSERT INTO registro_fts(rowid, nota, usuario_id) VALUES (new.id, new.nota, new.usuario_id);
+    END
+    """,
+    # Las notas que ya existían antes de la migración
+    "INSERT INTO registro_fts(registro_fts) VALUES ('rebuild')",
+]
+
+BORRAR = [
+    "DROP TRIGGER IF EXISTS registro_fts_au",
+    "DROP TRIGGER IF EXISTS registro_fts_ad",
+    "DROP TRIGGER IF EXISTS registro_fts_ai",
+    "DROP TABLE IF EXISTS registro_fts",
+]
+
+
+def solo_sqlite(sentencias):
+    def ejecutar(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in sentencias:
+            schema_editor.execute(sql)
+    return ejecutar
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seguimiento', '0009_recordatorios_repetitivos'),
+    ]
+
+    operations = [
+        migrations.RunPython(solo_sqlite(CREAR), solo_sqlite(BORRAR)),
+    ]
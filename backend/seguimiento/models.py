@@ -1,5 +1,19 @@
+from datetime import datetime, timedelta
+
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.cache import invalidar
+
+# Filas borradas quedan como "lápida" (eliminado=True) para que la
+# sincronización incremental pueda avisar a la app que las quite
+class SincronizableQuerySet(models.QuerySet):
+    def vigentes(self):
+        return self.filter(eliminado=False)
+
 
 # 1. MODELO PARA EL HISTORIAL (LO QUE YA HICISTE)
 class RegistroDiario(models.Model):
@@ -23,12 +37,68 @@ class RegistroDiario(models.Model):
     nivel_energia = models.IntegerField(default=5)
     
     nota = models.TextField(blank=True, null=True)
-    actividades = models.CharField(max_length=255, blank=True)
+    # Antes era un texto "Trabajo,Gym"; ahora es una relación indexada.
+    # El serializer sigue aceptando y devolviendo el texto separado por comas.
+    actividades = models.ManyToManyField(
+        'Actividad', through='RegistroActividad', related_name='registros', blank=True
+    )
+
+    # ID generado por la app cuando crea el registro sin conexión.
+    # Permite repetir una sincronización sin duplicar filas.
+    client_id = models.CharField(max_length=64, blank=True, null=True)
+
+    # Sincronización incremental
+    actualizado = models.DateTimeField(auto_now=True)
+    eliminado = models.BooleanField(default=False)
+
+    objects = SincronizableQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Cubre el listado del historial: WHERE usuario ORDER BY fecha, hora
+            models.Index(fields=['usuario', 'fecha', 'hora'], name='registro_usuario_fecha_idx'),
+            # Cubre "cambios desde": WHERE usuario AND actualizado > token
+            models.Index(fields=['usuario', 'actualizado'], name='registro_usuario_act_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['usuario', 'client_id'], condition=models.Q(client_id__isnull=False),
+                name='registro_client_id_unico',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.usuario.username} - {self.fecha} - {self.emocion}"
 
 
+# 1.1 CATÁLOGO DE ACTIVIDADES (Trabajo, Gym, Leer...)
+class Actividad(models.Model):
+    nombre = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.nombre
+
+
+# 1.2 TABLA INTERMEDIA REGISTRO <-> ACTIVIDAD
+# Guarda también el usuario para que el "top de actividades" sea un
+# GROUP BY sobre el índice (usuario, actividad) sin tocar RegistroDiario.
+class RegistroActividad(models.Model):
+    registro = models.ForeignKey(RegistroDiario, on_delete=models.CASCADE, related_name='enlaces_actividad')
+    actividad = models.ForeignKey(Actividad, on_delete=models.CASCADE)
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['registro', 'actividad'], name='registro_actividad_unica'),
+        ]
+        indexes = [
+            models.Index(fields=['usuario', 'actividad'], name='actividad_usuario_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.registro_id} - {self.actividad_id}"
+
+
 # 2. NUEVO MODELO PARA EL CALENDARIO (LO QUE VAS A HACER)
 class Recordatorio(models.Model):
     TIPOS = [
@@ -53,5 +123,153 @@ class Recordatorio(models.Model):
     # Estado
     completado = models.BooleanField(default=False)
 
+    # Repetición: una sola fila por regla, las ocurrencias se calculan al
+    # pedir un rango (ver recurrencia.py). fecha_hora es la primera ocurrencia.
+    RECURRENCIAS = [
+        ('ninguna', 'Sin repetición'),
+        ('diaria', 'Diaria'),
+        ('semanal', 'Semanal'),
+        ('dias', 'Días específicos'),
+    ]
+    recurrencia = models.CharField(max_length=10, choices=RECURRENCIAS, default='ninguna')
+    dias_semana = models.CharField(max_length=13, blank=True, help_text="Solo para 'dias'. Ej: 0,2,4 (0 = lunes)")
+    repetir_hasta = models.DateField(blank=True, null=True)
+
+    # ID generado por la app sin conexión (ver RegistroDiario.client_id)
+    client_id = models.CharField(max_length=64, blank=True, null=True)
+
+    # Sincronización incremental (ver RegistroDiario)
+    actualizado = models.DateTimeField(auto_now=True)
+    eliminado = models.BooleanField(default=False)
+
+    # Despacho de notificaciones (ver despachador.py)
+    notificado_en = models.DateTimeField(blank=True, null=True)
+    lote_notificacion = models.UUIDField(blank=True, null=True, db_index=True)
+    # Solo reglas repetitivas: cuándo toca el siguiente aviso
+    proximo_aviso = models.DateTimeField(blank=True, null=True)
+
+    objects = SincronizableQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Cubre el calendario: WHERE usuario ORDER BY fecha_hora
+            models.Index(fields=['usuario', 'fecha_hora'], name='recordatorio_usuario_fh_idx'),
+            models.Index(fields=['usuario', 'actualizado'], name='recordatorio_usuario_act_idx'),
+            # Cubre el despachador: índice parcial sobre fecha_hora que solo
+            # contiene los recordatorios sin repetición, no completados y aún sin notificar
+            models.Index(
+                fields=['fecha_hora'],
+                condition=models.Q(completado=False, notificado_en__isnull=True, recurrencia='ninguna'),
+                name='recordatorio_pendiente_idx',
+            ),
+            # Cubre el despachador de reglas repetitivas
+            models.Index(
+                fields=['proximo_aviso'], condition=models.Q(proximo_aviso__isnull=False),
+                name='recordatorio_proximo_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['usuario', 'client_id'], condition=models.Q(client_id__isnull=False),
+                name='recordatorio_client_id_unico',
+            ),
+        ]
+
+    @property
+    def es_recurrente(self):
+        return self.recurrencia != 'ninguna'
+
+    def dias_repeticion(self):
+        if self.recurrencia == 'diaria':
+            return set(range(7))
+        if self.recurrencia == 'semanal':
+            return {timezone.localtime(self.fecha_hora).weekday()}
+        if self.recurrencia == 'dias':
+            return {int(d) for d in self.dias_semana.split(',') if d.strip().isdigit()}
+        return set()
+
+    def ocurrencias(self, desde, hasta):
+        """Genera las fechas/hora de las ocurrencias en [desde, hasta), en orden."""
+        if not self.es_recurrente:
+            if desde <= self.fecha_hora < hasta:
+                yield self.fecha_hora
+            return
+
+        zona = timezone.get_current_timezone()
+        ancla = timezone.localtime(self.fecha_hora, zona)
+        dias = self.dias_repeticion()
+        dia = max(ancla.date(), timezone.localtime(desde, zona).date())
+        ultimo = timezone.localtime(hasta, zona).date()
+        if self.repetir_hasta and self.repetir_hasta < ultimo:
+            ultimo = self.repetir_hasta
+        while dia <= ultimo:
+            if dia.weekday() in dias:
+                momento = timezone.make_aware(datetime.combine(dia, ancla.time()), zona)
+                if desde <= momento < hasta and momento >= self.fecha_hora:
+                    yield momento
+            dia += timedelta(days=1)
+
+    def siguiente_ocurrencia(self, despues_de):
+        # Cualquier regla válida se repite al menos una vez por semana
+        inicio = max(despues_de + timedelta(microseconds=1), self.fecha_hora)
+        return next(self.ocurrencias(inicio, inicio + timedelta(days=8)), None)
+
     def __str__(self):
-        return f"{self.titulo} - {self.fecha_hora.strftime('%d/%m %H:%M')}"
\ No newline at end of file
+        return f"{self.titulo} - {self.fecha_hora.strftime('%d/%m %H:%M')}"
+
+
+# 2.1 EXCEPCIONES POR OCURRENCIA DE UN RECORDATORIO REPETITIVO
+# Solo existe una fila cuando el usuario marca (o desmarca) una ocurrencia.
+class OcurrenciaRecordatorio(models.Model):
+    recordatorio = models.ForeignKey(Recordatorio, on_delete=models.CASCADE, related_name='excepciones')
+    fecha = models.DateField()
+    completado = models.BooleanField(default=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['recordatorio', 'fecha'], name='ocurrencia_recordatorio_fecha_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.recordatorio_id} - {self.fecha}"
+
+# 3. RESUMEN DIARIO (Rollup incremental para el Dashboard)
+# Una fila por usuario y día. Se mantiene al crear/editar/borrar registros,
+# así el dashboard no necesita recorrer todo el historial.
+# (El top de actividades sale de RegistroActividad.)
+class ResumenDiario(models.Model):
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='resumenes')
+    fecha = models.DateField()
+
+    total_registros = models.IntegerField(default=0)
+    suma_intensidad = models.IntegerField(default=0)
+    suma_energia = models.IntegerField(default=0)
+
+    # Conteo por emoción (una columna por cada opción de RegistroDiario.EMOCIONES)
+    conteo_feliz = models.IntegerField(default=0)
+    conteo_contento = models.IntegerField(default=0)
+    conteo_neutral = models.IntegerField(default=0)
+    conteo_triste = models.IntegerField(default=0)
+    conteo_ansioso = models.IntegerField(default=0)
+    conteo_enojado = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['usuario', 'fecha'], name='resumen_usuario_fecha_unico'),
+        ]
+
+    @staticmethod
+    def campo_emocion(emocion):
+        return f"conteo_{emocion}"
+
+    def __str__(self):
+        return f"{self.usuario.username} - {self.fecha} ({self.total_registros} registros)"
+
+
+# --- SEÑALES ---
+# Cualquier cambio en el diario invalida la caché del dashboard de ese usuario.
+# Las cargas masivas (bulk_create) no disparan señales: invalidan en resumenes.py
+@receiver(post_save, sender=RegistroDiario)
+@receiver(post_delete, sender=RegistroDiario)
+def invalidar_stats_usuario(sender, instance, **kwargs):
+    invalidar('stats', instance.usuario_id)
@@ -0,0 +1,53 @@
+import abc
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+# ==========================================
+# BACKENDS DE NOTIFICACIÓN
+# ==========================================
+# Se elige con settings.NOTIFICACIONES_BACKEND (ruta a la clase). Para push
+# real basta con otra clase que implemente enviar(recordatorios).
+
+class BackendNotificaciones(abc.ABC):
+    @abc.abstractmethod
+    def enviar(self, recordatorios):
+        """Recibe una lista de Recordatorio (con usuario cargado). Si falla, debe lanzar excepción."""
+
+
+class LogBackend(BackendNotificaciones):
+    def enviar(self, recordatorios):
+        for r in recordatorios:
+            logger.info("[RECORDATORIO] %s -> %s (%s)", r.usuario.username, r.titulo, r.fecha_hora.isoformat())
+
+
+class ArchivoBackend(BackendNotificaciones):
+    # Una línea JSON por notificación; sirve de reemplazo local para pruebas
+    _lock = threading.Lock()
+
+    def __init__(self, ruta=None):
+        self.ruta = ruta or settings.NOTIFICACIONES_ARCHIVO
+
+    def enviar(self, recordatorios):
+        lineas = [
+            json.dumps({
+                'recordatorio': r.id,
+                'usuario': r.usuario_id,
+                'titulo': r.titulo,
+                'tipo': r.tipo,
+                'fecha_hora': r.fecha_hora.isoformat(),
+            }, ensure_ascii=False)
+            for r in recordatorios
+        ]
+        with self._lock, open(self.ruta, 'a', encoding='utf-8') as archivo:
+            archivo.write(''.join(linea + '\n' for linea in lineas))
+
+
+def obtener_backend():
+    return import_string(settings.NOTIFICACIONES_BACKEND)()
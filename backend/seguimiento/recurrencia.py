@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta
+
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Recordatorio, OcurrenciaRecordatorio
+
+MAX_DIAS_RANGO = 100
+
+
+class RangoInvalido(Exception):
+    pass
+
+
+def filtro_rango(desde=None, hasta=None):
+    """
+    Recordatorios que pueden tener ocurrencias en [desde, hasta): los únicos
+    por rango sobre (usuario, fecha_hora) y las reglas que empezaron antes
+    de 'hasta' y siguen vigentes en 'desde'. Cualquiera de los dos extremos
+    puede quedar abierto (None).
+    """
+    unicos = Q(recurrencia='ninguna')
+    reglas = ~Q(recurrencia='ninguna')
+    if desde is not None:
+        unicos &= Q(fecha_hora__gte=desde)
+        reglas &= Q(repetir_hasta__isnull=True) | Q(repetir_hasta__gte=timezone.localtime(desde).date())
+    if hasta is not None:
+        # Ambos casos comparten el tope: fuera del OR el motor lo usa como rango del índice
+        return Q(fecha_hora__lt=hasta) & (unicos | reglas)
+    return unicos | reglas
+
+
+def _marcas(reglas, desde, hasta):
+    # {(recordatorio_id, fecha): completado} de las reglas, en una consulta
+    if not reglas:
+        return {}
+    return {
+        (recordatorio_id, fecha): completado
+        for recordatorio_id, fecha, completado in OcurrenciaRecordatorio.objects.filter(
+            recordatorio__in=reglas,
+            fecha__gte=timezone.localtime(desde).date(),
+            fecha__lte=timezone.localtime(hasta).date(),
+        ).values_list('recordatorio_id', 'fecha', 'completado')
+    }
+
+
+def ocurrencias_en_rango(usuario, desde, hasta):
+    """
+    Expande los recordatorios del usuario en [desde, hasta) sin guardar una
+    fila por ocurrencia: los únicos salen del índice (usuario, fecha_hora) y
+    las reglas repetitivas se generan en memoria. Las marcas de completado
+    de cada ocurrencia se leen en una sola consulta.
+    """
+    if desde >= hasta:
+        raise RangoInvalido("'desde' debe ser anterior a 'hasta'.")
+    if hasta - desde > timedelta(days=MAX_DIAS_RANGO):
+        raise RangoInvalido(f"El rango no puede superar {MAX_DIAS_RANGO} días.")
+
+    recordatorios = list(Recordatorio.objects.filter(usuario=usuario).vigentes().filter(filtro_rango(desde, hasta)))
+    marcas = _marcas([r for r in recordatorios if r.es_recurrente], desde, hasta)
+
+    resultado = []
+    for recordatorio in recordatorios:
+        for momento in recordatorio.ocurrencias(desde, hasta):
+            if recordatorio.es_recurrente:
+                completado = marcas.get((recordatorio.id, timezone.localtime(momento).date()), False)
+            else:
+                completado = recordatorio.completado
+            resultado.append({
+                'recordatorio': recordatorio.id,
+                'titulo': recordatorio.titulo,
+                'tipo': recordatorio.tipo,
+                'duracion': recordatorio.duracion,
+                'fecha_hora': momento,
+                'completado': completado,
+                'recurrente': recordatorio.es_recurrente,
+            })
+
+    resultado.sort(key=lambda o: (o['fecha_hora'], o['recordatorio']))
+    return resultado
+
+
+def ocurrencias_completadas(recordatorios):
+    # {(recordatorio_id, fecha)} de las ocurrencias ya marcadas como hechas
+    return set(
+        OcurrenciaRecordatorio.objects.filter(
+            recordatorio__in=[r for r, _ in recordatorios],
+            fecha__in={timezone.localtime(m).date() for _, m in recordatorios},
+            completado=True,
+        ).values_list('recordatorio_id', 'fecha')
+    )
+
+
+def resumen_mes(usuario, anio, mes):
+    """
+    Conteo por día del mes para la grilla del calendario. Los únicos se
+    agrupan en SQL (GROUP BY día con COUNT filtrado); las reglas repetitivas,
+    que son pocas filas, se expanden en memoria y se suman al resultado.
+    Solo aparecen los días con algo agendado.
+    """
+    desde = timezone.make_aware(datetime(anio, mes, 1))
+    hasta = timezone.make_aware(datetime(anio + mes // 12, mes % 12 + 1, 1))
+    vigentes = Recordatorio.objects.filter(usuario=usuario).vigentes()
+
+    dias = {}
+    filas = (
+        vigentes.filter(recurrencia='ninguna', fecha_hora__gte=desde, fecha_hora__lt=hasta)
+        .annotate(dia=TruncDate('fecha_hora'))
+        .values('dia')
+        .annotate(total=Count('id'), completados=Count('id', filter=Q(completado=True)))
+        .order_by()
+    )
+    for fila in filas:
+        dias[fila['dia']] = [fila['total'], fila['completados']]
+
+    reglas = list(vigentes.exclude(recurrencia='ninguna').filter(filtro_rango(desde, hasta)))
+    marcas = _marcas(reglas, desde, hasta)
+    for regla in reglas:
+        for momento in regla.ocurrencias(desde, hasta):
+            dia = timezone.localtime(momento).date()
+            conteo = dias.setdefault(dia, [0, 0])
+            conteo[0] += 1
+            conteo[1] += marcas.get((regla.id, dia), False)
+
+    return {
+        'mes': f"{anio:04d}-{mes:02d}",
+        'dias': {
+            dia.isoformat(): {'total': total, 'completados': completados, 'ratio': round(completados / total, 2)}
+            for dia, (total, completados) in sorted(dias.items())
+        },
+    }
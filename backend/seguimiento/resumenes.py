@@ -0,0 +1,88 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from core.cache import invalidar
+from .models import RegistroDiario, ResumenDiario
+
+
+def _acumular(deltas, usuario_id, fecha, emocion, intensidad, energia, signo):
+    delta = deltas[(usuario_id, fecha)]
+    delta['total_registros'] += signo
+    delta['suma_intensidad'] += signo * (intensidad or 0)
+    delta['suma_energia'] += signo * (energia or 0)
+    delta[ResumenDiario.campo_emocion(emocion)] += signo
+
+
+def aplicar_registros(registros, signo=1):
+    """
+    Suma (signo=1) o resta (signo=-1) una lista de registros en ResumenDiario.
+    Agrupa por (usuario, día) para tocar cada fila del resumen una sola vez,
+    así sirve igual para un registro suelto que para una carga masiva.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for r in registros:
+        _acumular(
+            deltas, r.usuario_id, r.fecha, r.emocion,
+            r.nivel_intensidad, r.nivel_energia, signo,
+        )
+
+    with transaction.atomic():
+        for (usuario_id, fecha), delta in deltas.items():
+            resumen, _ = ResumenDiario.objects.select_for_update().get_or_create(
+                usuario_id=usuario_id, fecha=fecha
+            )
+            for campo, valor in delta.items():
+                setattr(resumen, campo, getattr(resumen, campo) + valor)
+
+            if resumen.total_registros <= 0:
+                resumen.delete()
+            else:
+                resumen.save(update_fields=list(delta.keys()))
+
+        for usuario_id in {usuario_id for usuario_id, _ in deltas}:
+            invalidar('stats', usuario_id)
+
+
+def reconstruir_resumenes(usuario_ids=None, tamano_lote=1000):
+    """
+    Borra y recalcula los resúmenes desde RegistroDiario (todos o solo los
+    usuarios indicados) con un único GROUP BY (usuario, fecha) en la base de
+    datos, escribiendo el resultado en lotes con bulk_create.
+    """
+    registros = RegistroDiario.objects.vigentes()
+    resumenes = ResumenDiario.objects.all()
+    if usuario_ids is not None:
+        registros = registros.filter(usuario_id__in=usuario_ids)
+        resumenes = resumenes.filter(usuario_id__in=usuario_ids)
+
+    filas = registros.order_by().values('usuario_id', 'fecha').annotate(
+        total_registros=Count('id'),
+        suma_intensidad=Sum('nivel_intensidad'),
+        suma_energia=Sum('nivel_energia'),
+        **{
+            ResumenDiario.campo_emocion(emocion): Count('id', filter=Q(emocion=emocion))
+            for emocion, _ in RegistroDiario.EMOCIONES
+        }
+    )
+
+    creados = 0
+    with transaction.atomic():
+        resumenes.delete()
+        pendientes = []
+        usuarios = set()
+        for fila in filas.iterator(chunk_size=2000):
+            usuarios.add(fila['usuario_id'])
+            pendientes.append(ResumenDiario(**fila))
+            if len(pendientes) >= tamano_lote:
+                ResumenDiario.objects.bulk_create(pendientes)
+                creados += len(pendientes)
+                pendientes = []
+        ResumenDiario.objects.bulk_create(pendientes)
+        creados += len(pendientes)
+
+        for usuario_id in usuarios.union(usuario_ids or []):
+            invalidar('stats', usuario_id)
+
+    return creados
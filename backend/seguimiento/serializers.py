@@ -1,16 +1,80 @@
+from django.utils import timezone
 from rest_framework import serializers
 from .models import RegistroDiario, Recordatorio # <--- Importamos Recordatorio
+from .actividades import parsear_actividades, asignar_actividades
+
+
+# Mantiene el formato de texto "Trabajo,Gym" que usa la app móvil,
+# aunque por dentro las actividades vivan en RegistroActividad
+class ActividadesField(serializers.Field):
+    def to_internal_value(self, data):
+        if data is None:
+            return []
+        if not isinstance(data, str):
+            raise serializers.ValidationError("Debe ser un texto separado por comas.")
+        return parsear_actividades(data)
+
+    def to_representation(self, value):
+        return ','.join(enlace.actividad.nombre for enlace in value.all())
+
 
 class RegistroDiarioSerializer(serializers.ModelSerializer):
+    actividades = ActividadesField(source='enlaces_actividad', required=False)
+
     class Meta:
         model = RegistroDiario
         fields = '__all__'
-        read_only_fields = ['usuario', 'fecha', 'hora']
+        read_only_fields = ['usuario', 'fecha', 'hora', 'client_id', 'eliminado']
+
+    def create(self, validated_data):
+        nombres = validated_data.pop('enlaces_actividad', [])
+        registro = super().create(validated_data)
+        asignar_actividades([(registro, nombres)])
+        return registro
+
+    def update(self, instance, validated_data):
+        nombres = validated_data.pop('enlaces_actividad', None)
+        registro = super().update(instance, validated_data)
+        if nombres is not None:
+            asignar_actividades([(registro, nombres)], reemplazar=True)
+        return registro
 
 # ✅ NUEVO SERIALIZER PARA CALENDARIO
 class RecordatorioSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recordatorio
-        fields = '__all__'
+        exclude = ['lote_notificacion']
         # 'usuario' se asigna automático, el resto se puede enviar desde el front
-        read_only_fields = ['usuario']
\ No newline at end of file
+        read_only_fields = ['usuario', 'client_id', 'eliminado', 'notificado_en', 'proximo_aviso']
+
+    def validate(self, attrs):
+        campos = ('fecha_hora', 'recurrencia', 'dias_semana', 'repetir_hasta')
+        if self.instance is not None and not any(c in attrs for c in campos):
+            return attrs
+
+        # Para PATCH combinamos lo nuevo con lo que ya tenía la regla
+        regla = Recordatorio(**{
+            c: attrs.get(c, getattr(self.instance, c) if self.instance else Recordatorio._meta.get_field(c).get_default())
+            for c in campos
+        })
+
+        if regla.recurrencia == 'dias':
+            dias = sorted({d.strip() for d in regla.dias_semana.split(',') if d.strip()})
+            if not dias or any(d not in '0123456' or len(d) != 1 for d in dias):
+                raise serializers.ValidationError({'dias_semana': "Indica días entre 0 (lunes) y 6 (domingo), ej: 0,2,4."})
+            attrs['dias_semana'] = regla.dias_semana = ','.join(dias)
+        if regla.repetir_hasta and regla.fecha_hora and regla.repetir_hasta < timezone.localtime(regla.fecha_hora).date():
+            raise serializers.ValidationError({'repetir_hasta': "No puede ser anterior a la primera ocurrencia."})
+
+        # El despachador usa proximo_aviso para las reglas repetitivas
+        if regla.es_recurrente:
+            attrs['proximo_aviso'] = regla.siguiente_ocurrencia(timezone.now())
+        else:
+            attrs['proximo_aviso'] = None
+        return attrs
+
+
+class OcurrenciaSerializer(serializers.Serializer):
+    # Marca de una ocurrencia de una regla repetitiva: 'false' o '0' desmarcan
+    fecha = serializers.DateField(input_formats=['%Y-%m-%d'])
+    completado = serializers.BooleanField(default=True)
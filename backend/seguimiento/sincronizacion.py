@@ -0,0 +1,176 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.paginacion import filtro_despues_de
+from .models import RegistroDiario, Recordatorio
+from .serializers import RegistroDiarioSerializer, RecordatorioSerializer
+from .actividades import asignar_actividades, con_actividades
+from .resumenes import aplicar_registros
+
+MAX_ELEMENTOS = 500
+INTENTOS_SINCRONIZACION = 3
+LIMITE_CAMBIOS = 200
+
+# Solo se entregan cambios con al menos esta antigüedad: una transacción que
+# confirme tarde con un "actualizado" anterior no queda detrás del token
+MARGEN_CONFIRMACION = timedelta(seconds=2)
+
+
+class SincronizacionInvalida(Exception):
+    pass
+
+
+class SincronizacionEnConflicto(SincronizacionInvalida):
+    # Otras sincronizaciones con los mismos client_id siguen ganando la carrera:
+    # la petición es válida y basta con reintentarla (409)
+    pass
+
+
+def _preparar(usuario, modelo, serializer_class, elementos):
+    """
+    Separa los elementos en: ya existentes (mismo client_id), inválidos y
+    nuevos. Devuelve (resultados, nuevos) donde nuevos = [(client_id, datos)].
+    """
+    resultados = {}
+    pendientes = {}
+    for elemento in elementos:
+        client_id = elemento.get('client_id') if isinstance(elemento, dict) else None
+        if not client_id or not isinstance(client_id, str) or len(client_id) > 64:
+            raise SincronizacionInvalida("Cada elemento necesita un client_id (texto, máx. 64).")
+        # Si la app manda dos veces el mismo client_id, vale el primero
+        pendientes.setdefault(client_id, elemento)
+
+    existentes = dict(
+        modelo.objects.filter(usuario=usuario, client_id__in=list(pendientes))
+        .values_list('client_id', 'id')
+    )
+
+    nuevos = []
+    for client_id, elemento in pendientes.items():
+        if client_id in existentes:
+            resultados[client_id] = {'estado': 'existente', 'id': existentes[client_id]}
+            continue
+        serializer = serializer_class(data=elemento)
+        if serializer.is_valid():
+            nuevos.append((client_id, serializer.validated_data))
+        else:
+            resultados[client_id] = {'estado': 'error', 'errores': serializer.errors}
+    return resultados, nuevos
+
+
+def _insertar(usuario, diario, recordatorios):
+    resultados_diario, nuevos_diario = _preparar(usuario, RegistroDiario, RegistroDiarioSerializer, diario)
+    resultados_rec, nuevos_rec = _preparar(usuario, Recordatorio, RecordatorioSerializer, recordatorios)
+
+    with transaction.atomic():
+        actividades = []
+        registros = []
+        for client_id, datos in nuevos_diario:
+            datos = dict(datos)
+            actividades.append(datos.pop('enlaces_actividad', []))
+            registros.append(RegistroDiario(usuario=usuario, client_id=client_id, **datos))
+        RegistroDiario.objects.bulk_create(registros)
+        asignar_actividades(zip(registros, actividades))
+        aplicar_registros(registros, signo=1)
+
+        creados = Recordatorio.objects.bulk_create([
+            Recordatorio(usuario=usuario, client_id=client_id, **datos)
+            for client_id, datos in nuevos_rec
+        ])
+
+    for registro in registros:
+        resultados_diario[registro.client_id] = {'estado': 'creado', 'id': registro.id}
+    for recordatorio in creados:
+        resultados_rec[recordatorio.client_id] = {'estado': 'creado', 'id': recordatorio.id}
+    return {'diario': resultados_diario, 'recordatorios': resultados_rec}
+
+
+def sincronizar(usuario, diario, recordatorios):
+    """
+    Inserta en una sola transacción los registros y recordatorios creados sin
+    conexión. Es idempotente por client_id: lo que ya existe se devuelve como
+    'existente' con su id, sin volver a insertarlo.
+    """
+    if not isinstance(diario, list) or not isinstance(recordatorios, list):
+        raise SincronizacionInvalida("'diario' y 'recordatorios' deben ser listas.")
+    if len(diario) + len(recordatorios) > MAX_ELEMENTOS:
+        raise SincronizacionInvalida(f"Máximo {MAX_ELEMENTOS} elementos por sincronización.")
+    for _ in range(INTENTOS_SINCRONIZACION):
+        try:
+            return _insertar(usuario, diario, recordatorios)
+        except IntegrityError:
+            # Otra sincronización con los mismos client_id ganó la carrera:
+            # al repetir, esos elementos ya aparecen como existentes
+            continue
+    raise SincronizacionEnConflicto("Otra sincronización con los mismos elementos está en curso; reintenta.")
+
+
+# ==========================================
+# CAMBIOS DESDE UN TOKEN
+# ==========================================
+
+_FUENTES = {
+    'diario': (RegistroDiario, RegistroDiarioSerializer),
+    'recordatorios': (Recordatorio, RecordatorioSerializer),
+}
+
+
+def _leer_token(token):
+    if not token:
+        return {}
+    try:
+        datos = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+        posiciones = {}
+        for nombre, (fecha, pk) in datos.items():
+            if nombre not in _FUENTES or parse_datetime(fecha) is None:
+                raise ValueError
+            posiciones[nombre] = (parse_datetime(fecha), int(pk))
+        return posiciones
+    except Exception:
+        raise SincronizacionInvalida("Token de sincronización inválido.")
+
+
+def _crear_token(posiciones):
+    datos = {nombre: [fecha.isoformat(), pk] for nombre, (fecha, pk) in posiciones.items()}
+    return base64.urlsafe_b64encode(json.dumps(datos).encode()).decode()
+
+
+def cambios_desde(usuario, token=None, limite=LIMITE_CAMBIOS):
+    """
+    Devuelve lo que cambió después del token, recorriendo el índice
+    (usuario, actualizado) en orden (actualizado, id). Los borrados llegan
+    solo como ids en "eliminados".
+    """
+    posiciones = _leer_token(token)
+    hasta = timezone.now() - MARGEN_CONFIRMACION
+    resultado = {'hay_mas': False}
+
+    for nombre, (modelo, serializer_class) in _FUENTES.items():
+        filas = modelo.objects.filter(usuario=usuario, actualizado__lte=hasta)
+        if nombre in posiciones:
+            filas = filas.filter(filtro_despues_de(('actualizado', 'id'), posiciones[nombre]))
+        else:
+            # Primera descarga: las lápidas no le sirven a la app
+            filas = filas.vigentes()
+        if modelo is RegistroDiario:
+            filas = con_actividades(filas)
+
+        filas = list(filas.order_by('actualizado', 'id')[:limite + 1])
+        if len(filas) > limite:
+            resultado['hay_mas'] = True
+            filas = filas[:limite]
+        if filas:
+            posiciones[nombre] = (filas[-1].actualizado, filas[-1].id)
+
+        resultado[nombre] = {
+            'cambios': serializer_class([f for f in filas if not f.eliminado], many=True).data,
+            'eliminados': [f.id for f in filas if f.eliminado],
+        }
+
+    resultado['token'] = _crear_token(posiciones)
+    return resultado
@@ -0,0 +1,135 @@
+from datetime import date, timedelta
+
+from django.db.models import Sum
+from django.db.models.functions import TruncDay, TruncWeek, TruncMonth
+from django.utils import timezone
+
+from .models import RegistroDiario, ResumenDiario
+
+# granularidad -> (función de truncado, cantidad de periodos por defecto)
+GRANULARIDADES = {
+    'dia': (TruncDay, 30),
+    'semana': (TruncWeek, 12),
+    'mes': (TruncMonth, 12),
+}
+MAX_PERIODOS = 400
+
+
+class ParametrosInvalidos(Exception):
+    pass
+
+
+def _inicio_periodo(fecha, granularidad):
+    if granularidad == 'semana':
+        return fecha - timedelta(days=fecha.weekday())
+    if granularidad == 'mes':
+        return fecha.replace(day=1)
+    return fecha
+
+
+def _siguiente_periodo(fecha, granularidad):
+    if granularidad == 'semana':
+        return fecha + timedelta(days=7)
+    if granularidad == 'mes':
+        return date(fecha.year + fecha.month // 12, fecha.month % 12 + 1, 1)
+    return fecha + timedelta(days=1)
+
+
+def _periodos(desde, hasta, granularidad):
+    actual = _inicio_periodo(desde, granularidad)
+    periodos = []
+    while actual <= hasta:
+        periodos.append(actual)
+        if len(periodos) > MAX_PERIODOS:
+            raise ParametrosInvalidos(f"El rango no puede superar {MAX_PERIODOS} periodos.")
+        actual = _siguiente_periodo(actual, granularidad)
+    return periodos
+
+
+def rango_por_defecto(granularidad, hasta=None):
+    if granularidad not in GRANULARIDADES:
+        raise ParametrosInvalidos("granularidad debe ser dia, semana o mes.")
+    hasta = hasta or timezone.localdate()
+    desde = hasta
+    for _ in range(GRANULARIDADES[granularidad][1] - 1):
+        desde = _inicio_periodo(desde, granularidad) - timedelta(days=1)
+    return _inicio_periodo(desde, granularidad), hasta
+
+
+def _promedio_movil(sumas, totales, ventana):
+    # Promedio ponderado de las últimas "ventana" posiciones con sumas
+    # prefijas: O(n) sin importar el tamaño de la ventana
+    acumulado_suma, acumulado_total = [0], [0]
+    for suma, total in zip(sumas, totales):
+        acumulado_suma.append(acumulado_suma[-1] + suma)
+        acumulado_total.append(acumulado_total[-1] + total)
+
+    resultado = []
+    for i in range(1, len(acumulado_suma)):
+        j = max(0, i - ventana)
+        total = acumulado_total[i] - acumulado_total[j]
+        suma = acumulado_suma[i] - acumulado_suma[j]
+        resultado.append(round(suma / total, 2) if total else None)
+    return resultado
+
+
+def calcular_tendencias(usuario, granularidad, desde, hasta, ventana=3):
+    """
+    Agrupa ResumenDiario por día/semana/mes en SQL (TruncDay/Week/Month +
+    Sum), rellena los periodos sin datos y agrega el promedio móvil.
+    El costo depende de los días del rango, no de cuántos registros haya.
+    """
+    if granularidad not in GRANULARIDADES:
+        raise ParametrosInvalidos("granularidad debe ser dia, semana o mes.")
+    if desde > hasta:
+        raise ParametrosInvalidos("'desde' no puede ser posterior a 'hasta'.")
+    if ventana < 1:
+        raise ParametrosInvalidos("'ventana' debe ser al menos 1.")
+
+    periodos = _periodos(desde, hasta, granularidad)
+    truncar = GRANULARIDADES[granularidad][0]
+    campos_emocion = {e: ResumenDiario.campo_emocion(e) for e, _ in RegistroDiario.EMOCIONES}
+
+    filas = (
+        ResumenDiario.objects
+        .filter(usuario=usuario, fecha__gte=periodos[0], fecha__lte=hasta)
+        .annotate(periodo=truncar('fecha'))
+        .values('periodo')
+        .annotate(
+            total=Sum('total_registros'),
+            intensidad=Sum('suma_intensidad'),
+            energia=Sum('suma_energia'),
+            **{campo: Sum(campo) for campo in campos_emocion.values()}
+        )
+        .order_by('periodo')
+    )
+    por_periodo = {fila['periodo']: fila for fila in filas}
+
+    vacio = {'total': 0, 'intensidad': 0, 'energia': 0, **{c: 0 for c in campos_emocion.values()}}
+    columnas = [por_periodo.get(p, vacio) for p in periodos]
+    totales = [c['total'] for c in columnas]
+    intensidades = [c['intensidad'] for c in columnas]
+    energias = [c['energia'] for c in columnas]
+    movil_intensidad = _promedio_movil(intensidades, totales, ventana)
+    movil_energia = _promedio_movil(energias, totales, ventana)
+
+    resultado = []
+    for i, periodo in enumerate(periodos):
+        total = totales[i]
+        resultado.append({
+            "inicio": periodo.isoformat(),
+            "registros": total,
+            "intensidad_promedio": round(intensidades[i] / total, 2) if total else None,
+            "energia_promedio": round(energias[i] / total, 2) if total else None,
+            "intensidad_movil": movil_intensidad[i],
+            "energia_movil": movil_energia[i],
+            "emociones": {e: columnas[i][c] for e, c in campos_emocion.items()},
+        })
+
+    return {
+        "granularidad": granularidad,
+        "desde": periodos[0].isoformat(),
+        "hasta": hasta.isoformat(),
+        "ventana": ventana,
+        "periodos": resultado,
+    }
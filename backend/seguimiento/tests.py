@@ -1,3 +1,606 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import uuid
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.utils import timezone
+
+from core.cache import metricas_cache, reiniciar_metricas
+
+from .models import RegistroDiario, ResumenDiario, RegistroActividad, Recordatorio, OcurrenciaRecordatorio
+from .resumenes import reconstruir_resumenes
+from .despachador import despachar, reclamar_lote
+from .sincronizacion import _insertar
+from .notificaciones import ArchivoBackend
+
+
+class PruebasResumenDiario(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='diario_qa', password='Password123')
+        self.client.force_authenticate(user=self.user)
+        self.url = '/api/seguimiento/diario/'
+
+    def crear(self, **datos):
+        base = {'emocion': 'feliz', 'nivel_intensidad': 8, 'nivel_energia': 6, 'actividades': 'Trabajo, Gym'}
+        base.update(datos)
+        response = self.client.post(self.url, base, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+
+    def test_resumen_sigue_altas_ediciones_y_bajas(self):
+        """
+        Valida que crear, editar y borrar registros mantiene el ResumenDiario
+        igual a lo que daría recalcularlo desde cero.
+        """
+        primero = self.crear()
+        segundo = self.crear(emocion='triste', nivel_intensidad=3, actividades='Gym')
+
+        resumen = ResumenDiario.objects.get(usuario=self.user)
+        self.assertEqual(resumen.total_registros, 2)
+        self.assertEqual(resumen.suma_intensidad, 11)
+        self.assertEqual(resumen.conteo_triste, 1)
+
+        self.client.patch(f"{self.url}{segundo}/", {'emocion': 'ansioso'}, format='json')
+        resumen.refresh_from_db()
+        self.assertEqual(resumen.conteo_triste, 0)
+        self.assertEqual(resumen.conteo_ansioso, 1)
+
+        self.client.delete(f"{self.url}{primero}/")
+        self.client.delete(f"{self.url}{segundo}/")
+        self.assertFalse(ResumenDiario.objects.filter(usuario=self.user).exists())
+
+    def test_stats_lee_del_resumen(self):
+        """
+        Valida que el dashboard devuelve los totales correctos y que la
+        reconstrucción produce el mismo resultado.
+        """
+        self.crear()
+        self.crear(emocion='feliz', nivel_intensidad=6, actividades='Gym')
+        self.crear(emocion='neutral', nivel_intensidad=4, actividades='')
+
+        data = self.client.get('/api/seguimiento/stats/').data
+        self.assertEqual(data['total_dias'], 3)
+        self.assertEqual(data['promedio_general'], 6.0)
+        self.assertEqual(data['bar_data'][0], {'value': 2, 'label': 'Gym', 'frontColor': '#8b5cf6'})
+        self.assertEqual([p['count'] for p in data['pie_chart']], [2, 1])
+
+        ResumenDiario.objects.all().delete()
+        reconstruir_resumenes()
+        self.assertEqual(self.client.get('/api/seguimiento/stats/').data, data)
+        self.assertEqual(RegistroDiario.objects.count(), 3)
+
+
+class PruebasActividades(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='actividades_qa', password='Password123')
+        self.client.force_authenticate(user=self.user)
+        self.url = '/api/seguimiento/diario/'
+
+    def test_actividades_mantienen_formato_de_texto(self):
+        """
+        Valida que la API sigue aceptando y devolviendo "Trabajo,Gym"
+        aunque se guarde en la tabla intermedia.
+        """
+        response = self.client.post(self.url, {'emocion': 'feliz', 'actividades': 'Trabajo, Gym,,Trabajo'}, format='json')
+        self.assertEqual(response.data['actividades'], 'Trabajo,Gym')
+        self.assertEqual(RegistroActividad.objects.filter(usuario=self.user).count(), 2)
+
+        registro_id = response.data['id']
+        response = self.client.patch(f"{self.url}{registro_id}/", {'actividades': 'Leer'}, format='json')
+        self.assertEqual(response.data['actividades'], 'Leer')
+
+        response = self.client.patch(f"{self.url}{registro_id}/", {'nota': 'Sin cambios'}, format='json')
+        self.assertEqual(response.data['actividades'], 'Leer')
+        self.assertEqual(self.client.get(self.url).data['results'][0]['actividades'], 'Leer')
+
+    def test_top_actividades_en_una_consulta(self):
+        """
+        Valida que el top de actividades del dashboard sale de un GROUP BY.
+        """
+        for texto in ['Gym', 'Gym,Leer', 'Trabajo,Gym', 'Leer']:
+            self.client.post(self.url, {'emocion': 'neutral', 'actividades': texto}, format='json')
+
+        data = self.client.get('/api/seguimiento/stats/').data
+        self.assertEqual([(b['label'], b['value']) for b in data['bar_data']], [('Gym', 3), ('Leer', 2), ('Trab', 1)])
+
+
+class PruebasCacheStats(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        reiniciar_metricas()
+        self.user = User.objects.create_user(username='cache_qa', password='Password123')
+        self.client.force_authenticate(user=self.user)
+
+    def test_escritura_invalida_la_cache(self):
+        """
+        Valida que la segunda lectura es un acierto y que crear o borrar
+        un registro obliga a recalcular.
+        """
+        url = '/api/seguimiento/stats/'
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            registro = self.client.post('/api/seguimiento/diario/', {'emocion': 'feliz'}, format='json').data
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['total_dias'], 1)
+
+        self.client.delete(f"/api/seguimiento/diario/{registro['id']}/")
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['total_dias'], 0)
+
+        self.assertEqual(metricas_cache()['stats'], {'aciertos': 1, 'fallos': 3, 'tasa_aciertos': 0.25})
+
+
+class PruebasPaginacion(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='paginas_qa', password='Password123')
+        self.client.force_authenticate(user=self.user)
+
+    def recorrer(self, url):
+        ids, paginas = [], 0
+        while url:
+            data = self.client.get(url).data
+            ids.extend(item['id'] for item in data['results'])
+            url, paginas = data['next'], paginas + 1
+        return ids, paginas
+
+    def test_diario_se_recorre_por_cursor(self):
+        """
+        Valida que las páginas del diario salen en orden, sin repetidos
+        ni huecos, aunque varios registros compartan la misma fecha.
+        """
+        for _ in range(5):
+            self.client.post('/api/seguimiento/diario/', {'emocion': 'neutral'}, format='json')
+
+        ids, paginas = self.recorrer('/api/seguimiento/diario/?page_size=2')
+        esperado = list(RegistroDiario.objects.order_by('-fecha', '-hora', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, esperado)
+        self.assertEqual(paginas, 3)
+
+    def test_diario_por_rango_de_fechas(self):
+        """
+        Valida que ?desde/?hasta acotan el diario a [desde, hasta) y que
+        una fecha inválida da 400.
+        """
+        for fecha in ('2026-02-28', '2026-03-01', '2026-03-31', '2026-04-01'):
+            # fecha es auto_now_add: se fija después de crear
+            registro = RegistroDiario.objects.create(usuario=self.user, emocion='neutral')
+            RegistroDiario.objects.filter(pk=registro.pk).update(fecha=fecha)
+
+        data = self.client.get('/api/seguimiento/diario/?desde=2026-03-01&hasta=2026-04-01').data
+        self.assertEqual([r['fecha'] for r in data['results']], ['2026-03-31', '2026-03-01'])
+        self.assertEqual(self.client.get('/api/seguimiento/diario/?desde=marzo').status_code, 400)
+
+    def test_recordatorios_con_misma_hora(self):
+        """
+        Valida el desempate por id cuando dos recordatorios tienen la misma
+        fecha_hora, y que cada página hace la misma cantidad de consultas.
+        """
+        for i in range(4):
+            self.client.post('/api/seguimiento/recordatorios/', {
+                'titulo': f'R{i}', 'fecha_hora': '2026-05-01T09:00:00Z' if i < 3 else '2026-04-01T09:00:00Z',
+            }, format='json')
+
+        primera = self.client.get('/api/seguimiento/recordatorios/?page_size=2').data
+        self.assertEqual([r['titulo'] for r in primera['results']], ['R3', 'R0'])
+        with self.assertNumQueries(1):
+            segunda = self.client.get(primera['next']).data
+        self.assertEqual([r['titulo'] for r in segunda['results']], ['R1', 'R2'])
+        self.assertIsNone(segunda['next'])
+
+        self.assertEqual(self.client.get('/api/seguimiento/recordatorios/?cursor=roto').status_code, 404)
+
+
+class PruebasSincronizacion(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='sync_qa', password='Password123')
+        self.client.force_authenticate(user=self.user)
+        self.payload = {
+            'diario': [
+                {'client_id': 'd-1', 'emocion': 'feliz', 'nivel_intensidad': 9, 'actividades': 'Gym'},
+                {'client_id': 'd-2', 'emocion': 'triste', 'nivel_intensidad': 2},
+                {'client_id': 'd-3', 'emocion': 'no-existe'},
+            ],
+            'recordatorios': [
+                {'client_id': 'r-1', 'titulo': 'Meditar', 'fecha_hora': '2026-05-01T08:00:00Z'},
+            ],
+        }
+
+    def test_repetir_sincronizacion_no_duplica(self):
+        """
+        Valida que la sincronización inserta en lote, reporta errores por
+        elemento y que repetirla devuelve los mismos ids sin duplicar filas.
+        """
+        primera = self.client.post('/api/seguimiento/sync/', self.payload, format='json')
+        self.assertEqual(primera.status_code, status.HTTP_200_OK)
+        self.assertEqual(primera.data['diario']['d-1']['estado'], 'creado')
+        self.assertEqual(primera.data['diario']['d-3']['estado'], 'error')
+        self.assertIn('emocion', primera.data['diario']['d-3']['errores'])
+        self.assertEqual(primera.data['recordatorios']['r-1']['estado'], 'creado')
+
+        segunda = self.client.post('/api/seguimiento/sync/', self.payload, format='json')
+        self.assertEqual(segunda.data['diario']['d-1'], {'estado': 'existente', 'id': primera.data['diario']['d-1']['id']})
+        self.assertEqual(segunda.data['recordatorios']['r-1']['estado'], 'existente')
+
+        self.assertEqual(RegistroDiario.objects.filter(usuario=self.user).count(), 2)
+        self.assertEqual(Recordatorio.objects.filter(usuario=self.user).count(), 1)
+        stats = self.client.get('/api/seguimiento/stats/').data
+        self.assertEqual(stats['total_dias'], 2)
+        self.assertEqual(stats['bar_data'][0]['label'], 'Gym')
+
+    def test_client_id_obligatorio(self):
+        """
+        Valida que un elemento sin client_id rechaza el lote completo.
+        """
+        response = self.client.post('/api/seguimiento/sync/', {'diario': [{'emocion': 'feliz'}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(RegistroDiario.objects.exists())
+
+
+    def test_carrera_perdida_reintenta_y_luego_responde_409(self):
+        """
+        Valida que si otra sincronización gana la carrera se reintenta (y lo
+        ganado aparece como existente), y que si sigue perdiendo tras los
+        intentos responde 409 en vez de un 500.
+        """
+        perdidas = [IntegrityError, IntegrityError]
+
+        def insertar_tras_perder(*args):
+            if perdidas:
+                raise perdidas.pop()
+            return _insertar(*args)
+
+        with mock.patch('seguimiento.sincronizacion._insertar', side_effect=insertar_tras_perder) as insertar:
+            response = self.client.post('/api/seguimiento/sync/', self.payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(insertar.call_count, 3)
+        self.assertEqual(response.data['diario']['d-1']['estado'], 'creado')
+
+        with mock.patch('seguimiento.sincronizacion._insertar', side_effect=IntegrityError) as insertar:
+            response = self.client.post('/api/seguimiento/sync/', self.payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(insertar.call_count, 3)
+
+
+@mock.patch('seguimiento.sincronizacion.MARGEN_CONFIRMACION', timedelta(0))
+class PruebasCambiosIncrementales(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='cambios_qa', password='Password123')
+        self.client.force_authenticate(user=self.user)
+
+    def test_token_devuelve_solo_lo_nuevo(self):
+        """
+        Valida que con el token solo llegan los cambios posteriores,
+        incluyendo los borrados como lápidas.
+        """
+        primero = self.client.post('/api/seguimiento/diario/', {'emocion': 'feliz'}, format='json').data
+        recordatorio = self.client.post('/api/seguimiento/recordatorios/', {
+            'titulo': 'Dormir', 'fecha_hora': '2026-05-01T22:00:00Z',
+        }, format='json').data
+
+        inicial = self.client.get('/api/seguimiento/cambios/').data
+        self.assertEqual([r['id'] for r in inicial['diario']['cambios']], [primero['id']])
+        self.assertEqual(len(inicial['recordatorios']['cambios']), 1)
+
+        vacio = self.client.get('/api/seguimiento/cambios/', {'token': inicial['token']}).data
+        self.assertEqual(vacio['diario']['cambios'], [])
+        self.assertEqual(vacio['recordatorios']['cambios'], [])
+
+        segundo = self.client.post('/api/seguimiento/diario/', {'emocion': 'triste'}, format='json').data
+        self.client.delete(f"/api/seguimiento/recordatorios/{recordatorio['id']}/")
+
+        cambios = self.client.get('/api/seguimiento/cambios/', {'token': vacio['token']}).data
+        self.assertEqual([r['id'] for r in cambios['diario']['cambios']], [segundo['id']])
+        self.assertEqual(cambios['recordatorios']['eliminados'], [recordatorio['id']])
+        self.assertFalse(cambios['hay_mas'])
+
+        self.assertEqual(self.client.get('/api/seguimiento/recordatorios/').data['results'], [])
+        self.assertEqual(self.client.get('/api/seguimiento/cambios/', {'token': 'x'}).status_code, 400)
+
+
+class PruebasTendencias(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='tendencias_qa', password='Password123')
+        self.client.force_authenticate(user=self.user)
+        # Lunes 5 y miércoles 7 de enero (semana 1), nada la semana 2, lunes 19 (semana 3)
+        for dia, total, intensidad, feliz in [(5, 2, 16, 2), (7, 1, 2, 0), (19, 1, 5, 1)]:
+            ResumenDiario.objects.create(
+                usuario=self.user, fecha=date(2026, 1, dia), total_registros=total,
+                suma_intensidad=intensidad, suma_energia=total * 5, conteo_feliz=feliz,
+                conteo_triste=total - feliz,
+            )
+
+    def test_agrupa_por_semana_y_rellena_huecos(self):
+        """
+        Valida los promedios por semana, la semana vacía rellenada y el
+        promedio móvil ponderado por cantidad de registros.
+        """
+        data = self.client.get('/api/seguimiento/tendencias/', {
+            'granularidad': 'semana', 'desde': '2026-01-06', 'hasta': '2026-01-20', 'ventana': 2,
+        }).data
+        periodos = data['periodos']
+        self.assertEqual([p['inicio'] for p in periodos], ['2026-01-05', '2026-01-12', '2026-01-19'])
+        self.assertEqual([p['registros'] for p in periodos], [3, 0, 1])
+        self.assertEqual(periodos[0]['intensidad_promedio'], 6.0)
+        self.assertIsNone(periodos[1]['intensidad_promedio'])
+        self.assertEqual(periodos[1]['intensidad_movil'], 6.0)
+        self.assertEqual(periodos[2]['intensidad_movil'], 5.0)
+        self.assertEqual(periodos[0]['emociones']['feliz'], 2)
+
+    def test_parametros_invalidos(self):
+        url = '/api/seguimiento/tendencias/'
+        self.assertEqual(self.client.get(url, {'granularidad': 'anio'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'desde': '2026-13-01'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'granularidad': 'dia', 'desde': '2020-01-01', 'hasta': '2026-01-01'}).status_code, 400)
+        self.assertEqual(len(self.client.get(url, {'granularidad': 'mes'}).data['periodos']), 12)
+
+
+class PruebasDespachador(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='despacho_qa', password='Password123')
+        ahora = timezone.now()
+        self.vencidos = [
+            Recordatorio.objects.create(usuario=self.user, titulo=f'Vencido {i}', fecha_hora=ahora - timedelta(minutes=i + 1))
+            for i in range(5)
+        ]
+        Recordatorio.objects.create(usuario=self.user, titulo='Futuro', fecha_hora=ahora + timedelta(hours=1))
+        Recordatorio.objects.create(usuario=self.user, titulo='Hecho', fecha_hora=ahora - timedelta(hours=1), completado=True)
+        Recordatorio.objects.create(usuario=self.user, titulo='Borrado', fecha_hora=ahora - timedelta(hours=1), eliminado=True)
+
+        descriptor, self.ruta = tempfile.mkstemp(suffix='.jsonl')
+        os.close(descriptor)
+        self.addCleanup(os.remove, self.ruta)
+
+    def leer_archivo(self):
+        with open(self.ruta, encoding='utf-8') as archivo:
+            return [json.loads(linea) for linea in archivo]
+
+    def test_entrega_solo_vencidos_una_vez(self):
+        """
+        Valida que se entregan en lotes solo los vencidos pendientes y que
+        una segunda pasada no vuelve a enviarlos.
+        """
+        self.assertEqual(despachar(ArchivoBackend(self.ruta), tamano=2), 5)
+        self.assertEqual(despachar(ArchivoBackend(self.ruta), tamano=2), 0)
+
+        enviados = self.leer_archivo()
+        self.assertEqual(sorted(e['recordatorio'] for e in enviados), sorted(r.id for r in self.vencidos))
+        self.assertEqual(enviados[0]['titulo'], 'Vencido 4')
+
+    def test_falla_del_backend_libera_el_lote(self):
+        """
+        Valida que si el backend falla el lote vuelve a quedar pendiente.
+        """
+        class BackendRoto(ArchivoBackend):
+            def enviar(self, recordatorios):
+                raise ConnectionError("sin servicio")
+
+        with self.assertLogs('seguimiento.despachador', 'ERROR'):
+            self.assertEqual(despachar(BackendRoto(self.ruta), tamano=10), 0)
+        self.assertEqual(Recordatorio.objects.filter(notificado_en__isnull=False).count(), 0)
+        self.assertEqual(despachar(ArchivoBackend(self.ruta), tamano=10), 5)
+
+
+    def test_reclamos_perdidos_no_cortan_el_lote(self):
+        """
+        Valida que si otro proceso gana algunas filas del lote leído, el lote
+        se completa con las siguientes vencidas en vez de quedar corto.
+        """
+        ahora = timezone.now()
+        # Otro proceso reclamó los dos más viejos después de que este los leyera
+        ganados = [self.vencidos[4].id, self.vencidos[3].id]
+        Recordatorio.objects.filter(id__in=ganados).update(notificado_en=ahora, lote_notificacion=uuid.uuid4())
+        lecturas = []
+
+        def lectura_vieja(momento):
+            if lecturas:
+                return Recordatorio.objects.filter(
+                    completado=False, notificado_en__isnull=True, recurrencia='ninguna',
+                    fecha_hora__lte=momento, eliminado=False,
+                ).order_by('fecha_hora')
+            lecturas.append(momento)
+            return Recordatorio.objects.filter(
+                completado=False, recurrencia='ninguna', fecha_hora__lte=momento, eliminado=False,
+            ).order_by('fecha_hora')
+
+        with mock.patch('seguimiento.despachador.pendientes', side_effect=lectura_vieja):
+            lote = reclamar_lote(tamano=3, ahora=ahora)
+        self.assertEqual([r.id for r in lote], [r.id for r in reversed(self.vencidos[:3])])
+
+
+class PruebasRecordatoriosRepetitivos(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='repetir_qa', password='Password123')
+        self.client.force_authenticate(user=self.user)
+        self.url = '/api/seguimiento/recordatorios/'
+
+    def test_expande_reglas_y_marcas_por_ocurrencia(self):
+        """
+        Valida que una regla se guarda como una sola fila, se expande al
+        pedir un rango y que marcar una ocurrencia no afecta a las demás.
+        """
+        lunes = timezone.make_aware(timezone.datetime(2026, 3, 2, 8, 0))
+        response = self.client.post(self.url, {'titulo': 'Sin días', 'fecha_hora': lunes.isoformat(), 'recurrencia': 'dias'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(self.url, {
+            'titulo': 'Meditar', 'fecha_hora': lunes.isoformat(), 'recurrencia': 'dias', 'dias_semana': '4, 0,2',
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['dias_semana'], '0,2,4')
+        regla = response.data['id']
+        self.client.post(self.url, {'titulo': 'Cita', 'fecha_hora': (lunes + timedelta(days=1)).isoformat()})
+        self.assertEqual(Recordatorio.objects.filter(usuario=self.user).count(), 2)
+
+        rango = {'desde': '2026-03-02', 'hasta': '2026-03-09'}
+        response = self.client.get(f'{self.url}ocurrencias/', rango)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([o['titulo'] for o in response.data], ['Meditar', 'Cita', 'Meditar', 'Meditar'])
+
+        response = self.client.post(f'{self.url}{regla}/ocurrencia/', {'fecha': '2026-03-04', 'completado': True})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(f'{self.url}ocurrencias/', rango)
+        marcadas = [o['fecha_hora'].date().isoformat() for o in response.data if o['completado']]
+        self.assertEqual(marcadas, ['2026-03-04'])
+
+        # Desde un formulario el booleano llega como texto: 'false' desmarca
+        response = self.client.post(f'{self.url}{regla}/ocurrencia/', {'fecha': '2026-03-04', 'completado': 'false'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIs(response.data['completado'], False)
+        response = self.client.get(f'{self.url}ocurrencias/', rango)
+        self.assertFalse(any(o['completado'] for o in response.data))
+        for datos in ({'fecha': '2026-03-04', 'completado': 'quizas'}, {'fecha': '04/03/2026'}):
+            response = self.client.post(f'{self.url}{regla}/ocurrencia/', datos)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(f'{self.url}ocurrencias/', {'desde': '2026-01-01', 'hasta': '2026-12-31'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_despachador_avanza_la_regla(self):
+        """
+        Valida que el despachador avisa la ocurrencia vencida de una regla,
+        la adelanta a la siguiente y salta las ocurrencias ya marcadas.
+        """
+        ahora = timezone.now()
+        aviso = ahora - timedelta(hours=1)
+        diaria = Recordatorio.objects.create(
+            usuario=self.user, titulo='Agua', fecha_hora=aviso - timedelta(days=3),
+            recurrencia='diaria', proximo_aviso=aviso,
+        )
+        hecha = Recordatorio.objects.create(
+            usuario=self.user, titulo='Yoga', fecha_hora=aviso - timedelta(days=3),
+            recurrencia='diaria', proximo_aviso=aviso,
+        )
+        OcurrenciaRecordatorio.objects.create(recordatorio=hecha, fecha=timezone.localtime(aviso).date())
+
+        descriptor, ruta = tempfile.mkstemp(suffix='.jsonl')
+        os.close(descriptor)
+        self.addCleanup(os.remove, ruta)
+
+        self.assertEqual(despachar(ArchivoBackend(ruta)), 1)
+        self.assertEqual(despachar(ArchivoBackend(ruta)), 0)
+        with open(ruta, encoding='utf-8') as archivo:
+            enviados = [json.loads(linea) for linea in archivo]
+        self.assertEqual([e['titulo'] for e in enviados], ['Agua'])
+        self.assertEqual(enviados[0]['fecha_hora'], aviso.isoformat())
+
+        for regla in (diaria, hecha):
+            regla.refresh_from_db()
+            self.assertEqual(regla.proximo_aviso, aviso + timedelta(days=1))
+
+
+class PruebasCalendario(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='calendario_qa', password='Password123')
+        self.client.force_authenticate(user=self.user)
+        self.url = '/api/seguimiento/recordatorios/'
+
+        def momento(dia, hora):
+            return timezone.make_aware(timezone.datetime(2026, 3, 1, hora) + timedelta(days=dia - 1))
+
+        self.regla = Recordatorio.objects.create(
+            usuario=self.user, titulo='Terapia', fecha_hora=momento(2, 9), recurrencia='semanal',
+        )
+        Recordatorio.objects.create(usuario=self.user, titulo='Cita', fecha_hora=momento(2, 10), completado=True)
+        Recordatorio.objects.create(usuario=self.user, titulo='Yoga', fecha_hora=momento(10, 18))
+        Recordatorio.objects.create(usuario=self.user, titulo='Abril', fecha_hora=momento(36, 8))
+        OcurrenciaRecordatorio.objects.create(recordatorio=self.regla, fecha=date(2026, 3, 9))
+
+    def test_filtra_por_rango(self):
+        """
+        Valida que el listado acepta desde/hasta (o from/to) y solo trae lo
+        que cae en el rango, incluidas las reglas repetitivas activas.
+        """
+        response = self.client.get(self.url, {'desde': '2026-03-01', 'hasta': '2026-04-01'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['titulo'] for r in response.data['results']], ['Terapia', 'Cita', 'Yoga'])
+
+        response = self.client.get(self.url, {'from': '2026-03-05', 'to': '2026-03-11'})
+        self.assertEqual([r['titulo'] for r in response.data['results']], ['Terapia', 'Yoga'])
+
+        response = self.client.get(self.url, {'desde': 'ayer'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_resumen_mensual(self):
+        """
+        Valida que el resumen del mes trae solo conteos y proporción de
+        completados por día, sumando las ocurrencias de las reglas.
+        """
+        response = self.client.get(f'{self.url}mes/', {'mes': '2026-03'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        dias = response.data['dias']
+        self.assertEqual(list(dias), ['2026-03-02', '2026-03-09', '2026-03-10', '2026-03-16', '2026-03-23', '2026-03-30'])
+        self.assertEqual(dias['2026-03-02'], {'total': 2, 'completados': 1, 'ratio': 0.5})
+        self.assertEqual(dias['2026-03-09'], {'total': 1, 'completados': 1, 'ratio': 1.0})
+        self.assertEqual(dias['2026-03-10']['completados'], 0)
+
+        response = self.client.get(f'{self.url}mes/', {'mes': '2026-13'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PruebasBusquedaDiario(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='busca_qa', password='Password123')
+        self.otro = User.objects.create_user(username='busca_otro', password='Password123')
+        self.client.force_authenticate(user=self.user)
+        self.url = '/api/seguimiento/diario/buscar/'
+        self.trabajo = RegistroDiario.objects.create(usuario=self.user, emocion='ansioso', nota='Mucha ansiedad por el trabajo hoy')
+        self.dormir = RegistroDiario.objects.create(usuario=self.user, emocion='neutral', nota='Dormí poco, algo de ansiedad')
+        RegistroDiario.objects.create(usuario=self.user, emocion='feliz', nota=None)
+        RegistroDiario.objects.create(usuario=self.otro, emocion='ansioso', nota='Ansiedad en el trabajo también')
+
+    def test_busca_solo_en_mis_notas(self):
+        """
+        Valida que la búsqueda es por prefijo y sin acentos, marca el
+        fragmento y nunca devuelve notas de otro usuario ni borradas.
+        """
+        response = self.client.get(self.url, {'q': 'ánsie'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual({r['id'] for r in response.data['results']}, {self.trabajo.id, self.dormir.id})
+
+        response = self.client.get(self.url, {'q': 'ansiedad trabajo'})
+        self.assertEqual([r['id'] for r in response.data['results']], [self.trabajo.id])
+        self.assertIn('<mark>trabajo</mark>', response.data['results'][0]['fragmento'])
+
+        # Editar y borrar mantienen el índice al día
+        self.client.patch(f'/api/seguimiento/diario/{self.dormir.id}/', {'nota': 'Dormí ocho horas'})
+        self.client.delete(f'/api/seguimiento/diario/{self.trabajo.id}/')
+        self.assertEqual(self.client.get(self.url, {'q': 'ansiedad'}).data['results'], [])
+        self.assertEqual(len(self.client.get(self.url, {'q': 'horas'}).data['results']), 1)
+
+    def test_consulta_invalida_y_respaldo_sin_fts(self):
+        """
+        Valida que una consulta sin palabras da 400, que la sintaxis FTS del
+        usuario no rompe nada y que el respaldo con icontains da lo mismo.
+        """
+        self.assertEqual(self.client.get(self.url, {'q': '"*()'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'q': 'trabajo OR "'}).status_code, status.HTTP_200_OK)
+
+        with mock.patch('seguimiento.busqueda.fts_disponible', return_value=False):
+            response = self.client.get(self.url, {'q': 'ansiedad trabajo'})
+        self.assertEqual([r['id'] for r in response.data['results']], [self.trabajo.id])
+        self.assertIn('<mark>trabajo</mark>', response.data['results'][0]['fragmento'])
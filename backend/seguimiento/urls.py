@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import RegistroDiarioViewSet, DashboardStatsView, RecordatorioViewSet # <--- Importamos la nueva View
+from .views import RegistroDiarioViewSet, DashboardStatsView, RecordatorioViewSet, SincronizacionView, CambiosView, TendenciasView # <--- Importamos la nueva View
 
 router = DefaultRouter()
 
@@ -13,4 +13,7 @@ router.register(r'recordatorios', RecordatorioViewSet, basename='recordatorio')
 urlpatterns = [
     path('', include(router.urls)),
     path('stats/', DashboardStatsView.as_view(), name='dashboard-stats'),
+    path('tendencias/', TendenciasView.as_view(), name='tendencias'),
+    path('sync/', SincronizacionView.as_view(), name='sincronizacion'),
+    path('cambios/', CambiosView.as_view(), name='cambios'),
 ]
\ No newline at end of file
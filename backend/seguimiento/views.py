@@ -1,102 +1,354 @@
-from rest_framework import viewsets
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.authentication import TokenAuthentication
-from django.db.models import Count, Avg
-from collections import Counter
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+import copy
+from datetime import datetime, time
 
 # Importamos Modelos y Serializers
-from .models import RegistroDiario, Recordatorio 
-from .serializers import RegistroDiarioSerializer, RecordatorioSerializer
+from .models import RegistroDiario, Recordatorio, ResumenDiario, OcurrenciaRecordatorio
+from .serializers import RegistroDiarioSerializer, RecordatorioSerializer, OcurrenciaSerializer
+from .resumenes import aplicar_registros
+from .actividades import top_actividades, con_actividades
+from .sincronizacion import sincronizar, cambios_desde, SincronizacionInvalida, SincronizacionEnConflicto
+from .tendencias import calcular_tendencias, rango_por_defecto, ParametrosInvalidos
+from .recurrencia import ocurrencias_en_rango, filtro_rango, resumen_mes, RangoInvalido
+from .busqueda import buscar_notas
+from core.autenticacion import CachedTokenAuthentication
+from core.busqueda import BusquedaInvalida, leer_limite
+from core.cache import obtener_version, registrar_acierto, registrar_fallo
+from core.paginacion import KeysetPagination
+from core.idempotencia import IdempotenciaMixin
+
+
+# Paginación por cursor, con el mismo orden que usa cada listado
+class RegistroDiarioPagination(KeysetPagination):
+    ordering = ('-fecha', '-hora', '-id')
+
+
+class RecordatorioPagination(KeysetPagination):
+    ordering = ('fecha_hora', 'id')
+
 
 # 1. CRUD DEL DIARIO (Historial)
-class RegistroDiarioViewSet(viewsets.ModelViewSet):
+class RegistroDiarioViewSet(IdempotenciaMixin, viewsets.ModelViewSet):
     serializer_class = RegistroDiarioSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = RegistroDiarioPagination
 
     def get_queryset(self):
-        return RegistroDiario.objects.filter(usuario=self.request.user).order_by('-fecha', '-hora')
+        registros = RegistroDiario.objects.filter(usuario=self.request.user).vigentes()
+        if self.action == 'list':
+            registros = self._filtrar_fechas(registros)
+        return con_actividades(registros).order_by('-fecha', '-hora', '-id')
 
+    def _filtrar_fechas(self, registros):
+        # ?desde=2026-03-01&hasta=2026-04-01 -> fechas en [desde, hasta), sobre el
+        # índice (usuario, fecha, hora). El calendario pide solo el mes que muestra.
+        params = self.request.query_params
+        fechas = {}
+        for nombre, filtro in (('desde', 'fecha__gte'), ('hasta', 'fecha__lt')):
+            if nombre in params:
+                fecha = parse_date(params[nombre] or '')
+                if fecha is None:
+                    raise ValidationError({'error': "'desde' y 'hasta' deben ser fechas YYYY-MM-DD."})
+                fechas[filtro] = fecha
+        return registros.filter(**fechas)
+
+    # Cada escritura actualiza el ResumenDiario en la misma transacción
     def perform_create(self, serializer):
-        serializer.save(usuario=self.request.user)
+        with transaction.atomic():
+            registro = serializer.save(usuario=self.request.user)
+            aplicar_registros([registro], signo=1)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            anterior = copy.copy(serializer.instance)
+            registro = serializer.save()
+            aplicar_registros([anterior], signo=-1)
+            aplicar_registros([registro], signo=1)
+
+    # Borrado lógico: queda la lápida para la sincronización incremental
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            aplicar_registros([instance], signo=-1)
+            instance.enlaces_actividad.all().delete()
+            instance.eliminado = True
+            instance.save(update_fields=['eliminado', 'actualizado'])
+
+    # GET /diario/buscar/?q=trabajo&limite=20 -> solo en las notas del usuario
+    @action(detail=False, methods=['get'])
+    def buscar(self, request):
+        try:
+            resultados = buscar_notas(request.user, request.query_params.get('q'), leer_limite(request.query_params.get('limite')))
+        except BusquedaInvalida as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'results': resultados})
 
 # 2. CRUD DE RECORDATORIOS (Calendario - Nuevo) ✅
 class RecordatorioViewSet(viewsets.ModelViewSet):
     serializer_class = RecordatorioSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = RecordatorioPagination
 
     def get_queryset(self):
         # Filtramos por usuario y ordenamos por fecha (los más próximos primero)
-        return Recordatorio.objects.filter(usuario=self.request.user).order_by('fecha_hora')
+        recordatorios = Recordatorio.objects.filter(usuario=self.request.user).vigentes()
+        if self.action == 'list':
+            recordatorios = self._filtrar_rango(recordatorios)
+        return recordatorios.order_by('fecha_hora', 'id')
+
+    def _filtrar_rango(self, recordatorios):
+        # ?desde=...&hasta=... (o from/to): rango sobre el índice (usuario, fecha_hora).
+        # Las reglas repetitivas aparecen si tienen ocurrencias dentro del rango.
+        params = self.request.query_params
+        crudo_desde = params.get('desde', params.get('from'))
+        crudo_hasta = params.get('hasta', params.get('to'))
+        if crudo_desde is None and crudo_hasta is None:
+            return recordatorios
+
+        desde = self._leer_momento(crudo_desde) if crudo_desde is not None else None
+        hasta = self._leer_momento(crudo_hasta) if crudo_hasta is not None else None
+        if (crudo_desde is not None and desde is None) or (crudo_hasta is not None and hasta is None):
+            raise ValidationError({'error': "'desde' y 'hasta' deben ser fecha u hora ISO."})
+        if desde and hasta and desde >= hasta:
+            raise ValidationError({'error': "'desde' debe ser anterior a 'hasta'."})
+        return recordatorios.filter(filtro_rango(desde, hasta))
 
     def perform_create(self, serializer):
         # Asigna el usuario logueado automáticamente
         serializer.save(usuario=self.request.user)
 
+    def perform_update(self, serializer):
+        # Si se reprograma, vuelve a quedar pendiente de notificar
+        nueva_fecha = serializer.validated_data.get('fecha_hora')
+        if nueva_fecha and nueva_fecha != serializer.instance.fecha_hora:
+            serializer.save(notificado_en=None, lote_notificacion=None)
+        else:
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        instance.eliminado = True
+        instance.proximo_aviso = None
+        instance.save(update_fields=['eliminado', 'proximo_aviso', 'actualizado'])
+
+    # GET /recordatorios/ocurrencias/?desde=2026-03-01T00:00&hasta=2026-04-01T00:00
+    # Únicos y repetitivos ya expandidos para pintar el calendario
+    @action(detail=False, methods=['get'])
+    def ocurrencias(self, request):
+        desde = self._leer_momento(request.query_params.get('desde'))
+        hasta = self._leer_momento(request.query_params.get('hasta'))
+        if desde is None or hasta is None:
+            return Response({'error': "'desde' y 'hasta' son obligatorios (fecha u hora ISO)."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            data = ocurrencias_en_rango(request.user, desde, hasta)
+        except RangoInvalido as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data)
+
+    # GET /recordatorios/mes/?mes=2026-03 -> {"mes", "dias": {"2026-03-04": {total, completados, ratio}}}
+    # Versión compacta para la grilla mensual: solo conteos por día
+    @action(detail=False, methods=['get'])
+    def mes(self, request):
+        try:
+            anio, mes = (int(p) for p in request.query_params.get('mes', '').split('-'))
+            if not 1 <= mes <= 12 or not 1 <= anio <= 9998:
+                raise ValueError
+        except ValueError:
+            return Response({'error': "'mes' debe tener formato YYYY-MM."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(resumen_mes(request.user, anio, mes))
+
+    # POST /recordatorios/{id}/ocurrencia/ {"fecha": "2026-03-04", "completado": true}
+    # Marca una sola ocurrencia de una regla repetitiva sin tocar las demás
+    @action(detail=True, methods=['post'])
+    def ocurrencia(self, request, pk=None):
+        recordatorio = self.get_object()
+        if not recordatorio.es_recurrente:
+            return Response({'error': 'Solo para recordatorios repetitivos.'}, status=status.HTTP_400_BAD_REQUEST)
+        datos = OcurrenciaSerializer(data=request.data)
+        datos.is_valid(raise_exception=True)
+        fecha, completado = datos.validated_data['fecha'], datos.validated_data['completado']
+
+        with transaction.atomic():
+            OcurrenciaRecordatorio.objects.update_or_create(
+                recordatorio=recordatorio, fecha=fecha,
+                defaults={'completado': completado},
+            )
+            # La regla cuenta como cambiada para la sincronización incremental
+            recordatorio.save(update_fields=['actualizado'])
+        return Response({'recordatorio': recordatorio.id, 'fecha': fecha, 'completado': completado})
+
+    @staticmethod
+    def _leer_momento(valor):
+        if not valor:
+            return None
+        try:
+            momento = parse_datetime(valor)
+            if momento is None:
+                fecha = parse_date(valor)
+                if fecha is None:
+                    return None
+                momento = datetime.combine(fecha, time.min)
+        except ValueError:
+            return None
+        return timezone.make_aware(momento) if timezone.is_naive(momento) else momento
+
 # 3. VISTA DE ESTADÍSTICAS
 class DashboardStatsView(APIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        registros = RegistroDiario.objects.filter(usuario=request.user)
-        total_count = registros.count() or 1
-        
+        # La clave incluye la versión del usuario, que sube con cada escritura
+        # en su diario: nunca hace falta borrar nada a mano
+        version = obtener_version('stats', request.user.id)
+        clave = f"stats:{request.user.id}:{version}"
+        data = cache.get(clave)
+        if data is not None:
+            registrar_acierto('stats')
+            estado = 'HIT'
+        else:
+            registrar_fallo('stats')
+            estado = 'MISS'
+            data = self.calcular(request.user)
+            cache.set(clave, data, settings.STATS_CACHE_TIMEOUT)
+
+        response = Response(data)
+        response['X-Cache'] = estado
+        return response
+
+    def calcular(self, usuario):
+        # Todo sale de ResumenDiario (una fila por día) y RegistroActividad, nunca de RegistroDiario
+        resumenes = ResumenDiario.objects.filter(usuario=usuario)
+        campos_emocion = {e: ResumenDiario.campo_emocion(e) for e, _ in RegistroDiario.EMOCIONES}
+        totales = resumenes.aggregate(
+            total=Sum('total_registros'),
+            suma_intensidad=Sum('suma_intensidad'),
+            **{campo: Sum(campo) for campo in campos_emocion.values()}
+        )
+        total_registros = totales['total'] or 0
+        total_count = total_registros or 1
+
         # --- A. PIE CHART ---
-        emociones_raw = registros.values('emocion').annotate(total=Count('emocion'))
         colores = {
             'feliz': '#16a34a', 'contento': '#84cc16', 'neutral': '#94a3b8',
             'triste': '#3b82f6', 'ansioso': '#f97316', 'enojado': '#ef4444'
         }
         pie_data = []
-        for item in emociones_raw:
-            nombre = item['emocion']
+        for nombre, campo in campos_emocion.items():
+            cantidad = totales[campo] or 0
+            if not cantidad:
+                continue
             pie_data.append({
-                "value": round((item['total'] / total_count) * 100),
-                "count": item['total'],
+                "value": round((cantidad / total_count) * 100),
+                "count": cantidad,
                 "color": colores.get(nombre, '#cccccc'),
-                "text": f"{round((item['total'] / total_count) * 100)}%",
+                "text": f"{round((cantidad / total_count) * 100)}%",
                 "label": nombre.capitalize()
             })
 
-        # --- B. LINE CHART ---
-        ultimos_7 = registros.order_by('-fecha')[:7]
-        ultimos_7 = reversed(ultimos_7) 
+        # --- B. LINE CHART (promedio por día, últimos 7 días con registros) ---
+        ultimos_7 = reversed(resumenes.order_by('-fecha')[:7])
         dias_semana = ['Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom']
         line_mood = []
         line_energy = []
         for r in ultimos_7:
             dia = dias_semana[r.fecha.weekday()]
-            line_mood.append({"value": r.nivel_intensidad, "label": dia})
-            line_energy.append({"value": r.nivel_energia})
-
-        # --- C. BAR CHART ---
-        all_activities = []
-        for r in registros:
-            if r.actividades:
-                acts = [a.strip() for a in r.actividades.split(',') if a.strip()]
-                all_activities.extend(acts)
-        top_activities = Counter(all_activities).most_common(5)
+            line_mood.append({"value": round(r.suma_intensidad / r.total_registros, 1), "label": dia})
+            line_energy.append({"value": round(r.suma_energia / r.total_registros, 1)})
+
+        # --- C. BAR CHART (un GROUP BY ... LIMIT 5 sobre RegistroActividad) ---
         bar_data = []
         colores_barras = ['#8b5cf6', '#a855f7', '#d946ef', '#ec4899', '#f43f5e']
-        for i, (act, count) in enumerate(top_activities):
+        for i, item in enumerate(top_actividades(usuario, limite=5)):
             bar_data.append({
-                "value": count,
-                "label": act[:4],
+                "value": item['total'],
+                "label": item['actividad__nombre'][:4],
                 "frontColor": colores_barras[i % len(colores_barras)]
             })
 
         # --- D. PROMEDIO ---
-        promedio = registros.aggregate(Avg('nivel_intensidad'))['nivel_intensidad__avg'] or 0
+        promedio = (totales['suma_intensidad'] or 0) / total_count
 
-        return Response({
+        return {
             "pie_chart": pie_data,
             "line_mood": line_mood,
             "line_energy": line_energy,
             "bar_data": bar_data,
             "promedio_general": round(promedio, 1),
-            "total_dias": registros.count()
-        })
\ No newline at end of file
+            "total_dias": total_registros
+        }
+
+
+# 4. SINCRONIZACIÓN EN LOTE (modo sin conexión)
+# POST {"diario": [{client_id, ...}], "recordatorios": [{client_id, ...}]}
+# Responde un mapa client_id -> {estado: creado|existente|error, id | errores}
+class SincronizacionView(APIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            resultado = sincronizar(
+                request.user,
+                request.data.get('diario', []),
+                request.data.get('recordatorios', []),
+            )
+        except SincronizacionEnConflicto as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        except SincronizacionInvalida as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(resultado)
+
+
+# 5. CAMBIOS DESDE LA ÚLTIMA SINCRONIZACIÓN
+# GET ?token=... -> solo lo creado, editado o borrado después de ese token.
+# Sin token devuelve todo lo vigente. Si "hay_mas" es true, volver a pedir
+# con el token nuevo.
+class CambiosView(APIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            resultado = cambios_desde(request.user, request.query_params.get('token'))
+        except SincronizacionInvalida as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(resultado)
+
+
+# 6. TENDENCIAS POR DÍA / SEMANA / MES
+# GET ?granularidad=semana&desde=2026-01-01&hasta=2026-03-31&ventana=3
+class TendenciasView(APIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        params = request.query_params
+        granularidad = params.get('granularidad', 'dia')
+        try:
+            desde = parse_date(params['desde']) if 'desde' in params else None
+            hasta = parse_date(params['hasta']) if 'hasta' in params else None
+            ventana = int(params.get('ventana', 3))
+            if ('desde' in params and desde is None) or ('hasta' in params and hasta is None):
+                raise ValueError
+        except ValueError:
+            return Response({'error': 'Fechas en formato YYYY-MM-DD y ventana entera.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            if desde is None:
+                desde, hasta = rango_por_defecto(granularidad, hasta)
+            data = calcular_tendencias(request.user, granularidad, desde, hasta or timezone.localdate(), ventana)
+        except ParametrosInvalidos as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data)
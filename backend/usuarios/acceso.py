@@ -0,0 +1,82 @@
+"""
+Login sin bloquear al resto de la API.
+
+Calcular un hash PBKDF2 cuesta decenas de milisegundos de CPU por intento.
+Con authenticate() dentro de una vista síncrona ese cálculo ocupa el hilo
+que atiende las vistas síncronas (con ASGI es uno solo por proceso), así
+que una ráfaga de intentos frena todos los demás endpoints.
+
+Acá el login:
+1. gasta una ficha de la cubeta de la IP y otra de la del usuario
+   (core.limites) antes de hacer cualquier cálculo: el exceso se rechaza
+   casi gratis;
+2. verifica la contraseña en un pool propio de LOGIN_HILOS_HASH hilos, con
+   a lo sumo LOGIN_MAX_EN_ESPERA logins esperándolo. Si se llena, se
+   responde 503 en vez de encolar sin fin.
+
+verificar_credenciales() es django.contrib.auth.authenticate() corriendo en
+ese pool: pasa por AUTHENTICATION_BACKENDS con todas sus reglas
+(user_can_authenticate, hash de relleno si el usuario no existe,
+actualización del hash, señal user_login_failed). Como corre en otro hilo,
+usa su propia conexión a la base y la suelta al terminar, igual que al
+final de una petición.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.db import close_old_connections
+
+from core.limites import obtener_limites
+
+_pool = ThreadPoolExecutor(max_workers=settings.LOGIN_HILOS_HASH, thread_name_prefix='login-hash')
+_lock = threading.Lock()
+_en_espera = 0
+
+
+class Saturado(Exception):
+    pass
+
+
+async def en_pool(funcion, *args):
+    global _en_espera
+    with _lock:
+        if _en_espera >= settings.LOGIN_MAX_EN_ESPERA:
+            raise Saturado
+        _en_espera += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_pool, funcion, *args)
+    finally:
+        with _lock:
+            _en_espera -= 1
+
+
+async def revisar_limites(ip, username):
+    """Segundos a esperar antes de reintentar; 0 si el intento puede seguir."""
+    limites = obtener_limites()
+    # Primero la IP: si ya agotó la suya, no gasta la cubeta del usuario que ataca
+    cubetas = (
+        (f"login:ip:{ip}", settings.LOGIN_LIMITE_IP),
+        (f"login:usuario:{username.strip().casefold()}", settings.LOGIN_LIMITE_USUARIO),
+    )
+    for clave, limite in cubetas:
+        if limite is None:
+            continue
+        espera = await limites.consumir(clave, *limite)
+        if espera:
+            return espera
+    return 0
+
+
+def _autenticar(username, password):
+    try:
+        return authenticate(request=None, username=username, password=password)
+    finally:
+        close_old_connections()
+
+
+async def verificar_credenciales(username, password):
+    """El usuario si los backends de autenticación lo aceptan; si no, None. Puede lanzar Saturado."""
+    return await en_pool(_autenticar, username, password)
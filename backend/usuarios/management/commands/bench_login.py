@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import random
+import statistics
+import time
+from collections import Counter
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, override_settings
+from django.urls import include, path
+from rest_framework import permissions
+from rest_framework.authtoken.models import Token
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.limites import obtener_limites
+
+
+class LoginSincrono(APIView):
+    # El login de antes, para comparar: authenticate() en el hilo de las vistas síncronas
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        user = authenticate(username=request.data.get('username'), password=request.data.get('password'))
+        if user:
+            token, _ = Token.objects.get_or_create(user=user)
+            return Response({'token': token.key, 'id': user.id})
+        return Response({'error': 'Credenciales inválidas'}, status=400)
+
+
+# URLconf del benchmark (ROOT_URLCONF mientras corre): la API más el login viejo
+urlpatterns = [
+    path('bench/login-sincrono/', LoginSincrono.as_view()),
+    path('', include('core.urls')),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la latencia de GET /api/auth/perfil/ mientras una ráfaga de logins con contraseñas "
+        "erróneas golpea el servidor: con el login síncrono de antes, con el async sin límites y con "
+        "el async con límites. Corre como un servidor ASGI (un solo hilo para las vistas síncronas). "
+        "Los usuarios de prueba se confirman (el login los lee desde los hilos del pool) y se borran al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--segundos', type=float, default=5, help="Duración de cada escenario")
+        parser.add_argument('--concurrencia', type=int, default=8, help="Logins simultáneos del ataque")
+        parser.add_argument('--victimas', type=int, default=50)
+
+    def sembrar(self, prefijo, victimas):
+        # Un solo hash para todos: sembrar no es lo que se mide
+        clave = make_password('Password123')
+        User.objects.bulk_create([
+            User(username=f"{prefijo}{i}", password=clave) for i in range(victimas)
+        ])
+        lector = User.objects.create(username=f"{prefijo}lector", password=clave)
+        nombres = [f"{prefijo}{i}" for i in range(victimas)]
+        return nombres, Token.objects.create(user=lector).key
+
+    async def escenario(self, url_login, nombres, token, options):
+        cliente = AsyncClient()
+        fin = asyncio.Event()
+        resultados = Counter()
+
+        # AsyncClient siempre llega como 127.0.0.1: el ataque sale de una sola IP
+        async def atacar():
+            while not fin.is_set():
+                response = await cliente.post(
+                    url_login, {'username': random.choice(nombres), 'password': 'incorrecta'},
+                    content_type='application/json',
+                )
+                resultados[response.status_code] += 1
+                if response.status_code in (429, 503):
+                    # Un atacante no espera el Retry-After, pero tampoco gira en vacío
+                    await asyncio.sleep(0.005)
+
+        atacantes = [asyncio.create_task(atacar()) for _ in range(options['concurrencia'])]
+        await asyncio.sleep(0.2)
+
+        tiempos = []
+        limite = time.perf_counter() + options['segundos']
+        # Con el login síncrono cada petición puede tardar segundos: quedan pocas muestras
+        while time.perf_counter() < limite:
+            inicio = time.perf_counter()
+            response = await cliente.get('/api/auth/perfil/', headers={'Authorization': f"Token {token}"})
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+            assert response.status_code == 200, response.status_code
+            await asyncio.sleep(0.01)
+
+        fin.set()
+        await asyncio.gather(*atacantes)
+        tiempos.sort()
+        p99 = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.99))]
+        return statistics.median(tiempos), p99, len(tiempos), resultados
+
+    def handle(self, *args, **options):
+        escenarios = [
+            ('sin ataque', None, {}),
+            ('login síncrono', '/bench/login-sincrono/', {}),
+            ('async sin límites', '/api/auth/login/', {'LOGIN_LIMITE_IP': None, 'LOGIN_LIMITE_USUARIO': None}),
+            ('async con límites', '/api/auth/login/', {}),
+        ]
+        # Miles de 400/429/503 escritos en consola también consumen CPU y ensucian la salida
+        logging.getLogger('django.request').setLevel(logging.CRITICAL)
+        logging.getLogger('django.server').setLevel(logging.CRITICAL)
+        prefijo = f"bench_login_{random.randint(10000, 99999)}_"
+        try:
+            with override_settings(ROOT_URLCONF=__name__):
+                nombres, token = self.sembrar(prefijo, options['victimas'])
+                self.stdout.write(
+                    f"{'escenario':>18} | {'n':>4} | {'p50 ms':>8} | {'p99 ms':>8} | {'hashes':>6} | {'429':>5} | {'503':>5}"
+                )
+                for nombre, url, ajustes in escenarios:
+                    limites = obtener_limites()
+                    if hasattr(limites, 'vaciar'):
+                        limites.vaciar()
+                    with override_settings(**ajustes):
+                        if url is None:
+                            p50, p99, muestras, resultados = async_to_sync(self.escenario)(
+                                '/api/auth/perfil/', nombres, token, {**options, 'concurrencia': 0},
+                            )
+                        else:
+                            p50, p99, muestras, resultados = async_to_sync(self.escenario)(url, nombres, token, options)
+                    self.stdout.write(
+                        f"{nombre:>18} | {muestras:>4} | {p50:>8.2f} | {p99:>8.2f} | {resultados[400]:>6} | "
+                        f"{resultados[429]:>5} | {resultados[503]:>5}"
+                    )
+        finally:
+            # Token y perfil caen en cascada
+            User.objects.filter(username__startswith=prefijo).delete()
+            self.stdout.write("Datos de prueba descartados.")
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:27
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def calcular_totales(apps, schema_editor):
+    # Un solo UPDATE: total = 50·L·(L−1) + experiencia (ver gamificacion/niveles.py)
+    PerfilUsuario = apps.get_model('usuarios', 'PerfilUsuario')
+    PerfilUsuario.objects.update(
+        experiencia_total=50 * F('nivel_actual') * (F('nivel_actual') - 1) + F('experiencia_actual'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='perfilusuario',
+            name='experiencia_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='perfilusuario',
+            index=models.Index(fields=['-experiencia_total', 'id'], name='perfil_ranking_idx'),
+        ),
+        migrations.RunPython(calcular_totales, migrations.RunPython.noop),
+    ]
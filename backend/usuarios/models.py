@@ -22,8 +22,16 @@ class PerfilUsuario(models.Model):
     nivel_actual = models.IntegerField(default=1)
     # ✅ CAMBIO 3: Agregamos experiencia_actual, ¡es vital para los juegos!
     experiencia_actual = models.IntegerField(default=0)
+    # XP acumulada desde el nivel 1 (nivel y experiencia juntos): clave del ranking
+    experiencia_total = models.PositiveIntegerField(default=0)
     es_premium = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Mismo orden que el ranking: top-N y vecinos salen recorriendo el índice
+            models.Index(fields=['-experiencia_total', 'id'], name='perfil_ranking_idx'),
+        ]
+
     # ✅ CAMBIO 4: Propiedad para que el Frontend sepa cuánto falta para subir de nivel
     @property
     def experiencia_siguiente_nivel(self):
@@ -33,13 +41,13 @@ class PerfilUsuario(models.Model):
         return f"Perfil de {self.usuario.username}"
 
 # --- SEÑALES ---
+# El perfil se crea una sola vez, junto con el usuario. Guardar el usuario
+# después (ej: el last_login de cada login) no vuelve a guardar el perfil:
+# eso era un UPDATE de la fila completa por login, que además podía pisar la
+# XP sumada entre medio con valores viejos. Quien cambie el perfil lo guarda
+# él mismo, con update_fields.
 @receiver(post_save, sender=User)
-def crear_perfil_usuario(sender, instance, created, **kwargs):
-    if created:
+def crear_perfil_usuario(sender, instance, created, raw=False, **kwargs):
+    # raw: loaddata trae los perfiles en el mismo fixture
+    if created and not raw:
         PerfilUsuario.objects.create(usuario=instance)
-
-@receiver(post_save, sender=User)
-def guardar_perfil_usuario(sender, instance, **kwargs):
-    # Verificamos que tenga perfil antes de guardar
-    if hasattr(instance, 'perfilusuario'):
-        instance.perfilusuario.save()
\ No newline at end of file
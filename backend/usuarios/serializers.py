@@ -2,6 +2,8 @@ from rest_framework import serializers
 from django.contrib.auth.models import User
 # Asegúrate de importar tu modelo correctamente
 from .models import PerfilUsuario 
+from gamificacion.eventos import experiencia_en_vivo
+from gamificacion.niveles import nivel_para
 
 class RegistroSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -18,6 +20,9 @@ class RegistroSerializer(serializers.ModelSerializer):
         )
         return user
 
+# Campos del perfil que el usuario puede editar desde la app
+CAMPOS_PERFIL = ('biografia',)
+
 class PerfilSerializer(serializers.ModelSerializer):
     # ✅ CORRECCIÓN 1: Quitamos read_only=True y ponemos required=False
     # Esto permite que el serializer ACEPTE estos campos cuando llegan desde React Native
@@ -30,7 +35,21 @@ class PerfilSerializer(serializers.ModelSerializer):
         model = PerfilUsuario 
         fields = '__all__'
         # Asegúrate de que 'usuario' siga siendo solo lectura para no romper la relación
-        read_only_fields = ['usuario', 'nivel_actual', 'experiencia_actual']
+        read_only_fields = ['usuario', 'nivel_actual', 'experiencia_actual', 'experiencia_total']
+
+    def to_representation(self, instance):
+        datos = super().to_representation(instance)
+        # Las columnas de XP son la foto del último compactado: se muestra la
+        # XP en vivo (foto + eventos pendientes), igual que al registrar una acción
+        total = experiencia_en_vivo(instance.usuario_id)
+        nivel, experiencia = nivel_para(total)
+        datos.update({
+            'nivel_actual': nivel,
+            'experiencia_actual': experiencia,
+            'experiencia_total': total,
+            'experiencia_siguiente_nivel': nivel * 100,
+        })
+        return datos
 
     # ✅ CORRECCIÓN 2: Sobrescribimos el método update con validaciones acumulativas
     def update(self, instance, validated_data):
@@ -42,15 +61,15 @@ class PerfilSerializer(serializers.ModelSerializer):
 
         # --- VALIDACIÓN MANUAL DE DUPLICADOS ---
         
-        # Validación de Username
-        if 'username' in usuario_data:
+        # Validación de Username (solo si cambia: reenviar el mismo no consulta nada)
+        if 'username' in usuario_data and usuario_data['username'] != instance.usuario.username:
             nuevo_username = usuario_data['username']
             # Verificamos si existe en otro usuario distinto al actual
             if User.objects.filter(username=nuevo_username).exclude(pk=instance.usuario.pk).exists():
                 errors['username'] = ["Ese usuario ya existe."]
 
         # Validación de Email
-        if 'email' in usuario_data:
+        if 'email' in usuario_data and usuario_data['email'] != instance.usuario.email:
             nuevo_email = usuario_data['email']
             # Verificamos si existe en otro usuario distinto al actual
             if User.objects.filter(email=nuevo_email).exclude(pk=instance.usuario.pk).exists():
@@ -63,20 +82,18 @@ class PerfilSerializer(serializers.ModelSerializer):
         # ---------------------------------------
 
         # 2. Actualizamos los campos propios del Perfil (ej: biografía)
-        instance.biografia = validated_data.get('biografia', instance.biografia)
-        instance.save()
+        # 3. y los del modelo User relacionado (username, email).
+        # Cada modelo se guarda solo si algo cambió y solo con esas columnas.
+        asignar_cambios(instance, {c: validated_data[c] for c in CAMPOS_PERFIL if c in validated_data})
+        asignar_cambios(instance.usuario, usuario_data)
+
+        return instance
 
-        # 3. Actualizamos los datos del modelo User relacionado
-        user = instance.usuario
-        
-        # Si venía un username nuevo y pasó la validación, lo guardamos
-        if 'username' in usuario_data:
-            user.username = usuario_data['username']
-            
-        # Si venía un email nuevo y pasó la validación, lo guardamos
-        if 'email' in usuario_data:
-            user.email = usuario_data['email']
-            
-        user.save()
 
-        return instance
\ No newline at end of file
+def asignar_cambios(instancia, datos):
+    cambiados = [campo for campo, valor in datos.items() if getattr(instancia, campo) != valor]
+    for campo in cambiados:
+        setattr(instancia, campo, datos[campo])
+    if cambiados:
+        instancia.save(update_fields=cambiados)
+    return cambiados
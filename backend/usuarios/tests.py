@@ -1,9 +1,27 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync
 from django.urls import reverse
-from rest_framework.test import APITestCase
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.signals import user_login_failed
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase, APITransactionTestCase
 from rest_framework import status
 from django.contrib.auth.models import User
 
-class PruebasIntegracionUsuarios(APITestCase):
+from core.autenticacion import _local
+from core.limites import CacheLimites, obtener_limites
+from rest_framework.authtoken.models import Token
+
+from .models import PerfilUsuario
+
+# El login autentica en un hilo del pool (usuarios/acceso.py), con su propia
+# conexión: los datos tienen que estar confirmados, no en la transacción de la prueba
+class PruebasIntegracionUsuarios(APITransactionTestCase):
     
     def setUp(self):
         # Datos iniciales para las pruebas
@@ -42,4 +60,176 @@ class PruebasIntegracionUsuarios(APITestCase):
         cuando se registra un usuario (Signal).
         """
         self.assertTrue(hasattr(self.user, 'perfilusuario'))
-        self.assertEqual(self.user.perfilusuario.nivel_actual, 1)
\ No newline at end of file
+        self.assertEqual(self.user.perfilusuario.nivel_actual, 1)
+
+
+class PruebasLimiteLogin(APITransactionTestCase):
+    def setUp(self):
+        obtener_limites().vaciar()
+        self.user = User.objects.create_user(username='limitado', password='Password123')
+        self.url = '/api/auth/login/'
+
+    def login(self, username='limitado', password='Password123', ip='10.0.0.1'):
+        return self.client.post(self.url, {'username': username, 'password': password}, format='json', REMOTE_ADDR=ip)
+
+    def test_limite_por_usuario_corta_antes_del_hash(self):
+        """
+        Valida que pasada la capacidad de la cubeta del usuario se responde
+        429 con Retry-After sin calcular el hash, incluso con la contraseña
+        correcta, y que otro usuario desde la misma IP sigue entrando.
+        """
+        with mock.patch('usuarios.acceso.authenticate', wraps=authenticate) as verificar:
+            for _ in range(5):
+                self.assertEqual(self.login(password='mala').status_code, status.HTTP_400_BAD_REQUEST)
+            response = self.login()
+            self.assertEqual(verificar.call_count, 5)
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(response.data['reintentar_en'], int(response['Retry-After']))
+
+        User.objects.create_user(username='vecino', password='Password123')
+        self.assertEqual(self.login(username='vecino').status_code, status.HTTP_200_OK)
+
+    @override_settings(LOGIN_LIMITE_IP=(3, 0.01), LOGIN_LIMITE_USUARIO=None)
+    def test_limite_por_ip(self):
+        """
+        Valida que una IP que prueba muchos usuarios distintos se corta
+        (aunque no existan) y que otra IP no se ve afectada.
+        """
+        for i in range(3):
+            self.assertEqual(self.login(username=f'falso{i}').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.login().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.login(ip='10.0.0.2').status_code, status.HTTP_200_OK)
+
+    @override_settings(LOGIN_MAX_EN_ESPERA=0)
+    def test_pool_saturado_responde_503(self):
+        """Valida que con el pool de hashes lleno el login responde 503 en vez de encolar."""
+        response = self.login()
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_mismas_reglas_que_authenticate(self):
+        """
+        Valida que un usuario inactivo o datos incompletos dan 400, que un
+        intento fallido emite user_login_failed y que un hash con un hasher
+        viejo se actualiza al hasher por defecto al entrar.
+        """
+        self.assertEqual(self.client.post(self.url, {'username': 'limitado'}, format='json').status_code, 400)
+
+        fallidos = []
+        receptor = lambda sender, credentials, **kwargs: fallidos.append(credentials['username'])
+        user_login_failed.connect(receptor)
+        self.addCleanup(user_login_failed.disconnect, receptor)
+        self.assertEqual(self.login(password='mala').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(fallidos, ['limitado'])
+
+        self.user.password = make_password('Password123', hasher='pbkdf2_sha1')
+        self.user.save()
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$'))
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.login(ip='10.0.0.3').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_login_son_dos_consultas(self):
+        """
+        Valida que el login de la API son 2 consultas, el usuario (en el
+        hilo del pool) y el token, y que ninguna toca el perfil.
+        """
+        Token.objects.create(user=self.user)
+        en_pool = []
+
+        def autenticar(*args, **kwargs):
+            # Corre en el hilo del pool: se miden las consultas de su conexión
+            with CaptureQueriesContext(connection) as consultas:
+                usuario = authenticate(*args, **kwargs)
+            en_pool.extend(consultas.captured_queries)
+            return usuario
+
+        with mock.patch('usuarios.acceso.authenticate', side_effect=autenticar), \
+                CaptureQueriesContext(connection) as en_vista:
+            response = self.login()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        consultas = [q['sql'] for q in en_pool + en_vista.captured_queries]
+        self.assertEqual(len(consultas), 2)
+        self.assertFalse(any('usuarios_perfilusuario' in q for q in consultas))
+
+    def test_cubetas_en_cache_compartida(self):
+        """Valida que el backend compartido aplica la misma cubeta a través de la caché."""
+        cache.clear()
+        limites = CacheLimites()
+        consumir = async_to_sync(limites.consumir)
+        self.assertEqual([consumir('login:ip:x', 2, 0.01) for _ in range(2)], [0, 0])
+        self.assertGreater(consumir('login:ip:x', 2, 0.01), 0)
+        # Otro proceso (otra instancia) ve la misma cuenta
+        self.assertGreater(async_to_sync(CacheLimites().consumir)('login:ip:x', 2, 0.01), 0)
+
+
+class PruebasEscriturasPerfil(APITestCase):
+    def setUp(self):
+        cache.clear()
+        _local.vaciar()
+        obtener_limites().vaciar()
+        self.user = User.objects.create_user(username='escritor', email='e@mindwell.com', password='Password123')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    def consultas_perfil(self, consultas):
+        return [q['sql'] for q in consultas if 'usuarios_perfilusuario' in q['sql']]
+
+    def test_registro_crea_el_perfil_una_vez(self):
+        """
+        Valida que registrarse cuesta 3 consultas (unicidad del username,
+        INSERT del usuario e INSERT del perfil) y ningún UPDATE del perfil.
+        """
+        self.client.credentials()
+        with self.assertNumQueries(3):
+            response = self.client.post(
+                '/api/auth/registro/', {'username': 'nuevo', 'email': 'n@mindwell.com', 'password': 'Password123'},
+                format='json',
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(PerfilUsuario.objects.filter(usuario__username='nuevo').count(), 1)
+
+    def test_login_no_toca_el_perfil(self):
+        """
+        Valida que el login de sesión, que guarda last_login, no reescribe
+        el perfil (el de la API se mide en PruebasLimiteLogin).
+        """
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertTrue(self.client.login(username='escritor', password='Password123'))
+        self.assertTrue(any('last_login' in q['sql'] for q in consultas))
+        self.assertEqual(self.consultas_perfil(consultas), [])
+
+    def test_patch_guarda_solo_lo_que_cambia(self):
+        """
+        Valida que un PATCH de la biografía es un SELECT y un UPDATE de esa
+        sola columna (sin guardar el usuario), más la lectura de la XP en
+        vivo para la respuesta; que reenviar los mismos valores no escribe
+        nada y que cambiar el username solo actualiza esa columna del usuario.
+        """
+        url = '/api/auth/perfil/'
+        self.client.get(url)  # token ya en caché: no cuenta la autenticación
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.patch(url, {'biografia': 'Hola'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['biografia'], 'Hola')
+        self.assertEqual(len(consultas), 3)
+        actualizacion = consultas[1]['sql']
+        self.assertTrue(actualizacion.startswith('UPDATE "usuarios_perfilusuario" SET "biografia"'))
+        self.assertNotIn('nivel_actual', actualizacion)
+
+        with self.assertNumQueries(2):
+            self.client.patch(url, {'biografia': 'Hola', 'username': 'escritor', 'email': 'e@mindwell.com'}, format='json')
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.patch(url, {'username': 'escritora'}, format='json')
+        self.assertEqual(response.data['username'], 'escritora')
+        self.assertEqual(len(consultas), 4)
+        self.assertTrue(consultas[2]['sql'].startswith('UPDATE "auth_user" SET "username"'))
+        self.assertNotIn('password', consultas[2]['sql'])
+        self.assertEqual([q for q in self.consultas_perfil(consultas) if not q.startswith('SELECT')], [])
@@ -1,10 +1,17 @@
+import json
+import math
+
 from rest_framework import generics, permissions, status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.authtoken.models import Token
-from django.contrib.auth import authenticate
-from rest_framework.authentication import TokenAuthentication
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 
+from core.autenticacion import CachedTokenAuthentication
+from .acceso import Saturado, revisar_limites, verificar_credenciales
 from .models import PerfilUsuario
 from .serializers import RegistroSerializer, PerfilSerializer
 
@@ -20,47 +27,85 @@ class RegistroView(generics.CreateAPIView):
 # ==========================================
 # 2. VISTA DE LOGIN
 # ==========================================
-class LoginView(APIView):
-    # ✅ CORRECCIÓN CRÍTICA: Permitir acceso a cualquiera (público)
-    # Si no pones esto, settings.py bloquea el intento de login
-    permission_classes = [permissions.AllowAny]
+# Async: el hash de la contraseña se calcula en un pool aparte y los intentos
+# de más se cortan antes de calcularlo (ver usuarios/acceso.py). Así una
+# ráfaga de logins no frena al resto de la API.
+@method_decorator(csrf_exempt, name='dispatch')
+class LoginView(View):
+    # Público, como antes: no pasa por la autenticación ni los permisos de DRF
+
+    async def post(self, request):
+        datos = leer_datos(request)
+        username = datos.get('username')
+        password = datos.get('password')
+        if not isinstance(username, str) or not isinstance(password, str) or not username or not password:
+            return respuesta({'error': 'Credenciales inválidas'}, estado=400)
+
+        # Detrás de un proxy, REMOTE_ADDR tiene que venir ya corregido (ej: por el servidor ASGI)
+        espera = await revisar_limites(request.META.get('REMOTE_ADDR', ''), username)
+        if espera:
+            return respuesta(
+                {'error': 'Demasiados intentos. Intenta de nuevo más tarde.', 'reintentar_en': math.ceil(espera)},
+                estado=429, headers={'Retry-After': str(math.ceil(espera))},
+            )
+
+        try:
+            user = await verificar_credenciales(username, password)
+        except Saturado:
+            return respuesta(
+                {'error': 'Servicio ocupado. Intenta de nuevo en unos segundos.'},
+                estado=503, headers={'Retry-After': '1'},
+            )
 
-    def post(self, request):
-        username = request.data.get('username')
-        password = request.data.get('password')
-        user = authenticate(username=username, password=password)
-        
         if user:
-            token, _ = Token.objects.get_or_create(user=user)
-            return Response({'token': token.key, 'id': user.id})
-        return Response({'error': 'Credenciales inválidas'}, status=400)
+            token, _ = await Token.objects.aget_or_create(user=user)
+            return respuesta({'token': token.key, 'id': user.id})
+        return respuesta({'error': 'Credenciales inválidas'}, estado=400)
+
+
+def leer_datos(request):
+    # Lo mismo que aceptaba el parser de DRF: JSON o formulario
+    if request.content_type == 'application/json':
+        try:
+            datos = json.loads(request.body or b'{}')
+        except ValueError:
+            return {}
+        return datos if isinstance(datos, dict) else {}
+    return request.POST
+
+
+def respuesta(datos, estado=200, headers=None):
+    # Response de DRF fuera de un APIView: el renderer se indica a mano
+    response = Response(datos, status=estado, headers=headers)
+    response.accepted_renderer = JSONRenderer()
+    response.accepted_media_type = JSONRenderer.media_type
+    response.renderer_context = {}
+    return response
 
 # ==========================================
 # 3. VISTA DE PERFIL
 # ==========================================
 class PerfilView(APIView):
     # Aquí SÍ queremos seguridad
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        try:
-            # Intentamos obtener el perfil, si no existe, lo creamos
-            perfil = request.user.perfilusuario 
-        except PerfilUsuario.DoesNotExist:
-            perfil = PerfilUsuario.objects.create(usuario=request.user)
-            
-        serializer = PerfilSerializer(perfil)
+        serializer = PerfilSerializer(perfil_de(request.user))
         return Response(serializer.data)
 
     def patch(self, request):
-        try:
-            perfil = request.user.perfilusuario
-        except PerfilUsuario.DoesNotExist:
-            perfil = PerfilUsuario.objects.create(usuario=request.user)
-
-        serializer = PerfilSerializer(perfil, data=request.data, partial=True)
+        serializer = PerfilSerializer(perfil_de(request.user), data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data)
-        return Response(serializer.errors, status=400)
\ No newline at end of file
+        return Response(serializer.errors, status=400)
+
+
+def perfil_de(usuario):
+    # Intentamos obtener el perfil, si no existe, lo creamos (usuarios de
+    # antes de la señal o creados con bulk_create, que no la dispara)
+    try:
+        return usuario.perfilusuario
+    except PerfilUsuario.DoesNotExist:
+        return PerfilUsuario.objects.get_or_create(usuario=usuario)[0]
@@ -30,6 +30,16 @@ Notifications.setNotificationHandler({
   }),
 });
 
+// [primer día del mes, primer día del siguiente) como YYYY-MM-DD
+const rangoDelMes = (fecha: Date): [string, string] => {
+  const formato = (d: Date) =>
+    `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, "0")}-${String(d.getDate()).padStart(2, "0")}`;
+  return [
+    formato(new Date(fecha.getFullYear(), fecha.getMonth(), 1)),
+    formato(new Date(fecha.getFullYear(), fecha.getMonth() + 1, 1)),
+  ];
+};
+
 const daysOfWeek = ["Dom", "Lun", "Mar", "Mié", "Jue", "Vie", "Sáb"];
 
 // ✅ CAMBIO 1: Mes Actualizado
@@ -76,9 +86,11 @@ export default function CalendarView() {
   const cargarDatos = async () => {
     try {
       setLoading(true);
-      const dataRegistros = await api.getRegistros();
+      // Solo el mes que muestra la grilla (rango indexado en el backend)
+      const [desde, hasta] = rangoDelMes(today);
+      const dataRegistros = await api.getRegistrosEnRango(desde, hasta);
       setRegistros(dataRegistros || []);
-      const dataRecordatorios = await api.getRecordatorios();
+      const dataRecordatorios = await api.getRecordatorios(desde, hasta);
       setRecordatorios(dataRecordatorios || []);
       const dataPerfil = await api.getPerfil();
       setPerfil(dataPerfil);
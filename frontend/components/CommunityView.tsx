@@ -6,27 +6,85 @@ import {
 import { Send, MessageCircle, Heart, User } from "lucide-react-native";
 import { api, Publicacion } from "../services/api";
 
+const REFRESCO_MS = 30_000;
+
 export default function CommunityView() {
   const [posts, setPosts] = useState<Publicacion[]>([]);
   const [loading, setLoading] = useState(true);
   const [refreshing, setRefreshing] = useState(false);
   const [nuevoMensaje, setNuevoMensaje] = useState("");
   const [enviando, setEnviando] = useState(false);
+  const [siguiente, setSiguiente] = useState<string | null>(null);
+  const [cargandoMas, setCargandoMas] = useState(false);
 
   useEffect(() => {
     cargarPosts();
   }, []);
 
+  // Las publicaciones nuevas llegan por el stream, sin recargar el feed.
+  // Si el servidor no ofrece el stream, se vuelve a refrescar cada tanto.
+  useEffect(() => {
+    let cortar: (() => void) | null = null;
+    let refresco: ReturnType<typeof setInterval> | null = null;
+    let desmontado = false;
+    api.escucharEventos(
+      (evento) => {
+        if (evento.tipo !== 'publicacion') return;
+        agregarNuevos([evento.datos]);
+      },
+      () => {
+        if (!desmontado && !refresco) refresco = setInterval(refrescarNuevos, REFRESCO_MS);
+      },
+    ).then((fn) => {
+      if (desmontado) fn();
+      else cortar = fn;
+    });
+    return () => {
+      desmontado = true;
+      cortar?.();
+      if (refresco) clearInterval(refresco);
+    };
+  }, []);
+
+  const agregarNuevos = (nuevos: Publicacion[]) => {
+    setPosts((actuales) => {
+      const vistos = new Set(actuales.map((p) => p.id));
+      const faltan = nuevos.filter((p) => !vistos.has(p.id));
+      return faltan.length ? [...faltan, ...actuales] : actuales;
+    });
+  };
+
+  // Sin stream: trae la primera página y suma lo que falte arriba, sin
+  // perder las páginas que el usuario ya cargó con el scroll
+  const refrescarNuevos = async () => {
+    const pagina = await api.getPublicaciones();
+    agregarNuevos(pagina.results);
+  };
+
   const cargarPosts = async () => {
     try {
-      const data = await api.getPublicaciones();
-      setPosts(data);
+      const pagina = await api.getPublicaciones();
+      setPosts(pagina.results);
+      setSiguiente(pagina.next);
     } finally {
       setLoading(false);
       setRefreshing(false);
     }
   };
 
+  // Scroll infinito: pide la página siguiente con el cursor que dio el backend
+  const cargarMas = async () => {
+    if (!siguiente || cargandoMas) return;
+    setCargandoMas(true);
+    try {
+      const pagina = await api.getPublicaciones(siguiente);
+      setPosts((anteriores) => [...anteriores, ...pagina.results]);
+      setSiguiente(pagina.next);
+    } finally {
+      setCargandoMas(false);
+    }
+  };
+
   const handlePublicar = async () => {
     if (!nuevoMensaje.trim()) return;
     
@@ -37,12 +95,27 @@ export default function CommunityView() {
     if (post) {
       setPosts([post, ...posts]); // Agregamos el nuevo al principio
       setNuevoMensaje("");
-      Alert.alert("¡Enviado!", "Tu mensaje ha sido compartido con la comunidad.");
+      if (post.alerta_crisis) {
+        Alert.alert(
+          "No estás solo/a 💜",
+          "Tu mensaje fue compartido. Si estás pasando por un momento muy difícil, habla con alguien de confianza o llama a la línea de emergencias de tu país."
+        );
+      } else {
+        Alert.alert("¡Enviado!", "Tu mensaje ha sido compartido con la comunidad.");
+      }
     } else {
       Alert.alert("Error", "No se pudo enviar el mensaje.");
     }
   };
 
+  const toggleLike = async (item: Publicacion) => {
+    const estado = await api.cambiarLike(item.id, !item.liked_by_me);
+    if (!estado) return;
+    setPosts((actuales) =>
+      actuales.map((p) => (p.id === estado.id ? { ...p, likes: estado.likes, liked_by_me: estado.liked_by_me } : p))
+    );
+  };
+
   const onRefresh = () => {
     setRefreshing(true);
     cargarPosts();
@@ -67,10 +140,14 @@ export default function CommunityView() {
       <Text style={styles.content}>{item.contenido}</Text>
       
       <View style={styles.cardFooter}>
-        <View style={styles.actionRow}>
-            <Heart size={18} color="#64748b" />
+        <TouchableOpacity style={styles.actionRow} onPress={() => toggleLike(item)}>
+            <Heart
+              size={18}
+              color={item.liked_by_me ? "#a855f7" : "#64748b"}
+              fill={item.liked_by_me ? "#a855f7" : "none"}
+            />
             <Text style={styles.actionText}>{item.likes} Ánimos</Text>
-        </View>
+        </TouchableOpacity>
       </View>
     </View>
   );
@@ -93,6 +170,9 @@ export default function CommunityView() {
             keyExtractor={(item) => item.id.toString()}
             renderItem={renderItem}
             contentContainerStyle={styles.listContent}
+            onEndReached={cargarMas}
+            onEndReachedThreshold={0.5}
+            ListFooterComponent={cargandoMas ? <ActivityIndicator color="#a855f7" style={{ marginVertical: 16 }} /> : null}
             refreshControl={
                 <RefreshControl refreshing={refreshing} onRefresh={onRefresh} colors={['#a855f7']} />
             }
@@ -1,6 +1,7 @@
 import React, { useState, useCallback } from "react";
 import {
-  View, Text, ScrollView, TouchableOpacity, TextInput, StyleSheet, ActivityIndicator, Alert, RefreshControl
+  View, Text, ScrollView, TouchableOpacity, TextInput, StyleSheet, ActivityIndicator, Alert, RefreshControl,
+  NativeSyntheticEvent, NativeScrollEvent
 } from "react-native";
 import { useFocusEffect } from "expo-router"; 
 
@@ -41,11 +42,15 @@ export default function DiaryView() {
   const [entries, setEntries] = useState<RegistroDiario[]>([]);
   const [loading, setLoading] = useState(true);
   const [refreshing, setRefreshing] = useState(false);
+  // Historial por páginas: "siguiente" es el cursor de la próxima (null = no hay más)
+  const [siguiente, setSiguiente] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   const fetchEntries = async () => {
     try {
-      const data = await api.getRegistros();
-      setEntries(data);
+      const pagina = await api.getRegistros();
+      setEntries(pagina.results);
+      setSiguiente(pagina.next);
     } catch (error) {
       console.log("Error cargando diario");
     } finally {
@@ -54,6 +59,24 @@ export default function DiaryView() {
     }
   };
 
+  const fetchMore = async () => {
+    if (!siguiente || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const pagina = await api.getRegistros(siguiente);
+      setEntries(prev => [...prev, ...pagina.results]);
+      setSiguiente(pagina.next);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // Pide la próxima página al acercarse al final del historial
+  const handleScroll = ({ nativeEvent }: NativeSyntheticEvent<NativeScrollEvent>) => {
+    const { layoutMeasurement, contentOffset, contentSize } = nativeEvent;
+    if (layoutMeasurement.height + contentOffset.y >= contentSize.height - 200) fetchMore();
+  };
+
   useFocusEffect(
     useCallback(() => {
       fetchEntries();
@@ -123,6 +146,8 @@ export default function DiaryView() {
   return (
     <ScrollView 
       style={styles.container} 
+      onScroll={handleScroll}
+      scrollEventThrottle={400}
       refreshControl={<RefreshControl refreshing={refreshing} onRefresh={() => { setRefreshing(true); fetchEntries(); }} />}
     >
       <View style={styles.inner}>
@@ -300,6 +325,7 @@ export default function DiaryView() {
                 </Card>
               ))
             )}
+            {loadingMore && <ActivityIndicator color="#a855f7" />}
           </View>
         </View>
       </View>
@@ -79,8 +79,7 @@ export default function SettingsView({ onLogout }: SettingsViewProps) {
         setEsPremium(perfil.es_premium);
         setNotifications(prev => ({ ...prev, daily: perfil.notificaciones_diarias }));
       }
-      const recordatorios = await api.getRecordatorios();
-      const existingDaily = recordatorios.find(r => r.titulo === "Registro Diario");
+      const existingDaily = await api.buscarRecordatorio(r => r.titulo === "Registro Diario");
       if (existingDaily && existingDaily.id) {
         setDailyReminderId(existingDaily.id);
         const date = new Date(existingDaily.fecha_hora);
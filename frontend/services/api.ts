@@ -72,6 +72,34 @@ export interface Publicacion {
   contenido: string;
   fecha_creacion: string;
   likes: number;
+  liked_by_me?: boolean;
+  // Solo en la respuesta al publicar: la moderación detectó una frase de riesgo
+  alerta_crisis?: boolean;
+}
+
+export interface EstadoLike {
+  id: number;
+  likes: number;
+  liked_by_me: boolean;
+}
+
+export interface PaginaFeed {
+  next: string | null;
+  results: Publicacion[];
+}
+
+// 'fragmento' trae las coincidencias entre <mark> y </mark>
+export interface ResultadoPublicacion extends Publicacion {
+  fragmento: string;
+}
+
+export interface ResultadoDiario {
+  id: number;
+  fecha: string;
+  hora: string;
+  emocion: string;
+  nota: string | null;
+  fragmento: string;
 }
 
 // ==========================================
@@ -85,6 +113,145 @@ const getAuthHeaders = async () => {
   };
 };
 
+// ==========================================
+// HELPER: Listas paginadas por cursor
+// ==========================================
+// El backend responde { next, results } y "next" ya trae el cursor.
+export interface Pagina<T> {
+  next: string | null;
+  results: T[];
+}
+
+const getPagina = async <T>(url: string, headers: Record<string, string>): Promise<Pagina<T>> => {
+  const response = await fetch(url, { headers });
+  if (!response.ok) throw new Error(`Error HTTP: ${response.status}`);
+  return await response.json();
+};
+
+// Recorre todas las páginas: solo para listados acotados por fecha (ej: un
+// mes del calendario). Los historiales se piden página a página con getPagina.
+const getPaginasDelRango = async <T>(url: string, headers: Record<string, string>): Promise<T[]> => {
+  const resultados: T[] = [];
+  let siguiente: string | null = url;
+  while (siguiente) {
+    const pagina: Pagina<T> = await getPagina<T>(siguiente, headers);
+    resultados.push(...pagina.results);
+    siguiente = pagina.next;
+  }
+  return resultados;
+};
+
+const rango = (desde: string, hasta: string) =>
+  `desde=${encodeURIComponent(desde)}&hasta=${encodeURIComponent(hasta)}`;
+
+// ==========================================
+// HELPER: POST con Idempotency-Key
+// ==========================================
+// Cada acción lleva una clave propia que se repite en los reintentos: si la
+// red cortó después de que el servidor guardó, el reintento recibe la misma
+// respuesta en vez de duplicar el registro o la XP.
+const nuevaClave = () =>
+  `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}-${Math.random().toString(36).slice(2)}`;
+
+const postIdempotente = async (url: string, body: unknown, intentos: number = 3): Promise<Response> => {
+  const headers = { ...(await getAuthHeaders()), 'Idempotency-Key': nuevaClave() };
+  for (let intento = 1; ; intento++) {
+    try {
+      const response = await fetch(url, { method: 'POST', headers, body: JSON.stringify(body) });
+      // 409: la primera petición sigue en curso, esperamos y repetimos
+      if (response.status !== 409 || intento >= intentos) return response;
+    } catch (error) {
+      if (intento >= intentos) throw error;
+    }
+    await new Promise((r) => setTimeout(r, 500 * intento));
+  }
+};
+
+// ==========================================
+// HELPER: Eventos en vivo (SSE)
+// ==========================================
+// React Native no trae EventSource: XMLHttpRequest va entregando el texto
+// a medida que llega y separamos los eventos por la línea en blanco.
+export type EventoEnVivo =
+  | { tipo: 'publicacion'; datos: Publicacion }
+  | { tipo: 'logro'; datos: { logro: number; nombre: string } };
+
+// Reconexión con espera exponencial: 5 s, 10 s, 20 s... hasta 2 min
+const RECONEXION_MS = 5000;
+const RECONEXION_MAX_MS = 120_000;
+// responseText crece con la conexión: pasado este tamaño reconectamos
+const MAX_TEXTO_STREAM = 1_000_000;
+
+// alFallar se llama si el servidor rechaza el stream (401, 501 sin ASGI,
+// 5xx...): no se reintenta y quien escucha vuelve a refrescar por su cuenta
+const escucharEventos = async (
+  alEvento: (evento: EventoEnVivo) => void,
+  alFallar?: (estado: number) => void,
+): Promise<() => void> => {
+  const token = await AsyncStorage.getItem('userToken');
+  let xhr: XMLHttpRequest | null = null;
+  let reintento: ReturnType<typeof setTimeout> | null = null;
+  let cerrado = false;
+  let espera = RECONEXION_MS;
+
+  const conectar = () => {
+    let leido = 0;
+    let renovar = false;
+    const actual = new XMLHttpRequest();
+    xhr = actual;
+    actual.open('GET', `${API_URL}/eventos/`);
+    actual.setRequestHeader('Accept', 'text/event-stream');
+    if (token) actual.setRequestHeader('Authorization', `Token ${token}`);
+
+    actual.onprogress = () => {
+      if (actual.status !== 200) return;
+      // Conectó bien: el próximo corte vuelve a esperar lo mínimo
+      espera = RECONEXION_MS;
+      const texto = actual.responseText;
+      const bloques = texto.slice(leido).split('\n\n');
+      const incompleto = bloques.pop() ?? '';
+      leido = texto.length - incompleto.length;
+      for (const bloque of bloques) {
+        let tipo = '';
+        let datos = '';
+        for (const linea of bloque.split('\n')) {
+          if (linea.startsWith('event: ')) tipo = linea.slice(7);
+          else if (linea.startsWith('data: ')) datos += linea.slice(6);
+        }
+        // Los latidos (": latido") no traen datos
+        if (tipo && datos) alEvento({ tipo, datos: JSON.parse(datos) } as EventoEnVivo);
+      }
+      if (texto.length > MAX_TEXTO_STREAM) {
+        renovar = true;
+        actual.abort();
+      }
+    };
+    actual.onloadend = () => {
+      if (cerrado) return;
+      if (actual.status >= 400) {
+        // Reintentar no lo va a arreglar: ni token ni servidor cambian solos
+        alFallar?.(actual.status);
+        return;
+      }
+      if (renovar) {
+        conectar();
+        return;
+      }
+      // Se cortó la red o el servidor cerró: reintentamos cada vez más espaciado
+      reintento = setTimeout(conectar, espera);
+      espera = Math.min(espera * 2, RECONEXION_MAX_MS);
+    };
+    actual.send();
+  };
+
+  conectar();
+  return () => {
+    cerrado = true;
+    if (reintento) clearTimeout(reintento);
+    xhr?.abort();
+  };
+};
+
 // ==========================================
 // API OBJECT
 // ==========================================
@@ -179,27 +346,45 @@ export const api = {
   // -------------------------
   // 3. DIARIO
   // -------------------------
-  getRegistros: async (): Promise<RegistroDiario[]> => {
+  // Una página del historial (la más reciente sin url). Para seguir,
+  // volver a llamar con el "next" de la respuesta.
+  getRegistros: async (url?: string): Promise<Pagina<RegistroDiario>> => {
     try {
       const headers = await getAuthHeaders();
-      const response = await fetch(`${API_URL}/seguimiento/diario/`, { headers });
-      
-      if (!response.ok) throw new Error(`Error HTTP: ${response.status}`);
-      return await response.json();
+      return await getPagina<RegistroDiario>(url ?? `${API_URL}/seguimiento/diario/`, headers);
     } catch (error) {
       console.error("Error obteniendo diario:", error);
-      return []; 
+      return { next: null, results: [] };
     }
   },
 
-  crearRegistro: async (datos: RegistroDiario): Promise<RegistroDiario | null> => {
+  // Registros con fecha en [desde, hasta) (YYYY-MM-DD), ej: el mes del calendario
+  getRegistrosEnRango: async (desde: string, hasta: string): Promise<RegistroDiario[]> => {
     try {
       const headers = await getAuthHeaders();
-      const response = await fetch(`${API_URL}/seguimiento/diario/`, {
-        method: 'POST',
-        headers: headers,
-        body: JSON.stringify(datos),
-      });
+      return await getPaginasDelRango<RegistroDiario>(`${API_URL}/seguimiento/diario/?${rango(desde, hasta)}`, headers);
+    } catch (error) {
+      console.error("Error obteniendo diario:", error);
+      return [];
+    }
+  },
+
+  // Busca en las notas propias del diario, de la más relevante a la menos
+  buscarDiario: async (q: string): Promise<ResultadoDiario[]> => {
+    try {
+      const headers = await getAuthHeaders();
+      const response = await fetch(`${API_URL}/seguimiento/diario/buscar/?q=${encodeURIComponent(q)}`, { headers });
+      if (!response.ok) throw new Error(`Error HTTP: ${response.status}`);
+      return (await response.json()).results;
+    } catch (error) {
+      console.error("Error buscarDiario:", error);
+      return [];
+    }
+  },
+
+  crearRegistro: async (datos: RegistroDiario): Promise<RegistroDiario | null> => {
+    try {
+      const response = await postIdempotente(`${API_URL}/seguimiento/diario/`, datos);
 
       if (!response.ok) {
         const errorBody = await response.text();
@@ -214,6 +399,37 @@ export const api = {
     }
   },
 
+  // Envía en un solo POST lo creado sin conexión. Cada elemento lleva un
+  // client_id propio, así reintentar no duplica nada en el servidor.
+  sincronizar: async (datos: {
+    diario?: (RegistroDiario & { client_id: string })[];
+    recordatorios?: (Recordatorio & { client_id: string })[];
+  }) => {
+    try {
+      const headers = await getAuthHeaders();
+      const response = await fetch(`${API_URL}/seguimiento/sync/`, {
+        method: 'POST',
+        headers: headers,
+        body: JSON.stringify(datos),
+      });
+      if (!response.ok) throw new Error(`Error HTTP: ${response.status}`);
+      return await response.json();
+    } catch (error) {
+      console.error("Error sincronizando:", error);
+      throw error;
+    }
+  },
+
+  // Solo lo que cambió desde el último token (sin token: todo lo vigente).
+  // Guardar "token" y repetir mientras "hay_mas" sea true.
+  getCambios: async (token?: string) => {
+    const headers = await getAuthHeaders();
+    const query = token ? `?token=${encodeURIComponent(token)}` : '';
+    const response = await fetch(`${API_URL}/seguimiento/cambios/${query}`, { headers });
+    if (!response.ok) throw new Error(`Error HTTP: ${response.status}`);
+    return await response.json();
+  },
+
   // -------------------------
   // 4. ESTADÍSTICAS
   // -------------------------
@@ -235,12 +451,7 @@ export const api = {
   // -------------------------
   registrarAccion: async (tipo: string, xp: number) => {
     try {
-      const headers = await getAuthHeaders();
-      const response = await fetch(`${API_URL}/gamificacion/accion/`, {
-        method: 'POST',
-        headers: headers,
-        body: JSON.stringify({ tipo, xp }),
-      });
+      const response = await postIdempotente(`${API_URL}/gamificacion/accion/`, { tipo, xp });
 
       if (!response.ok) throw new Error("Error registrando acción");
       return await response.json();
@@ -263,21 +474,90 @@ export const api = {
     }
   },
 
+  // Ranking global por XP total (paginado por cursor: seguir "next")
+  getRanking: async (url?: string) => {
+    try {
+      const headers = await getAuthHeaders();
+      const response = await fetch(url ?? `${API_URL}/gamificacion/ranking/`, { headers });
+      if (!response.ok) throw new Error(`Error HTTP: ${response.status}`);
+      return await response.json();
+    } catch (error) {
+      console.error("Error ranking:", error);
+      return { next: null, results: [] };
+    }
+  },
+
+  getMiPosicion: async (vecinos: number = 5) => {
+    try {
+      const headers = await getAuthHeaders();
+      const response = await fetch(`${API_URL}/gamificacion/ranking/yo/?vecinos=${vecinos}`, { headers });
+      if (!response.ok) throw new Error(`Error HTTP: ${response.status}`);
+      return await response.json();
+    } catch (error) {
+      console.error("Error mi posición:", error);
+      return null;
+    }
+  },
+
   // -------------------------
   // 6. RECORDATORIOS (CALENDARIO)
   // -------------------------
-  getRecordatorios: async (): Promise<Recordatorio[]> => {
+  // Recordatorios con ocurrencias en [desde, hasta) (fechas u horas ISO)
+  getRecordatorios: async (desde: string, hasta: string): Promise<Recordatorio[]> => {
     try {
       const headers = await getAuthHeaders();
-      const response = await fetch(`${API_URL}/seguimiento/recordatorios/`, { headers });
-      if (!response.ok) throw new Error("Error obteniendo recordatorios");
-      return await response.json();
+      return await getPaginasDelRango<Recordatorio>(`${API_URL}/seguimiento/recordatorios/?${rango(desde, hasta)}`, headers);
     } catch (error) {
       console.error("Error getRecordatorios:", error);
       return [];
     }
   },
 
+  // Primer recordatorio que cumpla la condición: corta apenas lo encuentra
+  buscarRecordatorio: async (condicion: (r: Recordatorio) => boolean): Promise<Recordatorio | null> => {
+    try {
+      const headers = await getAuthHeaders();
+      let siguiente: string | null = `${API_URL}/seguimiento/recordatorios/`;
+      while (siguiente) {
+        const pagina: Pagina<Recordatorio> = await getPagina<Recordatorio>(siguiente, headers);
+        const encontrado = pagina.results.find(condicion);
+        if (encontrado) return encontrado;
+        siguiente = pagina.next;
+      }
+      return null;
+    } catch (error) {
+      console.error("Error buscarRecordatorio:", error);
+      return null;
+    }
+  },
+
+  // Resumen compacto de un mes ("2026-03") para la grilla: conteos por día
+  getResumenMes: async (mes: string) => {
+    try {
+      const headers = await getAuthHeaders();
+      const response = await fetch(`${API_URL}/seguimiento/recordatorios/mes/?mes=${mes}`, { headers });
+      if (!response.ok) throw new Error(`Error HTTP: ${response.status}`);
+      return await response.json();
+    } catch (error) {
+      console.error("Error getResumenMes:", error);
+      return { mes, dias: {} };
+    }
+  },
+
+  // Recordatorios (únicos y repetitivos) ya expandidos entre dos fechas ISO
+  getOcurrencias: async (desde: string, hasta: string) => {
+    try {
+      const headers = await getAuthHeaders();
+      const query = `?desde=${encodeURIComponent(desde)}&hasta=${encodeURIComponent(hasta)}`;
+      const response = await fetch(`${API_URL}/seguimiento/recordatorios/ocurrencias/${query}`, { headers });
+      if (!response.ok) throw new Error(`Error HTTP: ${response.status}`);
+      return await response.json();
+    } catch (error) {
+      console.error("Error getOcurrencias:", error);
+      return [];
+    }
+  },
+
   crearRecordatorio: async (datos: { titulo: string; fecha_hora: string; tipo: string }) => {
     try {
       const headers = await getAuthHeaders();
@@ -318,26 +598,22 @@ export const api = {
   // -------------------------
   // 7. COMUNIDAD (NUEVO)
   // -------------------------
-  getPublicaciones: async (): Promise<Publicacion[]> => {
+  // Una página del feed. Para la siguiente, pasar el "next" que vino en la anterior.
+  getPublicaciones: async (url?: string | null): Promise<PaginaFeed> => {
     try {
       const headers = await getAuthHeaders();
-      const response = await fetch(`${API_URL}/comunidad/feed/`, { headers });
+      const response = await fetch(url ?? `${API_URL}/comunidad/feed/`, { headers });
       if (!response.ok) throw new Error("Error obteniendo feed");
       return await response.json();
     } catch (error) {
       console.error("Error getPublicaciones:", error);
-      return [];
+      return { next: null, results: [] };
     }
   },
 
   crearPublicacion: async (contenido: string): Promise<Publicacion | null> => {
     try {
-      const headers = await getAuthHeaders();
-      const response = await fetch(`${API_URL}/comunidad/feed/`, {
-        method: 'POST',
-        headers: headers,
-        body: JSON.stringify({ contenido }),
-      });
+      const response = await postIdempotente(`${API_URL}/comunidad/feed/`, { contenido });
       if (!response.ok) throw new Error("Error publicando");
       return await response.json();
     } catch (error) {
@@ -346,4 +622,35 @@ export const api = {
     }
   },
 
+  // Publicaciones nuevas y logros desbloqueados sin sondear; devuelve la función para cortar
+  escucharEventos,
+
+  buscarPublicaciones: async (q: string): Promise<ResultadoPublicacion[]> => {
+    try {
+      const headers = await getAuthHeaders();
+      const response = await fetch(`${API_URL}/comunidad/buscar/?q=${encodeURIComponent(q)}`, { headers });
+      if (!response.ok) throw new Error(`Error HTTP: ${response.status}`);
+      return (await response.json()).results;
+    } catch (error) {
+      console.error("Error buscarPublicaciones:", error);
+      return [];
+    }
+  },
+
+  // POST da like y DELETE lo quita; repetir cualquiera de los dos no cambia el contador
+  cambiarLike: async (id: number, dar: boolean): Promise<EstadoLike | null> => {
+    try {
+      const headers = await getAuthHeaders();
+      const response = await fetch(`${API_URL}/comunidad/feed/${id}/like/`, {
+        method: dar ? 'POST' : 'DELETE',
+        headers,
+      });
+      if (!response.ok) throw new Error("Error actualizando like");
+      return await response.json();
+    } catch (error) {
+      console.error("Error cambiarLike:", error);
+      return null;
+    }
+  },
+
 };
\ No newline at end of file